@@ -0,0 +1,93 @@
+# agents/chunker.py
+import re
+from typing import List
+
+import numpy as np
+
+from agents.rule_extractor import iter_sections
+from services.text_preprocessing import estimate_tokens
+
+POOLING_METHODS = ("mean", "max", "weighted")
+
+# Relative weight of each CV section in "weighted" pooling, shared among the section's chunks
+SECTION_WEIGHTS = {
+    "experience": 1.5, "skills": 1.5, "projects": 1.2, "summary": 1.0, "education": 1.0,
+    "certifications": 1.0, "header": 0.5, "languages": 0.5, "interests": 0.25, "references": 0.1,
+}
+
+
+def _split_long(text: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """Pack paragraphs, then lines, then word windows into pieces of at most max_tokens"""
+    pieces, current = [], ""
+    for unit in [u for u in re.split(r"\n\s*\n|\n", text) if u.strip()]:
+        candidate = f"{current}\n{unit}" if current else unit
+        if estimate_tokens(candidate) <= max_tokens:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        if estimate_tokens(unit) <= max_tokens:
+            current = unit
+            continue
+        # A single paragraph longer than a chunk: slide a word window with some overlap
+        words = unit.split()
+        window_chars = max_tokens * 4
+        overlap_chars = overlap_tokens * 4
+        start = 0
+        while start < len(words):
+            end, length = start, 0
+            while end < len(words) and length + len(words[end]) + 1 <= window_chars:
+                length += len(words[end]) + 1
+                end += 1
+            end = max(end, start + 1)
+            pieces.append(" ".join(words[start:end]))
+            if end >= len(words):
+                break
+            back, length = end, 0
+            while back > start + 1 and length + len(words[back - 1]) + 1 <= overlap_chars:
+                back -= 1
+                length += len(words[back]) + 1
+            start = back
+        current = ""
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int = 512, overlap_tokens: int = 64) -> List[dict]:
+    """Split a CV or JD into chunks on section boundaries, then on paragraph and token boundaries.
+
+    Each chunk is a dict with `section`, `text` and `tokens` (estimated).
+    Texts without recognisable headings are treated as one 'header' section.
+    """
+    chunks = []
+    for section, body in iter_sections(text):
+        if not body:
+            continue
+        for piece in _split_long(body, max_tokens, overlap_tokens):
+            # Keep the heading with every piece so each chunk carries its own context
+            piece_text = piece if section == "header" else f"{section.title()}\n{piece}"
+            chunks.append({"section": section, "text": piece_text, "tokens": estimate_tokens(piece_text)})
+    return chunks
+
+
+def pool_embeddings(matrix: np.ndarray, chunks: List[dict], method: str = "mean") -> np.ndarray:
+    """Combine (n, dim) chunk embeddings into one vector; zero rows (failed embeddings) are ignored"""
+    if method not in POOLING_METHODS:
+        raise ValueError(f"Unsupported pooling: {method}")
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1)
+    valid = norms > 0
+    if not valid.any():
+        return np.zeros(matrix.shape[1], dtype=np.float32)
+    unit = matrix[valid] / norms[valid, None]
+    if method == "max":
+        return unit.max(axis=0)
+    if method == "weighted":
+        # Per section, not per token: a short skills list counts as much as pages of experience
+        sections = [c["section"] for c, ok in zip(chunks, valid) if ok]
+        counts = {section: sections.count(section) for section in set(sections)}
+        weights = np.array([SECTION_WEIGHTS.get(section, 1.0) / counts[section] for section in sections],
+                           dtype=np.float32)
+        return (weights[:, None] * unit).sum(axis=0) / weights.sum()
+    return unit.mean(axis=0)
@@ -1,74 +1,209 @@
-# agents/cv_parser.py
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama.llms import OllamaLLM
+from agents.rule_extractor import RULES_VERSION, RuleExtractor
+from database.cache import prompt_version
+from services.metrics import metrics, record_llm_call
+from services.ollama_client import OllamaClient, OllamaError, get_ollama_client
+from services.text_preprocessing import TextPreprocessor, estimate_tokens
 import json
+import logging
 import re
 
-class CVParser:
-    def __init__(self):
-        self.llm = OllamaLLM(model="llama3.2")
-        
-    def parse(self, cv_text: str) -> dict:
-        prompt = ChatPromptTemplate.from_template("""
+logger = logging.getLogger(__name__)
+
+CV_PROMPT_TEMPLATE = """
         <|begin_of_text|>
         <|start_header_id|>system<|end_header_id|>
         Extract CV data into this JSON format:
         {{
-            "name": string, 
-            "email": string,
-            "education": list of degrees,
-            "experience": list of positions,
-            "skills": list,
-            "certifications": list
+{fields}
         }}
         <|start_header_id|>user<|end_header_id|>
         CV Content: {cv_text}
-        """)
+        """
+CV_FIELDS = {
+    "name": "string",
+    "email": "string",
+    "education": "list of degrees",
+    "experience": "list of positions",
+    "skills": "list",
+    "certifications": "list",
+}
+# JSON schema per field for constrained generation; positions and degrees may come back as objects
+CV_FIELD_SCHEMAS = {
+    "name": {"type": "string"},
+    "email": {"type": "string"},
+    "education": {"type": "array"},
+    "experience": {"type": "array"},
+    "skills": {"type": "array", "items": {"type": "string"}},
+    "certifications": {"type": "array", "items": {"type": "string"}},
+}
+# Generation cap (Ollama num_predict); the full field set of a long CV fits comfortably
+CV_MAX_TOKENS = 1024
+# Input budget: longer CVs are cut down section by section before parsing
+CV_MAX_INPUT_TOKENS = 2048
+
+
+def cv_schema(fields=CV_FIELDS) -> dict:
+    return {"type": "object", "properties": {f: CV_FIELD_SCHEMAS[f] for f in fields}, "required": list(fields)}
+
+
+class CVParser:
+    """Extract structured CV data.
+
+    A RuleExtractor fills what it can (email, phone, name, dictionary skills)
+    first; the LLM is only asked for the fields in `llm_fields` that are still
+    missing, and only sees the CV sections relevant to them. If nothing is
+    missing the LLM call is skipped. Pass fast_path=False for LLM-only parsing.
+
+    With `structured` (the default) Ollama is held to a JSON schema of the
+    requested fields and the response is read only until the object is
+    complete; `max_tokens` caps generation either way. CVs are normalized
+    and cut to `max_input_tokens` (None: no limit) before anything else.
+    """
+
+    def __init__(self, model: str = "llama3.2", cache=None, base_url: str = None, client: OllamaClient = None,
+                 fast_path: bool = True, llm_fields=None, rules: RuleExtractor = None, structured: bool = True,
+                 max_tokens: int = CV_MAX_TOKENS, max_input_tokens: int = CV_MAX_INPUT_TOKENS):
+        self.model = model
+        self.client = client or get_ollama_client(base_url)
+        self.rules = (rules or RuleExtractor()) if fast_path else None
+        self.llm_fields = [f for f in (llm_fields or CV_FIELDS) if f in CV_FIELDS]
+        self.structured = structured
+        self.options = {"num_predict": max_tokens} if max_tokens else None
+        self.preprocessor = TextPreprocessor(max_input_tokens)
+        # Rules, field selection, the schema and the input budget change the result, so they are part of the cache key
+        self.prompt_version = prompt_version(
+            CV_PROMPT_TEMPLATE + ",".join(self.llm_fields) + (f"rules{RULES_VERSION}" if fast_path else "")
+            + ("schema" if structured else "") + f"input{max_input_tokens}"
+        )
+        self.cache = cache  # optional database.cache.LLMResultCache
         
+    def parse(self, cv_text: str) -> dict:
+        cached = self._lookup(cv_text)
+        if cached is not None:
+            return cached
+        found, fields, context = self._plan(self.preprocessor.prepare(cv_text, "cv"))
+        if not fields:
+            return self._finish(cv_text, found, {})
+        return self._finish(cv_text, found, self._extract(context, fields))
+
+    async def aparse(self, cv_text: str) -> dict:
+        """asyncio version of parse"""
+        cached = self._lookup(cv_text)
+        if cached is not None:
+            return cached
+        found, fields, context = self._plan(self.preprocessor.prepare(cv_text, "cv"))
+        if not fields:
+            return self._finish(cv_text, found, {})
+        return self._finish(cv_text, found, await self._aextract(context, fields))
+
+    def _prompt(self, cv_text: str, fields=CV_FIELDS) -> str:
+        lines = ",\n".join(f'            "{field}": {CV_FIELDS[field]}' for field in fields)
+        return CV_PROMPT_TEMPLATE.format(fields=lines, cv_text=cv_text)
+
+    def _plan(self, cv_text: str):
+        """Run the fast path; returns (fields found, fields left for the LLM, context to send it)"""
+        if self.rules is None:
+            return {}, self.llm_fields, cv_text
+        found = self.rules.extract(cv_text)
+        fields = [f for f in self.llm_fields if f not in found]
+        full_tokens = estimate_tokens(self._prompt(cv_text))
+        if not fields:
+            metrics.incr("llm_calls_saved_total", agent="cv_parser")
+            metrics.incr("llm_prompt_tokens_saved_total", full_tokens, agent="cv_parser")
+            return found, fields, None
+        context = self.rules.trimmed_context(cv_text, fields)
+        saved = full_tokens - estimate_tokens(self._prompt(context, fields))
+        metrics.incr("llm_prompt_tokens_saved_total", max(0, saved), agent="cv_parser")
+        return found, fields, context
+
+    def _lookup(self, cv_text: str):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.model, self.prompt_version, cv_text)
+        metrics.incr("cache_hits_total" if cached is not None else "cache_misses_total", cache="llm_result")
+        return {**self._fallback(), **cached} if cached is not None else None
+
+    def _finish(self, cv_text: str, found: dict, result):
+        if result is None:
+            # Placeholder data is never cached so the CV is retried next time,
+            # but fields the fast path found (e.g. the email) are still usable
+            return {**self._fallback(), **found}
+        # Rule-extracted fields win over anything the LLM volunteered for them
+        result = {**result, **found}
+        missing = [field for field in self.llm_fields if result.get(field) is None]
+        if missing:
+            # Same as a failed parse: fill in placeholders, but let the next run ask again
+            logger.warning(f"CV Parser left out {', '.join(missing)}; not caching the result")
+            metrics.incr("llm_partial_results_total", agent="cv_parser")
+        elif self.cache is not None:
+            # Only parsed fields are cached; placeholders are added on the way out
+            self.cache.put(self.model, self.prompt_version, cv_text, result)
+        return {**self._fallback(), **result}
+
+    def _extract(self, cv_text: str, fields=CV_FIELDS):
+        """Run the LLM and return the parsed JSON, or None if it could not be parsed"""
         try:
-            chain = prompt | self.llm
-            response = chain.invoke({"cv_text": cv_text})
-            print(f"CV Parser Response: {response}")
-            
-            # Extract JSON content from the response
-            result_text = response.content if hasattr(response, 'content') else str(response)
+            with metrics.timer("llm_seconds", agent="cv_parser"):
+                if self.structured:
+                    response = self.client.generate_json(self.model, self._prompt(cv_text, fields),
+                                                         schema=cv_schema(fields), options=self.options)
+                else:
+                    response = self.client.generate(self.model, self._prompt(cv_text, fields), options=self.options)
+        except OllamaError as e:
+            logger.error(f"CV Parser Error: {str(e)}")
+            metrics.incr("llm_errors_total", agent="cv_parser")
+            return None
+        return self._parse_response(response)
+
+    async def _aextract(self, cv_text: str, fields=CV_FIELDS):
+        try:
+            with metrics.timer("llm_seconds", agent="cv_parser"):
+                if self.structured:
+                    response = await self.client.agenerate_json(self.model, self._prompt(cv_text, fields),
+                                                                schema=cv_schema(fields), options=self.options)
+                else:
+                    response = await self.client.agenerate(self.model, self._prompt(cv_text, fields),
+                                                           options=self.options)
+        except OllamaError as e:
+            logger.error(f"CV Parser Error: {str(e)}")
+            metrics.incr("llm_errors_total", agent="cv_parser")
+            return None
+        return self._parse_response(response)
+
+    def _parse_response(self, response: dict):
+        record_llm_call("cv_parser", response)
+        if isinstance(response.get("parsed"), dict):
+            return response["parsed"]
+        result_text = response.get("response", "")
+        logger.debug("CV Parser Response: %s", result_text)
+        
+        # Try to find JSON in the response
+        json_start = result_text.find('{')
+        json_end = result_text.rfind('}') + 1
+        
+        if json_start >= 0 and json_end > json_start:
+            json_str = result_text[json_start:json_end]
             
-            # Try to find JSON in the response
-            json_start = result_text.find('{')
-            json_end = result_text.rfind('}') + 1
+            # Remove comments (// style)
+            json_str = re.sub(r'//.*?\n', '\n', json_str)
+            # Remove any trailing commas before closing brackets
+            json_str = re.sub(r',(\s*[\]}])', r'\1', json_str)
             
-            if json_start >= 0 and json_end > json_start:
-                json_str = result_text[json_start:json_end]
-                
-                # Remove comments (// style)
-                json_str = re.sub(r'//.*?\n', '\n', json_str)
-                # Remove any trailing commas before closing brackets
-                json_str = re.sub(r',(\s*[\]}])', r'\1', json_str)
-                
-                print(f"Cleaned CV JSON: {json_str}")
-                
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    print(f"CV JSON Parse Error: {e} in {json_str}")
+            logger.debug("Cleaned CV JSON: %s", json_str)
             
-            # Fallback with placeholder data
-            return {
-                "name": "Unknown Name",
-                "email": "unknown@example.com",
-                "education": [],
-                "experience": [],
-                "skills": [],
-                "certifications": []
-            }
-        except Exception as e:
-            print(f"CV Parser Error: {str(e)}")
-            # Return placeholder data on error
-            return {
-                "name": "Unknown Name",
-                "email": "unknown@example.com",
-                "education": [],
-                "experience": [],
-                "skills": [],
-                "certifications": []
-            }
\ No newline at end of file
+            try:
+                return json.loads(json_str)
+            except json.JSONDecodeError as e:
+                logger.warning(f"CV JSON Parse Error: {e}")
+        metrics.incr("llm_parse_failures_total", agent="cv_parser")
+        return None
+
+    def _fallback(self) -> dict:
+        return {
+            "name": "Unknown Name",
+            "email": "unknown@example.com",
+            "education": [],
+            "experience": [],
+            "skills": [],
+            "certifications": []
+        }
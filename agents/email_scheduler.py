@@ -2,47 +2,96 @@
 import smtplib
 from email.mime.text import MIMEText
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 import os
+import time
 from dotenv import load_dotenv
 import logging
 
 # Load environment variables at module level
 load_dotenv()
 
+
+def smtp_error_code(error: Exception) -> Optional[int]:
+    """SMTP reply code behind a send error; None for connection errors, which carry none"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # One recipient per message here; with several, a 4xx among them still makes it worth retrying
+        codes = [code for code, _ in error.recipients.values()]
+        return min(codes) if codes else None
+    return getattr(error, "smtp_code", None)
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """5xx replies (e.g. 550 no such user) will not change on retry; 4xx and dropped connections might"""
+    code = smtp_error_code(error)
+    return code is not None and code >= 500
+
 class EmailScheduler:
-    def __init__(self):
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587
+    def __init__(self, smtp_server: str = None, smtp_port: int = None, use_tls: bool = None,
+                 use_auth: bool = None, sender: str = None, timeout: float = 30.0):
+        # Defaults target Gmail; SMTP_* variables point it elsewhere (e.g. a local aiosmtpd for testing)
+        self.smtp_server = smtp_server or os.getenv("SMTP_SERVER", "smtp.gmail.com")
+        self.smtp_port = int(smtp_port or os.getenv("SMTP_PORT", 587))
+        self.use_tls = use_tls if use_tls is not None else os.getenv("SMTP_STARTTLS", "1") != "0"
+        self.use_auth = use_auth if use_auth is not None else os.getenv("SMTP_AUTH", "1") != "0"
+        self.timeout = timeout
         
         # Get credentials from environment variables
         self.email = os.getenv("EMAIL_USER")
         self.password = os.getenv("EMAIL_PASSWORD")
+        self.sender = sender or self.email
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
+    def credentials_missing(self) -> bool:
+        return self.use_auth and (not self.email or not self.password)
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Open one SMTP connection, upgraded to TLS and logged in as configured"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.use_auth:
+                server.login(self.email, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def build_message(self, to_email: str, subject: str, body: str) -> MIMEText:
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = self.sender
+        msg["To"] = to_email
+        return msg
+    
+    def build_invite(self, to_email: str, name: str, position: str) -> dict:
+        """Interview invitation as a dict accepted by send_bulk and DBHandler.enqueue_emails"""
+        return {
+            "to_email": to_email,
+            "subject": f"Interview Invitation for {position}",
+            "body": self.generate_email_content(name, position),
+        }
+    
     def send_interview_invite(self, to_email: str, name: str, position: str):
         """Send interview invitation email"""
         try:
             # Check if credentials are available
-            if not self.email or not self.password:
+            if self.credentials_missing():
                 self.logger.warning("Email credentials not set. Check your .env file")
                 return False, "Email credentials not set. Check your .env file"
             
             # Create message
-            msg = MIMEText(self.generate_email_content(name, position))
-            
-            msg["Subject"] = f"Interview Invitation for {position}"
-            msg["From"] = self.email
-            msg["To"] = to_email
+            invite = self.build_invite(to_email, name, position)
+            msg = self.build_message(to_email, invite["subject"], invite["body"])
             
             # Send email
             self.logger.info(f"Sending interview invitation to {to_email}")
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email, self.password)
-                server.sendmail(self.email, [to_email], msg.as_string())
+            with self._connect() as server:
+                server.sendmail(self.sender, [to_email], msg.as_string())
                 
             self.logger.info(f"Email sent successfully to {to_email}")
             return True, "Email sent successfully"
@@ -74,15 +123,68 @@ class EmailScheduler:
         future_date = datetime.now() + timedelta(days=days_add)
         return future_date.strftime("%A, %B %d, %Y")
         
+    def send_bulk(self, messages: List[dict], min_interval: float = 0.0) -> List[Tuple[bool, str, bool]]:
+        """Send many messages over one authenticated connection.
+
+        Each message is a dict with to_email, subject and body. Returns one
+        (success, detail, retryable) tuple per message, in order; a failure
+        is retryable unless the server rejected it with a 5xx reply. A
+        message rejected by the server does not stop the batch. A dropped connection is
+        reopened once before the remaining messages are given up on.
+        `min_interval` spaces messages out to respect provider rate limits.
+        """
+        if self.credentials_missing():
+            return [(False, "Email credentials not set. Check your .env file", True)] * len(messages)
+        
+        results = []
+        server = None
+        reconnects = 0
+        try:
+            for i, message in enumerate(messages):
+                if i and min_interval:
+                    time.sleep(min_interval)
+                msg = self.build_message(message["to_email"], message["subject"], message["body"])
+                while True:
+                    try:
+                        if server is None:
+                            server = self._connect()
+                        server.sendmail(self.sender, [message["to_email"]], msg.as_string())
+                        results.append((True, "Email sent successfully", False))
+                        break
+                    except smtplib.SMTPServerDisconnected as e:
+                        server = None
+                        if reconnects >= 1:
+                            results.append((False, f"Failed to send email: {str(e)}", True))
+                            break
+                        reconnects += 1
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError,
+                            smtplib.SMTPSenderRefused) as e:
+                        results.append((False, f"Failed to send email: {str(e)}", not is_permanent_failure(e)))
+                        break
+        except Exception as e:
+            # Connection or login failed: everything not yet sent fails with the same error. That is
+            # a problem with the server or the settings, not the messages, so they stay retryable.
+            error_msg = f"Failed to send email: {str(e)}"
+            self.logger.error(error_msg)
+            results += [(False, error_msg, True)] * (len(messages) - len(results))
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except smtplib.SMTPException:
+                    server.close()
+        
+        sent = sum(1 for ok, _, _ in results if ok)
+        self.logger.info(f"Bulk send: {sent}/{len(messages)} emails sent over one connection")
+        return results
+        
     def test_email_connection(self):
         """Test email connection and credentials"""
         try:
-            if not self.email or not self.password:
+            if self.credentials_missing():
                 return "Email credentials not set. Check your .env file"
                 
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email, self.password)
+            with self._connect():
                 return "Email connection successful"
         except Exception as e:
             return f"Email connection failed: {str(e)}"
\ No newline at end of file
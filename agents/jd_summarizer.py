@@ -1,13 +1,14 @@
-# agents/jd_summarizer.py
-from langchain_ollama.llms import OllamaLLM
-from langchain_core.prompts import ChatPromptTemplate
+from database.cache import prompt_version
+from services.metrics import metrics, record_llm_call
+from services.ollama_client import OllamaClient, OllamaError, get_ollama_client
+from services.text_preprocessing import TextPreprocessor
 import json
+import logging
 import re
 
-class JDSummarizer:
-    def __init__(self):
-        self.llm = OllamaLLM(model="llama3.2")
-        self.prompt = ChatPromptTemplate.from_template(""" 
+logger = logging.getLogger(__name__)
+
+JD_PROMPT_TEMPLATE = """ 
         <|begin_of_text|>
         <|start_header_id|>system<|end_header_id|>
         Analyze this job description and extract:
@@ -25,52 +26,146 @@ class JDSummarizer:
         <|start_header_id|>user<|end_header_id|>
         JOB DESCRIPTION:
         {jd_text}
-        """)
+        """
+JD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "required_skills": {"type": "array", "items": {"type": "string"}},
+        "required_experience": {"type": ["string", "null"]},
+        "required_education": {"type": ["string", "null"]},
+        "certifications": {"type": "array", "items": {"type": "string"}},
+        "key_responsibilities": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["required_skills", "required_experience", "required_education", "certifications",
+                 "key_responsibilities"],
+}
+# Generation cap (Ollama num_predict) for one summary
+JD_MAX_TOKENS = 768
+# Input budget: longer descriptions are cut down before summarizing
+JD_MAX_INPUT_TOKENS = 1024
+
+class JDSummarizer:
+    """Summarize a job description into skills, experience, education, certifications and responsibilities.
+
+    With `structured` (the default) Ollama is held to JD_SCHEMA and the
+    response is read only until the object is complete; `max_tokens` caps
+    generation either way. Descriptions are normalized and cut to
+    `max_input_tokens` (None: no limit) first.
+    """
+
+    def __init__(self, model: str = "llama3.2", cache=None, base_url: str = None, client: OllamaClient = None,
+                 structured: bool = True, max_tokens: int = JD_MAX_TOKENS,
+                 max_input_tokens: int = JD_MAX_INPUT_TOKENS):
+        self.model = model
+        self.client = client or get_ollama_client(base_url)
+        self.structured = structured
+        self.options = {"num_predict": max_tokens} if max_tokens else None
+        self.preprocessor = TextPreprocessor(max_input_tokens)
+        self.prompt_version = prompt_version(
+            JD_PROMPT_TEMPLATE + ("schema" if structured else "") + f"input{max_input_tokens}"
+        )
+        self.cache = cache  # optional database.cache.LLMResultCache
 
     def summarize(self, jd_text: str) -> dict:
+        return self.try_summarize(jd_text) or self._fallback()
+
+    def try_summarize(self, jd_text: str):
+        """Like summarize, but None instead of placeholder data when the LLM fails, so callers don't store it"""
+        cached = self._lookup(jd_text)
+        if cached is not None:
+            return cached
+        summary = self._extract(jd_text)
+        return self._finish(jd_text, summary) if summary is not None else None
+
+    async def asummarize(self, jd_text: str) -> dict:
+        """asyncio version of summarize"""
+        cached = self._lookup(jd_text)
+        if cached is not None:
+            return cached
+        return self._finish(jd_text, await self._aextract(jd_text))
+
+    def _prompt(self, jd_text: str) -> str:
+        return JD_PROMPT_TEMPLATE.format(jd_text=self.preprocessor.prepare(jd_text, "jd"))
+
+    def _lookup(self, jd_text: str):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.model, self.prompt_version, jd_text)
+        metrics.incr("cache_hits_total" if cached is not None else "cache_misses_total", cache="llm_result")
+        return cached
+
+    def _finish(self, jd_text: str, summary):
+        if summary is None:
+            # Placeholder data is never cached so the JD is retried next time
+            return self._fallback()
+        if self.cache is not None:
+            self.cache.put(self.model, self.prompt_version, jd_text, summary)
+        return summary
+
+    def _extract(self, jd_text: str):
+        """Run the LLM and return the parsed JSON, or None if it could not be parsed"""
         try:
-            chain = self.prompt | self.llm
-            result = chain.invoke({"jd_text": jd_text})
-            
-            # Log the result
-            print(f"JD Summarizer Response: {result}")
-            
-            # Extract JSON content from the response
-            result_text = result.content if hasattr(result, 'content') else str(result)
+            with metrics.timer("llm_seconds", agent="jd_summarizer"):
+                if self.structured:
+                    response = self.client.generate_json(self.model, self._prompt(jd_text), schema=JD_SCHEMA,
+                                                         options=self.options)
+                else:
+                    response = self.client.generate(self.model, self._prompt(jd_text), options=self.options)
+        except OllamaError as e:
+            logger.error(f"JD Summarizer Error: {str(e)}")
+            metrics.incr("llm_errors_total", agent="jd_summarizer")
+            return None
+        return self._parse_response(response)
+
+    async def _aextract(self, jd_text: str):
+        try:
+            with metrics.timer("llm_seconds", agent="jd_summarizer"):
+                if self.structured:
+                    response = await self.client.agenerate_json(self.model, self._prompt(jd_text), schema=JD_SCHEMA,
+                                                                options=self.options)
+                else:
+                    response = await self.client.agenerate(self.model, self._prompt(jd_text), options=self.options)
+        except OllamaError as e:
+            logger.error(f"JD Summarizer Error: {str(e)}")
+            metrics.incr("llm_errors_total", agent="jd_summarizer")
+            return None
+        return self._parse_response(response)
+
+    def _parse_response(self, response: dict):
+        record_llm_call("jd_summarizer", response)
+        if isinstance(response.get("parsed"), dict):
+            return response["parsed"]
+        result_text = response.get("response", "")
+        
+        # Log the result
+        logger.debug("JD Summarizer Response: %s", result_text)
+        
+        # Try to find JSON in the response
+        json_start = result_text.find('{')
+        json_end = result_text.rfind('}') + 1
+        
+        if json_start >= 0 and json_end > json_start:
+            json_str = result_text[json_start:json_end]
             
-            # Try to find JSON in the response
-            json_start = result_text.find('{')
-            json_end = result_text.rfind('}') + 1
+            # Remove comments (// style)
+            json_str = re.sub(r'//.*?\n', '\n', json_str)
+            # Remove any trailing commas before closing brackets
+            json_str = re.sub(r',(\s*[\]}])', r'\1', json_str)
             
-            if json_start >= 0 and json_end > json_start:
-                json_str = result_text[json_start:json_end]
-                
-                # Remove comments (// style)
-                json_str = re.sub(r'//.*?\n', '\n', json_str)
-                # Remove any trailing commas before closing brackets
-                json_str = re.sub(r',(\s*[\]}])', r'\1', json_str)
-                
-                print(f"Cleaned JSON: {json_str}")
-                
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    print(f"JSON Parse Error: {e} in {json_str}")
+            logger.debug("Cleaned JSON: %s", json_str)
             
-            # Fallback response
-            return {
-                "required_skills": [],
-                "required_experience": None,
-                "required_education": None,
-                "certifications": [],
-                "key_responsibilities": []
-            }
-        except Exception as e:
-            print(f"JD Summarizer Error: {str(e)}")
-            return {
-                "required_skills": [],
-                "required_experience": None,
-                "required_education": None,
-                "certifications": [],
-                "key_responsibilities": []
-            }
\ No newline at end of file
+            try:
+                return json.loads(json_str)
+            except json.JSONDecodeError as e:
+                logger.warning(f"JSON Parse Error: {e}")
+        metrics.incr("llm_parse_failures_total", agent="jd_summarizer")
+        return None
+
+    def _fallback(self) -> dict:
+        return {
+            "required_skills": [],
+            "required_experience": None,
+            "required_education": None,
+            "certifications": [],
+            "key_responsibilities": []
+        }
@@ -1,73 +1,329 @@
 # agents/matching_engine.py
+import asyncio
 import numpy as np
-import torch
-from typing import Union, List
-import requests
-import json
-import time
+from typing import Union, List, Optional, Tuple
+import logging
+from agents.chunker import POOLING_METHODS, chunk_text, pool_embeddings
+from services.metrics import metrics
+from services.ollama_client import OllamaClient, OllamaError, get_ollama_client
+from services.text_preprocessing import TextPreprocessor, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Embeddings are float32 NumPy vectors; (n, dim) matrices for batches.
+# Pass backend="torch" to MatchingEngine to get torch tensors instead.
+Embedding = np.ndarray
+
+# Ollama embeds at most num_ctx tokens (2048 by default) and silently drops the rest;
+# cutting by section first keeps skills and experience rather than whatever comes first
+EMBED_MAX_INPUT_TOKENS = 2048
 
 class MatchingEngine:
-    def __init__(self, model_name="nomic-embed-text"):
+    def __init__(self, model_name="nomic-embed-text", batch_size: int = 32, cache=None, base_url: str = None,
+                 backend: str = "numpy", client: OllamaClient = None, chunked: bool = False,
+                 chunk_tokens: int = 512, chunk_overlap: int = 64, pooling: str = "mean",
+                 max_input_tokens: int = EMBED_MAX_INPUT_TOKENS):
         self.model_name = model_name
-        self.ollama_url = "http://localhost:11434/api/embeddings"
+        self.cache = cache  # optional database.cache.EmbeddingCache
+        self.client = client or get_ollama_client(base_url)
+        self.batch_size = batch_size
+        self.embedding_dim = 768
+        if backend not in ("numpy", "torch"):
+            raise ValueError(f"Unsupported backend: {backend}")
+        self.backend = backend
+        # Chunked mode: texts longer than chunk_tokens are embedded per section/chunk and pooled,
+        # instead of being cut off at the model's context window
+        if pooling not in POOLING_METHODS:
+            raise ValueError(f"Unsupported pooling: {pooling}")
+        # Defaults only: one engine is shared across sessions and workers, so callers that want another
+        # mode pass chunked/pooling per call rather than changing these
+        self.chunked = chunked
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.pooling = pooling
+        self.max_input_tokens = max_input_tokens
+        self.preprocessor = TextPreprocessor(max_input_tokens)
+    
+    def _wrap(self, array: np.ndarray):
+        """Return results in the configured backend; torch is only imported when asked for"""
+        if self.backend == "torch":
+            import torch
+            return torch.from_numpy(array)
+        return array
+        
+    def _mode(self, chunked: Optional[bool], pooling: Optional[str]) -> Tuple[bool, str]:
+        """Per-call chunked/pooling, falling back to the engine's defaults"""
+        pooling = self.pooling if pooling is None else pooling
+        if pooling not in POOLING_METHODS:
+            raise ValueError(f"Unsupported pooling: {pooling}")
+        return self.chunked if chunked is None else bool(chunked), pooling
+
+    def embedding_config(self, chunked: Optional[bool] = None, pooling: Optional[str] = None) -> str:
+        """Short description of how a vector was made, stored next to it so mismatched vectors can be told apart"""
+        chunked, pooling = self._mode(chunked, pooling)
+        if chunked:
+            return f"{self.model_name};chunked:{self.chunk_tokens}/{self.chunk_overlap};{pooling}"
+        return f"{self.model_name};whole;input:{self.max_input_tokens}"
         
-    def get_embedding(self, text: str) -> torch.Tensor:
+    def get_embedding(self, text: str, chunked: Optional[bool] = None, pooling: Optional[str] = None) -> Embedding:
         """Generate embeddings for text using Ollama API"""
+        chunked, pooling = self._mode(chunked, pooling)
+        text = self._prepare(text, chunked)
+        if self._should_chunk(text, chunked):
+            return self._document_embedding(text, chunked, pooling)[0]
+        return self._embed_whole(text)
+    
+    async def aget_embedding(self, text: str, chunked: Optional[bool] = None,
+                             pooling: Optional[str] = None) -> Embedding:
+        """asyncio version of get_embedding"""
+        chunked, pooling = self._mode(chunked, pooling)
+        text = self._prepare(text, chunked)
+        if self._should_chunk(text, chunked):
+            chunks = chunk_text(text, self.chunk_tokens, self.chunk_overlap)
+            metrics.incr("embedding_chunks_total", len(chunks))
+            matrix = await self._aembeddings_array([c["text"] for c in chunks])
+            return self._wrap(pool_embeddings(matrix, chunks, pooling))
+        cached = self._lookup(text)
+        if cached is not None:
+            return self._wrap(cached)
+        return self._wrap(await self._arequest_embedding(text))
+    
+    def _prepare(self, text: str, chunked: bool) -> str:
+        # Chunked mode embeds long texts piece by piece, so they are only normalized, not cut
+        return self.preprocessor.prepare(text, "embedding", truncate=not chunked)
+
+    def _should_chunk(self, text: str, chunked: bool) -> bool:
+        return chunked and estimate_tokens(text) > self.chunk_tokens
+    
+    def get_document_embedding(self, text: str, chunked: Optional[bool] = None,
+                               pooling: Optional[str] = None) -> Tuple[Embedding, List[dict]]:
+        """Embedding for a whole CV/JD plus the chunks it was pooled from.
+
+        Outside chunked mode, or for texts that fit in one chunk, this is
+        get_embedding with no chunks. Otherwise every chunk dict gets its
+        own `embedding` so callers can store them and find the best section.
+        """
+        chunked, pooling = self._mode(chunked, pooling)
+        return self._document_embedding(self._prepare(text, chunked), chunked, pooling)
+
+    def _document_embedding(self, text: str, chunked: bool, pooling: str) -> Tuple[Embedding, List[dict]]:
+        if not self._should_chunk(text, chunked):
+            return self._embed_whole(text), []
+        chunks = chunk_text(text, self.chunk_tokens, self.chunk_overlap)
+        metrics.incr("embedding_chunks_total", len(chunks))
+        matrix = self._embeddings_array([c["text"] for c in chunks])
+        for chunk, vector in zip(chunks, matrix):
+            chunk["embedding"] = vector
+        return self._wrap(pool_embeddings(matrix, chunks, pooling)), chunks
+    
+    def _embed_whole(self, text: str) -> Embedding:
+        cached = self._lookup(text)
+        if cached is not None:
+            return self._wrap(cached)
+        return self._wrap(self._request_embedding(text))
+    
+    def best_chunk(self, query_embedding: Embedding, chunks: List[dict]) -> Optional[dict]:
+        """The chunk closest to the query, as {section, text, score}; None without chunks"""
+        chunks = [c for c in chunks or [] if c.get("embedding") is not None]
+        if not chunks:
+            return None
+        scores = self._score_matrix(np.asarray(query_embedding, dtype=np.float32)[None, :],
+                                    np.stack([np.asarray(c["embedding"], dtype=np.float32) for c in chunks]))[0]
+        best = int(np.argmax(scores))
+        return {"section": chunks[best]["section"], "text": chunks[best]["text"], "score": float(scores[best])}
+    
+    def _lookup(self, text: str) -> Optional[np.ndarray]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.model_name, text)
+        metrics.incr("cache_hits_total" if cached is not None else "cache_misses_total", cache="embedding")
+        return cached
+
+    def _request_embedding(self, text: str) -> np.ndarray:
         try:
-            # Prepare the request payload
-            payload = {
-                "model": self.model_name,
-                "prompt": text
-            }
-            
-            # Make API call to Ollama with retry mechanism
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = requests.post(self.ollama_url, json=payload)
-                    response.raise_for_status()  # Raise an exception for 4XX/5XX responses
-                    
-                    # Parse the response
-                    result = response.json()
-                    if "embedding" in result:
-                        # Convert to tensor and return
-                        embedding = torch.tensor(result["embedding"], dtype=torch.float32)
-                        print(f"Embedding shape: {embedding.shape}")
-                        return embedding
-                    else:
-                        print(f"Unexpected response format: {result}")
-                        break
-                except requests.exceptions.RequestException as e:
-                    print(f"Request failed (attempt {attempt+1}/{max_retries}): {str(e)}")
-                    if attempt < max_retries - 1:
-                        # Exponential backoff
-                        time.sleep(2 ** attempt)
-                    else:
-                        raise
-            
-            # If we get here, all retries failed or response was invalid
-            print("Failed to get embedding after retries")
-            return torch.zeros(768)  # Return zero tensor as fallback
-            
-        except Exception as e:
-            print(f"Embedding error: {str(e)}")
-            # Return zero tensor of expected shape as fallback
-            return torch.zeros(768)
+            metrics.incr("embedding_requests_total", endpoint="embeddings")
+            with metrics.timer("embedding_seconds", endpoint="embeddings"):
+                # The shared client handles pooling, timeouts and retries
+                embedding = self.client.embeddings(self.model_name, text)
+        except OllamaError as e:
+            embedding = None
+            logger.error(f"Embedding error: {str(e)}")
+        return self._to_vector(text, embedding)
+    
+    async def _arequest_embedding(self, text: str) -> np.ndarray:
+        try:
+            metrics.incr("embedding_requests_total", endpoint="embeddings")
+            with metrics.timer("embedding_seconds", endpoint="embeddings"):
+                embedding = await self.client.aembeddings(self.model_name, text)
+        except OllamaError as e:
+            embedding = None
+            logger.error(f"Embedding error: {str(e)}")
+        return self._to_vector(text, embedding)
+    
+    def _to_vector(self, text: str, embedding) -> np.ndarray:
+        """Convert an API embedding to float32 and cache it; failures become a zero vector"""
+        if not embedding:
+            metrics.incr("embedding_failures_total")
+            # Return zero vector of expected shape as fallback
+            return np.zeros(self.embedding_dim, dtype=np.float32)
+        vector = np.asarray(embedding, dtype=np.float32)
+        logger.debug("Embedding shape: %s", vector.shape)
+        if self.cache is not None:
+            self.cache.put(self.model_name, text, vector)
+        return vector
     
-    def calculate_match(self, jd_embedding: torch.Tensor, cv_embedding: torch.Tensor) -> float:
+    def get_embeddings(self, texts: List[str], batch_size: int = None, chunked: Optional[bool] = None) -> Embedding:
+        """Generate embeddings for many texts as one (n, dim) matrix, batching calls to Ollama.
+
+        Texts are embedded whole; `chunked` only decides whether they are cut
+        to the input budget first, as get_embedding would.
+        """
+        chunked = self._mode(chunked, None)[0]
+        return self._wrap(self._embeddings_array([self._prepare(text, chunked) for text in texts], batch_size))
+    
+    def _embeddings_array(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        batch_size = batch_size or self.batch_size
+        rows = self._lookup_many(texts)
+        missing = [i for i, row in enumerate(rows) if row is None]
+
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            vectors = self._embed_batch([texts[i] for i in batch])
+            for offset, i in enumerate(batch):
+                vector = vectors[offset] if vectors is not None else None
+                # Fall back to the single-text endpoint for items the batch call didn't cover
+                rows[i] = self._request_embedding(texts[i]) if vector is None else self._to_vector(texts[i], vector)
+
+        return self._stack(rows)
+    
+    async def aget_embeddings(self, texts: List[str], batch_size: int = None,
+                              chunked: Optional[bool] = None) -> Embedding:
+        """asyncio version of get_embeddings; batches are sent concurrently"""
+        chunked = self._mode(chunked, None)[0]
+        return self._wrap(await self._aembeddings_array([self._prepare(text, chunked) for text in texts], batch_size))
+
+    async def _aembeddings_array(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        batch_size = batch_size or self.batch_size
+        rows = self._lookup_many(texts)
+        missing = [i for i, row in enumerate(rows) if row is None]
+        batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+
+        async def embed_batch(batch):
+            try:
+                metrics.incr("embedding_requests_total", endpoint="embed")
+                with metrics.timer("embedding_seconds", endpoint="embed"):
+                    embeddings = await self.client.aembed(self.model_name, [texts[i] for i in batch])
+            except OllamaError as e:
+                logger.warning(f"Batch embedding failed: {str(e)}")
+                embeddings = None
+            vectors = self._batch_vectors(len(batch), embeddings) if embeddings is not None else None
+            for offset, i in enumerate(batch):
+                vector = vectors[offset] if vectors is not None else None
+                if vector is None:
+                    rows[i] = await self._arequest_embedding(texts[i])
+                else:
+                    rows[i] = self._to_vector(texts[i], vector)
+
+        await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return self._stack(rows)
+    
+    def _lookup_many(self, texts: List[str]) -> list:
+        if self.cache is None:
+            return [None] * len(texts)
+        rows = self.cache.get_many(self.model_name, texts)
+        hits = sum(row is not None for row in rows)
+        metrics.incr("cache_hits_total", hits, cache="embedding")
+        metrics.incr("cache_misses_total", len(texts) - hits, cache="embedding")
+        return rows
+    
+    def _stack(self, rows: list) -> np.ndarray:
+        dim = len(rows[0]) if rows else self.embedding_dim
+        matrix = np.zeros((len(rows), dim), dtype=np.float32)
+        for i, vector in enumerate(rows):
+            if len(vector) == dim:
+                matrix[i] = vector
+            else:
+                logger.warning(f"Embedding {i} has dimension {len(vector)}, expected {dim}; using zeros")
+        return matrix
+
+    def _embed_batch(self, texts: List[str]) -> Union[List[list], None]:
+        """Embed one batch with /api/embed; returns None if the whole call failed"""
+        try:
+            metrics.incr("embedding_requests_total", endpoint="embed")
+            with metrics.timer("embedding_seconds", endpoint="embed"):
+                embeddings = self.client.embed(self.model_name, texts)
+        except OllamaError as e:
+            logger.warning(f"Batch embedding failed: {str(e)}")
+            return None
+        return self._batch_vectors(len(texts), embeddings)
+    
+    def _batch_vectors(self, count: int, embeddings) -> Union[List[list], None]:
+        if not isinstance(embeddings, list):
+            logger.warning(f"Unexpected batch response format: {type(embeddings).__name__}")
+            return None
+        if len(embeddings) != count:
+            logger.warning(f"Batch returned {len(embeddings)} embeddings for {count} inputs")
+        # Missing or empty entries are retried one by one by the caller
+        return [embeddings[i] if i < len(embeddings) and embeddings[i] else None for i in range(count)]
+
+    def calculate_match(self, jd_embedding: Embedding, cv_embedding: Embedding) -> float:
         """Calculate match score between job description and CV using cosine similarity"""
         try:
-            # Normalize embeddings
-            jd_embedding_norm = jd_embedding / jd_embedding.norm()
-            cv_embedding_norm = cv_embedding / cv_embedding.norm()
+            jd_embedding = np.asarray(jd_embedding, dtype=np.float32)
+            cv_embedding = np.asarray(cv_embedding, dtype=np.float32)
+            norms = np.linalg.norm(jd_embedding) * np.linalg.norm(cv_embedding)
+            if norms == 0:
+                # A zero vector means the embedding call failed
+                return 0.0
             
             # Calculate cosine similarity using dot product of normalized vectors
-            similarity = torch.dot(jd_embedding_norm, cv_embedding_norm).item()
+            similarity = float(np.dot(jd_embedding, cv_embedding) / norms)
             
             # Convert to percentage (0-100)
-            score = min(max(float(similarity * 100), 0), 100)
-            print(f"Match score: {score}")
+            score = min(max(similarity * 100, 0), 100)
             return score
         except Exception as e:
-            print(f"Match calculation error: {str(e)}")
-            
\ No newline at end of file
+            logger.error(f"Match calculation error: {str(e)}")
+    
+    def score_matrix(self, jd_embeddings: Embedding, cv_embeddings: Embedding) -> Embedding:
+        """Score every JD in an (m, d) matrix against every CV in an (n, d) matrix.
+
+        Returns an (m, n) matrix on the same 0-100 scale as calculate_match.
+        Zero vectors (failed embeddings) score 0 instead of NaN.
+        """
+        return self._wrap(self._score_matrix(jd_embeddings, cv_embeddings))
+    
+    def _score_matrix(self, jd_embeddings, cv_embeddings) -> np.ndarray:
+        jd_matrix = _normalize_rows(np.asarray(jd_embeddings, dtype=np.float32))
+        cv_matrix = _normalize_rows(np.asarray(cv_embeddings, dtype=np.float32))
+        return np.clip(jd_matrix @ cv_matrix.T * 100, 0, 100)
+    
+    def match_many(self, jd_embeddings: Embedding, cv_embeddings: Embedding, k: int = 5) -> dict:
+        """Score all JD/CV pairs and return the top-k CVs per job and the top-k jobs per CV"""
+        scores = self._score_matrix(jd_embeddings, cv_embeddings)
+        top_cv_indices, top_cv_scores = _top_k_rows(scores, k)
+        top_job_indices, top_job_scores = _top_k_rows(scores.T, k)
+        return {
+            "scores": self._wrap(scores),
+            # (m, k): best CV indices and scores for each job row
+            "top_cvs_per_job": (self._wrap(top_cv_indices), self._wrap(top_cv_scores)),
+            # (n, k): best job indices and scores for each CV column
+            "top_jobs_per_cv": (self._wrap(top_job_indices), self._wrap(top_job_scores)),
+        }
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _top_k_rows(scores: np.ndarray, k: int):
+    """Indices and values of the k largest entries of each row, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.zeros((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(scores.dtype)
+    indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(values, order, axis=1)
@@ -0,0 +1,168 @@
+# agents/reranker.py
+import json
+import logging
+import re
+import time
+from typing import List, Optional
+
+from database.cache import prompt_version
+from services.metrics import metrics, record_llm_call
+from services.ollama_client import OllamaClient, OllamaDeadlineExceeded, OllamaError, get_ollama_client
+from services.text_preprocessing import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+RERANK_PROMPT_TEMPLATE = """
+        <|begin_of_text|>
+        <|start_header_id|>system<|end_header_id|>
+        You are screening candidates for a job. Compare the candidate profile with the
+        job requirements and rate how well the candidate fits.
+        Respond only with JSON in this format:
+        {{
+            "fit_score": number from 0 to 100,
+            "reason": one sentence
+        }}
+        <|start_header_id|>user<|end_header_id|>
+        JOB REQUIREMENTS:
+        {job}
+
+        CANDIDATE PROFILE:
+        {candidate}
+        """
+
+RERANK_SCHEMA = {
+    "type": "object",
+    "properties": {"fit_score": {"type": "number"}, "reason": {"type": "string"}},
+    "required": ["fit_score", "reason"],
+}
+# Generation cap (Ollama num_predict): a score and one sentence
+RERANK_MAX_TOKENS = 128
+
+# Candidate fields sent to the LLM; everything else (raw text, ids, scores) stays out of the prompt
+PROFILE_FIELDS = ("education", "experience", "skills", "certifications")
+
+
+class CandidateReranker:
+    """Second ranking stage: an LLM judges the best embedding matches against the JD summary.
+
+    Only the `top_n` candidates by embedding score are sent to the LLM, one
+    call each, until the token or time budget runs out; an answer still
+    streaming at the time budget is cut off. Reranked candidates
+    get `llm_score`, `rerank_reason` and a `final_score` blending the two
+    scores; the rest keep their embedding score as final_score and stay
+    below the reranked ones. Answers are held to RERANK_SCHEMA and capped at
+    `max_tokens`. The limits given to the constructor are defaults that
+    `rerank` can override per call, so one shared instance serves every
+    session.
+    """
+
+    def __init__(self, model: str = "llama3.2", cache=None, base_url: str = None, client: OllamaClient = None,
+                 top_n: int = 10, token_budget: int = 20000, time_budget: float = 120.0, llm_weight: float = 0.6,
+                 max_profile_chars: int = 3000, max_tokens: int = RERANK_MAX_TOKENS):
+        self.model = model
+        self.client = client or get_ollama_client(base_url)
+        self.prompt_version = prompt_version(RERANK_PROMPT_TEMPLATE)
+        self.cache = cache  # optional database.cache.LLMResultCache
+        self.top_n = top_n
+        self.token_budget = token_budget
+        self.time_budget = time_budget
+        self.llm_weight = llm_weight
+        self.max_profile_chars = max_profile_chars
+        self.options = {"num_predict": max_tokens} if max_tokens else None
+
+    def rerank(self, jd_summary: dict, candidates: List[dict], top_n: Optional[int] = None,
+               token_budget: Optional[int] = None, time_budget: Optional[float] = None) -> List[dict]:
+        """Return the candidates reordered by final_score; the input list is not modified.
+
+        top_n, token_budget and time_budget default to the instance's settings.
+        """
+        top_n = self.top_n if top_n is None else top_n
+        token_budget = self.token_budget if token_budget is None else token_budget
+        time_budget = self.time_budget if time_budget is None else time_budget
+        ranked = sorted(candidates, key=lambda c: c.get("score") or 0, reverse=True)
+        head, tail = ranked[:top_n], ranked[top_n:]
+        job = json.dumps(jd_summary, ensure_ascii=False)
+
+        reranked, not_reached = [], []
+        tokens_used = 0
+        deadline = time.monotonic() + time_budget
+        for i, candidate in enumerate(head):
+            prompt = self._prompt(job, candidate)
+            remaining = deadline - time.monotonic()
+            over_budget = ("token_budget" if tokens_used + estimate_tokens(prompt) > token_budget
+                           else "time_budget" if remaining <= 0 else None)
+            if over_budget:
+                metrics.incr("rerank_skipped_total", len(head) - i, reason=over_budget)
+                not_reached += head[i:]
+                break
+
+            judgement, tokens = self._judge(prompt, deadline)
+            tokens_used += tokens
+            if judgement is None:
+                not_reached.append(candidate)
+                continue
+            llm_score = min(max(float(judgement["fit_score"]), 0.0), 100.0)
+            final = self.llm_weight * llm_score + (1 - self.llm_weight) * (candidate.get("score") or 0)
+            reranked.append({**candidate, "llm_score": llm_score, "rerank_reason": judgement.get("reason", ""),
+                             "final_score": final})
+
+        logger.info(f"Reranked {len(reranked)}/{len(head)} candidates using ~{tokens_used} tokens")
+        reranked.sort(key=lambda c: c["final_score"], reverse=True)
+        rest = [{**c, "final_score": c.get("score") or 0} for c in not_reached + tail]
+        return reranked + rest
+
+    def _prompt(self, job: str, candidate: dict) -> str:
+        profile = {field: candidate.get(field) for field in PROFILE_FIELDS if candidate.get(field)}
+        profile_json = json.dumps(profile, ensure_ascii=False)[:self.max_profile_chars]
+        return RERANK_PROMPT_TEMPLATE.format(job=job, candidate=profile_json)
+
+    def _judge(self, prompt: str, deadline: float):
+        """(parsed judgement or None, tokens spent); cached judgements cost nothing"""
+        if self.cache is not None:
+            cached = self.cache.get(self.model, self.prompt_version, prompt)
+            metrics.incr("cache_hits_total" if cached is not None else "cache_misses_total", cache="llm_result")
+            if cached is not None:
+                return cached, 0
+        try:
+            with metrics.timer("llm_seconds", agent="reranker"):
+                # No retries: a retry after a timeout would overrun the time budget. The read timeout
+                # alone would let a slow stream run on, so reading also stops at the deadline
+                response = self.client.generate_json(self.model, prompt, schema=RERANK_SCHEMA, options=self.options,
+                                                     timeout=max(deadline - time.monotonic(), 0.001), retries=0,
+                                                     deadline=deadline)
+        except OllamaDeadlineExceeded:
+            logger.warning("Rerank time budget ran out mid-answer; the rest keep their embedding order")
+            metrics.incr("rerank_skipped_total", reason="time_budget")
+            return None, estimate_tokens(prompt)
+        except OllamaError as e:
+            logger.error(f"Reranker Error: {str(e)}")
+            metrics.incr("llm_errors_total", agent="reranker")
+            # Count the prompt anyway so a failing server still exhausts the budget
+            return None, estimate_tokens(prompt)
+
+        record_llm_call("reranker", response)
+        tokens = (response.get("prompt_eval_count") or estimate_tokens(prompt)) + (response.get("eval_count") or 0)
+        judgement = self._parse_response(response)
+        if judgement is not None and self.cache is not None:
+            self.cache.put(self.model, self.prompt_version, prompt, judgement)
+        return judgement, tokens
+
+    def _parse_response(self, response: dict):
+        judgement = response.get("parsed")
+        if judgement is None:
+            result_text = response.get("response", "")
+            json_start = result_text.find('{')
+            json_end = result_text.rfind('}') + 1
+            if json_start >= 0 and json_end > json_start:
+                try:
+                    judgement = json.loads(re.sub(r',(\s*[\]}])', r'\1', result_text[json_start:json_end]))
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Rerank JSON Parse Error: {e}")
+        try:
+            float(judgement["fit_score"])
+            return judgement
+        except (KeyError, TypeError, ValueError) as e:
+            if judgement is not None:
+                logger.warning(f"Rerank JSON Parse Error: {e}")
+        metrics.incr("llm_parse_failures_total", agent="reranker")
+        return None
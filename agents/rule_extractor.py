@@ -0,0 +1,184 @@
+# agents/rule_extractor.py
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from database.skill_index import SKILL_ALIASES
+
+# Bump when the rules change so cached CV results built with older rules are not reused
+RULES_VERSION = "3"
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# International or local numbers with optional separators, e.g. +1 (555) 123-4567, 020 7946 0958
+PHONE_RE = re.compile(r"(?<![\w+])(\+?\d{1,3}[\s.-]?)?(\(?\d{2,4}\)?[\s.-]?)\d{3,4}[\s.-]?\d{3,4}(?!\w)")
+NAME_LABEL_RE = re.compile(r"^\s*(?:full\s+)?name\s*[:\-]\s*(.+)$", re.IGNORECASE)
+NAME_TOKEN_RE = re.compile(r"^[A-Z][a-zA-Z'\-]*\.?$|^[A-Z]{2,}$")
+
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "professional summary", "about me", "objective", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history"],
+    "education": ["education", "academic background", "qualifications", "academic qualifications"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "competencies", "technologies"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications",
+                       "courses", "training"],
+    "projects": ["projects", "personal projects", "selected projects"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies"],
+    "references": ["references"],
+}
+_HEADING_LOOKUP = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+DEFAULT_SKILLS = [
+    # Languages
+    "Python", "Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Rust", "Ruby", "PHP", "Kotlin",
+    "Swift", "Scala", "R", "MATLAB", "SQL", "Bash", "HTML", "CSS",
+    # Frameworks and libraries
+    "React", "Angular", "Vue", "Node.js", "Django", "Flask", "FastAPI", "Spring", ".NET", "Pandas", "NumPy",
+    "scikit-learn", "TensorFlow", "PyTorch", "Keras", "Spark", "Hadoop", "Kafka", "Airflow",
+    # Data and infrastructure
+    "PostgreSQL", "MySQL", "MongoDB", "Redis", "Elasticsearch", "Snowflake", "Docker", "Kubernetes",
+    "Terraform", "Ansible", "Jenkins", "AWS", "Azure", "GCP", "Linux", "Git", "CI/CD", "REST", "GraphQL",
+    "Microservices",
+    # Disciplines
+    "Machine Learning", "Deep Learning", "NLP", "Computer Vision", "Data Analysis", "Statistics",
+    "Tableau", "Power BI", "Excel", "Agile", "Scrum", "Jira", "Project Management", "Product Management",
+    "Cybersecurity", "Penetration Testing", "Selenium", "Unit Testing",
+]
+# Sections many CVs simply don't have; their absence is no sign that a heading went unrecognised
+_OPTIONAL_SECTIONS = {"certifications"}
+# Single letters and common words only count when listed in a skills section
+_AMBIGUOUS_SKILLS = {"c", "r", "go", "rest", "excel", "spring", "agile", "swift", "js", "ts", "ml", "node"}
+
+
+def _heading(line: str) -> Optional[str]:
+    """Section name if the line looks like a CV heading such as 'WORK EXPERIENCE' or 'Skills:'"""
+    stripped = line.strip().strip(":").strip()
+    if not stripped or len(stripped) > 40:
+        return None
+    return _HEADING_LOOKUP.get(re.sub(r"\s+", " ", stripped.lower()).replace("&", "and"))
+
+
+def iter_sections(cv_text: str, keep_headings: bool = False) -> List[Tuple[str, str]]:
+    """(section, text) blocks in document order; text before the first heading is 'header'.
+
+    With keep_headings the heading line stays at the top of its block.
+    """
+    blocks = [("header", [])]
+    for line in cv_text.splitlines():
+        section = _heading(line)
+        if section:
+            blocks.append((section, [line] if keep_headings else []))
+            continue
+        blocks[-1][1].append(line)
+    return [(name, "\n".join(lines).strip()) for name, lines in blocks]
+
+
+def split_sections(cv_text: str) -> Dict[str, str]:
+    """Split a CV into known sections; repeated headings are merged"""
+    sections = {}
+    for name, text in iter_sections(cv_text):
+        sections[name] = f"{sections[name]}\n{text}".strip() if name in sections else text
+    return sections
+
+
+class RuleExtractor:
+    """Deterministic extraction of the CV fields a regex or dictionary can find.
+
+    Used by CVParser ahead of the LLM: fields found here are not asked for
+    again, and the LLM only sees the sections relevant to what is left.
+    """
+
+    def __init__(self, skills: Iterable[str] = None, aliases: Dict[str, str] = None):
+        self.skills = list(skills or DEFAULT_SKILLS)
+        self.aliases = dict(SKILL_ALIASES if aliases is None else aliases)
+        self._canonical = {skill.lower(): skill for skill in self.skills}
+        self._canonical.update({alias.lower(): skill for alias, skill in self.aliases.items()})
+        # Longest names first so "Machine Learning" wins over "Machine" and "C++" over "C"
+        terms = sorted(self._canonical, key=len, reverse=True)
+        pattern = "|".join(re.escape(term) for term in terms)
+        self._skill_re = re.compile(rf"(?<![\w+#.])({pattern})(?![\w+#]|\.\w)", re.IGNORECASE)
+
+    def extract(self, cv_text: str) -> dict:
+        """Return only the fields that were found: name, email, phone and skills"""
+        sections = split_sections(cv_text)
+        found = {}
+        email = self.find_email(cv_text)
+        if email:
+            found["email"] = email
+        phone = self.find_phone(sections.get("header") or cv_text)
+        if phone:
+            found["phone"] = phone
+        name = self.find_name(sections.get("header") or cv_text)
+        if name:
+            found["name"] = name
+        skills = self.find_skills(cv_text, sections.get("skills"))
+        if skills:
+            found["skills"] = skills
+        return found
+
+    def find_email(self, text: str) -> Optional[str]:
+        match = EMAIL_RE.search(text)
+        return match.group(0).rstrip(".") if match else None
+
+    def find_phone(self, text: str) -> Optional[str]:
+        for match in PHONE_RE.finditer(text):
+            digits = re.sub(r"\D", "", match.group(0))
+            # Skip years ranges and dates such as 2019-2021
+            if 9 <= len(digits) <= 15 and not re.fullmatch(r"(19|20)\d{2}[\s.-]?(19|20)\d{2}", match.group(0).strip()):
+                return match.group(0).strip()
+        return None
+
+    def find_name(self, header: str) -> Optional[str]:
+        """'Name: ...' if labelled, else the first short line of capitalised words near the top"""
+        lines = [line.strip() for line in header.splitlines() if line.strip()][:8]
+        for line in lines:
+            match = NAME_LABEL_RE.match(line)
+            if match:
+                return match.group(1).strip()
+        for line in lines[:5]:
+            if "@" in line or any(ch.isdigit() for ch in line) or _heading(line):
+                continue
+            tokens = line.replace(",", " ").split()
+            if 2 <= len(tokens) <= 4 and all(NAME_TOKEN_RE.match(token) for token in tokens):
+                return " ".join(token if not token.isupper() else token.title() for token in tokens)
+        return None
+
+    def find_skills(self, cv_text: str, skills_section: Optional[str] = None) -> List[str]:
+        """Dictionary skills mentioned in the CV, in order of first appearance"""
+        found = {}
+        for text, strict in ((skills_section, False), (cv_text, True)):
+            if not text:
+                continue
+            for match in self._skill_re.finditer(text):
+                term = match.group(1).lower()
+                if strict and term in _AMBIGUOUS_SKILLS:
+                    continue
+                found.setdefault(self._canonical[term], None)
+        return list(found)
+
+    def trimmed_context(self, cv_text: str, fields: Iterable[str]) -> str:
+        """Only the sections needed for `fields`.
+
+        The whole CV is returned if it has no recognisable headings, or if a
+        section every CV has (experience, education, skills) is asked for but
+        not found: its heading was probably something like "OVERALL
+        EXPERIENCE - 2 Years", and its text is sitting in another section.
+        """
+        sections = split_sections(cv_text)
+        if len(sections) == 1:
+            return cv_text
+        if any(field in SECTION_HEADINGS and field not in _OPTIONAL_SECTIONS and not sections.get(field)
+               for field in fields):
+            return cv_text
+        wanted = {"header"} if {"name", "email"} & set(fields) else set()
+        for field in fields:
+            wanted.add(field)
+        if "experience" in wanted:
+            wanted.add("summary")
+        if "certifications" in wanted:
+            wanted.add("education")
+        parts = [sections[name] if name == "header" else f"{name.upper()}\n{sections[name]}"
+                 for name in sections if name in wanted and sections[name]]
+        if not parts:
+            return cv_text
+        return "\n\n".join(parts)
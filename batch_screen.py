@@ -0,0 +1,182 @@
+"""Headless bulk screening of a directory of CVs against a jobs CSV.
+
+Usage:
+    python batch_screen.py --jobs job_description.csv --cvs ./cvs --output results.jsonl
+
+Each CV is extracted, parsed and embedded once, then scored against every
+selected job. Rows are written to SQLite and one JSON line per CV is appended
+to the output file as soon as its window of files completes. Only one window
+of CVs is held in memory at a time, whatever the size of the corpus.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+import numpy as np
+
+from agents.cv_parser import CV_MAX_INPUT_TOKENS, CVParser
+from agents.jd_summarizer import JDSummarizer
+from agents.matching_engine import MatchingEngine
+from database.cache import EmbeddingCache, LLMResultCache
+from database.db_handler import DBHandler
+from services.job_catalog import JOB_EMBEDDING_CHUNKED, JobCatalog
+from services.pdf_extractor import PDFExtractor, file_hash, iter_pdf_paths
+from services.pipeline import CVPipeline
+
+logger = logging.getLogger("batch_screen")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a directory of PDF CVs against a jobs CSV")
+    parser.add_argument("--jobs", required=True, help="CSV with 'Job Title' and 'Job Description' columns")
+    parser.add_argument("--cvs", required=True, help="Directory containing PDF CVs (searched recursively)")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--job", action="append", dest="job_titles",
+                        help="Only screen against this job title (repeatable; default: all jobs)")
+    parser.add_argument("--db", default="recruitment.db")
+    parser.add_argument("--workers", type=int, default=4, help="CVs parsed and embedded concurrently")
+    parser.add_argument("--extract-workers", type=int, default=None, help="PDF extraction processes")
+    parser.add_argument("--window", type=int, default=64, help="CVs held in memory at once")
+    parser.add_argument("--shortlist-threshold", type=float, default=65.0)
+    parser.add_argument("--llm-fields", default=None,
+                        help="Comma-separated CV fields to extract (default: all). Fields the rule-based "
+                             "fast path fills are never sent to the LLM, e.g. 'name,email,skills'")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Embed long CVs per section and pool the chunk vectors")
+    parser.add_argument("--pooling", choices=["mean", "max", "weighted"], default="mean")
+    parser.add_argument("--no-fast-path", action="store_true", help="Send every CV to the LLM in full")
+    parser.add_argument("--max-input-tokens", type=int, default=CV_MAX_INPUT_TOKENS,
+                        help="Cut each CV to about this many tokens, by section, before parsing and "
+                             "embedding (0: no limit)")
+    return parser.parse_args(argv)
+
+
+def load_jobs(catalog, path, job_titles=None):
+    """Catalog entries for the selected titles (first row per title), summarized and embedded once"""
+    entries = {}
+    for entry in catalog.load(path, background=False):
+        entries.setdefault(entry["title"], entry)
+    if job_titles:
+        missing = set(job_titles) - set(entries)
+        if missing:
+            raise ValueError(f"Job titles not found in CSV: {', '.join(sorted(missing))}")
+        entries = {title: entry for title, entry in entries.items() if title in job_titles}
+    entries = list(entries.values())
+    catalog.prepare(entries)
+    return entries
+
+
+def iter_windows(paths, size):
+    window = []
+    for path in paths:
+        window.append(path)
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def screen(args):
+    db = DBHandler(args.db)
+    max_input_tokens = args.max_input_tokens or None
+    matching_engine = MatchingEngine(model_name="nomic-embed-text", cache=EmbeddingCache(), chunked=args.chunked,
+                                     pooling=args.pooling, max_input_tokens=max_input_tokens)
+    llm_cache = LLMResultCache()
+    jd_summarizer = JDSummarizer(cache=llm_cache)
+    llm_fields = [f.strip() for f in args.llm_fields.split(",")] if args.llm_fields else None
+    cv_parser = CVParser(cache=llm_cache, fast_path=not args.no_fast_path, llm_fields=llm_fields,
+                         max_input_tokens=max_input_tokens)
+
+    # Jobs screened before (same CSV contents) come straight from the jobs table
+    catalog = JobCatalog(db, jd_summarizer, matching_engine)
+    entries = load_jobs(catalog, args.jobs, args.job_titles)
+    if not entries:
+        raise ValueError("No jobs to screen against")
+    jobs = []
+    for entry in entries:
+        job = catalog.job(entry["source_key"])
+        if job is None:
+            # Summary failed: screen with placeholder data, as a one-off job row
+            summary = jd_summarizer.summarize(entry["description"])
+            embedding = matching_engine.get_embedding(entry["description"], chunked=JOB_EMBEDDING_CHUNKED)
+            job = {"job_id": db.create_job(entry["title"], entry["description"], summary, embedding),
+                   "title": entry["title"], "embedding": embedding}
+        jobs.append(job)
+    job_titles = [job["title"] for job in jobs]
+    job_ids = [job["job_id"] for job in jobs]
+    jd_matrix = np.stack([np.asarray(job["embedding"], dtype=np.float32) for job in jobs])
+    extractor = PDFExtractor(max_workers=args.extract_workers)
+
+    pipeline = CVPipeline(cv_parser, matching_engine, extractor.extract, max_workers=args.workers,
+                          serialize_extraction=False, find_document=db.find_document)
+    seen_hashes = set()
+    processed = skipped = 0
+    started = time.monotonic()
+
+    try:
+        with open(args.output, "a", encoding="utf-8") as out:
+            for window in iter_windows(iter_pdf_paths(args.cvs), args.window):
+                files = []
+                for path in window:
+                    digest = file_hash(path)
+                    if digest in seen_hashes:
+                        skipped += 1
+                        continue
+                    seen_hashes.add(digest)
+                    files.append((path, path))
+
+                results = [r for r in pipeline.run(files, None) if not r["error"] and r["cv_text"]]
+                skipped += len(files) - len(results)
+                if not results:
+                    continue
+
+                scores = matching_engine.score_matrix(jd_matrix, np.stack([r["embedding"] for r in results]))
+                rows = [
+                    {"job_id": job_ids[j], "cv_text": r["cv_text"], "cv_data": r["cv_data"],
+                     "embedding": r["embedding"], "score": float(scores[j, i]), "document_id": r.get("document_id"),
+                     "chunks": r["chunks"]}
+                    for i, r in enumerate(results) for j in range(len(job_ids))
+                ]
+                candidate_ids = db.create_candidates(rows)
+
+                for i, r in enumerate(results):
+                    cv_scores = {job_titles[j]: round(float(scores[j, i]), 2) for j in range(len(job_ids))}
+                    best_job = max(cv_scores, key=cv_scores.get)
+                    record = {
+                        "filename": r["filename"],
+                        "name": r["cv_data"].get("name"),
+                        "email": r["cv_data"].get("email"),
+                        "scores": cv_scores,
+                        "best_job": best_job,
+                        "shortlisted": [t for t, s in cv_scores.items() if s >= args.shortlist_threshold],
+                        "candidate_ids": candidate_ids[i * len(job_ids):(i + 1) * len(job_ids)],
+                        "cv_data": r["cv_data"],
+                    }
+                    out.write(json.dumps(record) + "\n")
+                out.flush()
+                processed += len(results)
+                elapsed = time.monotonic() - started
+                logger.info(f"Processed {processed} CVs ({processed / elapsed:.2f} CVs/s), skipped {skipped}")
+    finally:
+        extractor.shutdown()
+
+    return processed, skipped
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args = parse_args(argv)
+    try:
+        processed, skipped = screen(args)
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(str(e))
+        return 1
+    logger.info(f"Done: {processed} CVs screened, {skipped} skipped; results in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Compare whole-text and chunked CV embeddings for ranking quality and latency.
+
+Builds long synthetic CVs whose job-specific skills sit at the end, after a
+long experience section, so anything that only sees the start of the text
+misses them. Each CV targets one job; quality is how often that job ranks
+first (top-1) and its mean reciprocal rank. The fake server uses
+bag-of-words embeddings and truncates input at --context-tokens like a real
+model would; pass --ollama-url to measure a real embedding model instead.
+
+Usage: python -m benchmarks.chunked_embeddings --cvs 60 --filler-tokens 3000
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from benchmarks.corpus import SENTENCES, TITLES
+from benchmarks.fake_ollama import SKILLS, FakeOllamaConfig, FakeOllamaServer
+
+MODES = [
+    ("whole_text", {"chunked": False}),
+    ("chunked_mean", {"chunked": True, "pooling": "mean"}),
+    ("chunked_max", {"chunked": True, "pooling": "max"}),
+    ("chunked_weighted", {"chunked": True, "pooling": "weighted"}),
+]
+
+
+def build_corpus(num_jobs: int, num_cvs: int, filler_tokens: int, seed: int):
+    rng = random.Random(seed)
+    skills = SKILLS[:]
+    rng.shuffle(skills)
+    per_job = max(1, len(skills) // num_jobs)
+    jobs = []
+    for j in range(num_jobs):
+        job_skills = skills[j * per_job:(j + 1) * per_job] or rng.sample(SKILLS, 3)
+        description = (f"We are hiring a {TITLES[j % len(TITLES)]}. Must have: {', '.join(job_skills)}. "
+                       f"Hands-on experience with {' and '.join(job_skills)} is essential.")
+        jobs.append({"skills": job_skills, "description": description})
+
+    cvs = []
+    for i in range(num_cvs):
+        target = i % num_jobs
+        lines = [f"Candidate {i}", f"candidate{i}@example.com", "", "EXPERIENCE"]
+        while sum(len(line) for line in lines) < filler_tokens * 4:
+            lines.append(f"{rng.choice(TITLES)} at Company {rng.randint(1, 500)}")
+            lines.append(" ".join(rng.choice(SENTENCES) for _ in range(5)))
+            lines.append("")
+        lines += ["SKILLS", ", ".join(jobs[target]["skills"])]
+        cvs.append({"text": "\n".join(lines), "target": target})
+    return jobs, cvs
+
+
+def run_mode(name: str, options: dict, jobs, cvs, base_url: str, chunk_tokens: int) -> dict:
+    from agents.matching_engine import MatchingEngine
+
+    # No cache, so every mode pays for its own embedding calls
+    engine = MatchingEngine(base_url=base_url, chunk_tokens=chunk_tokens, **options)
+    jd_matrix = np.stack([engine.get_embedding(job["description"]) for job in jobs])
+
+    started = time.perf_counter()
+    embedded = [engine.get_document_embedding(cv["text"]) for cv in cvs]
+    wall = time.perf_counter() - started
+
+    scores = engine.score_matrix(jd_matrix, np.stack([vector for vector, _ in embedded]))
+    ranks = []
+    for i, cv in enumerate(cvs):
+        order = np.argsort(-scores[:, i], kind="stable")
+        ranks.append(int(np.where(order == cv["target"])[0][0]) + 1)
+
+    report = {
+        "mode": name,
+        "cvs": len(cvs),
+        "top1_accuracy": sum(rank == 1 for rank in ranks) / len(ranks),
+        "mrr": sum(1 / rank for rank in ranks) / len(ranks),
+        "embed_seconds": wall,
+        "cvs_per_second": len(cvs) / wall if wall else None,
+        "chunks_per_cv": sum(len(chunks) for _, chunks in embedded) / len(cvs),
+    }
+    if options.get("chunked"):
+        hits = [engine.best_chunk(jd_matrix[cv["target"]], chunks) for cv, (_, chunks) in zip(cvs, embedded)]
+        report["best_chunk_is_skills"] = sum(bool(h) and h["section"] == "skills" for h in hits) / len(cvs)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=6)
+    parser.add_argument("--cvs", type=int, default=60)
+    parser.add_argument("--filler-tokens", type=int, default=3000, help="Approximate length of each CV")
+    parser.add_argument("--chunk-tokens", type=int, default=512)
+    parser.add_argument("--context-tokens", type=int, default=2048, help="Fake server: embedding context window")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="Fake server: seconds per embed call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ollama-url", help="Benchmark a real Ollama server instead of the fake one")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.ollama_url
+    if not base_url:
+        config = FakeOllamaConfig(embedding_dim=256, embed_latency=args.embed_latency, lexical_embeddings=True,
+                                  context_tokens=args.context_tokens)
+        server = FakeOllamaServer(config=config).start()
+        base_url = server.url
+
+    jobs, cvs = build_corpus(args.jobs, args.cvs, args.filler_tokens, args.seed)
+    try:
+        reports = [run_mode(name, options, jobs, cvs, base_url, args.chunk_tokens) for name, options in MODES]
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(f"{'mode':<18} {'top-1':>6} {'MRR':>6} {'CVs/s':>7} {'chunks':>7}")
+    for report in reports:
+        print(f"{report['mode']:<18} {report['top1_accuracy']:>6.2f} {report['mrr']:>6.2f} "
+              f"{report['cvs_per_second']:>7.1f} {report['chunks_per_cv']:>7.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"ollama_url": args.ollama_url or "fake", "config": vars(args), "runs": reports}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
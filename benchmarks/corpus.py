@@ -0,0 +1,90 @@
+"""Generate a synthetic corpus of CV PDFs and a jobs CSV for benchmarks.
+
+Usage: python -m benchmarks.corpus --output ./bench_corpus --cvs 200 --jobs 10
+"""
+import argparse
+import csv
+import os
+import random
+
+from benchmarks.fake_ollama import SKILLS
+
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Dana", "Elif", "Farid", "Grace", "Hiro", "Ines", "Jon", "Kemi", "Luis"]
+LAST_NAMES = ["Patel", "Smith", "Wang", "Garcia", "Yilmaz", "Haddad", "Okafor", "Sato", "Silva", "Berg"]
+TITLES = ["Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer", "ML Engineer",
+          "Backend Developer", "Frontend Developer", "Data Engineer", "QA Engineer", "Security Analyst"]
+SENTENCES = [
+    "Designed and shipped services used by millions of customers.",
+    "Led a team of engineers through a migration to the cloud.",
+    "Built data pipelines and dashboards for business stakeholders.",
+    "Improved latency of critical APIs by profiling and caching.",
+    "Mentored junior developers and ran code reviews.",
+    "Collaborated with product and design on roadmap planning.",
+]
+
+
+def cv_text(rng: random.Random, paragraphs: int) -> str:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    email = f"{name.lower().replace(' ', '.')}{rng.randint(1, 999)}@example.com"
+    lines = [name, email, f"+1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}", "",
+             "SKILLS", ", ".join(rng.sample(SKILLS, k=6)), "", "EXPERIENCE"]
+    for _ in range(paragraphs):
+        lines.append(f"{rng.choice(TITLES)} at Company {rng.randint(1, 500)}")
+        lines.append(" ".join(rng.choice(SENTENCES) for _ in range(4)))
+    lines += ["", "EDUCATION", "BSc Computer Science"]
+    return "\n".join(lines)
+
+
+def write_pdf(path: str, text: str, lines_per_page: int = 45):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    lines = text.splitlines()
+    for start in range(0, len(lines), lines_per_page):
+        page = doc.new_page()
+        page.insert_text((50, 60), "\n".join(lines[start:start + lines_per_page]), fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def generate_corpus(output_dir: str, num_cvs: int = 100, num_jobs: int = 5, paragraphs: int = 6,
+                    seed: int = 0) -> dict:
+    """Write `num_cvs` PDFs under output_dir/cvs and a jobs.csv; returns their paths"""
+    rng = random.Random(seed)
+    cv_dir = os.path.join(output_dir, "cvs")
+    os.makedirs(cv_dir, exist_ok=True)
+
+    cv_paths = []
+    for i in range(num_cvs):
+        path = os.path.join(cv_dir, f"cv_{i:05d}.pdf")
+        write_pdf(path, cv_text(rng, paragraphs))
+        cv_paths.append(path)
+
+    jobs_path = os.path.join(output_dir, "jobs.csv")
+    with open(jobs_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Job Title", "Job Description"])
+        for i in range(num_jobs):
+            title = f"{TITLES[i % len(TITLES)]} {i // len(TITLES) + 1}" if i >= len(TITLES) else TITLES[i]
+            skills = ", ".join(rng.sample(SKILLS, k=5))
+            description = (f"We are hiring a {title}. Required skills: {skills}. "
+                           + " ".join(rng.choice(SENTENCES) for _ in range(8)))
+            writer.writerow([title, description])
+
+    return {"cv_dir": cv_dir, "cv_paths": cv_paths, "jobs_csv": jobs_path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_corpus")
+    parser.add_argument("--cvs", type=int, default=100)
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--paragraphs", type=int, default=6, help="Experience entries per CV")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    corpus = generate_corpus(args.output, args.cvs, args.jobs, args.paragraphs, args.seed)
+    print(f"Wrote {len(corpus['cv_paths'])} CVs to {corpus['cv_dir']} and jobs to {corpus['jobs_csv']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Local stand-in for the Ollama HTTP API used by the agents.
+
+Serves /api/embeddings, /api/embed and /api/generate with configurable
+latency and output size so the pipeline can be benchmarked without a GPU.
+/api/generate mimics how a chat model answers: free-form requests get JSON
+wrapped in chatter (and occasionally malformed JSON), while requests with a
+`format` get clean JSON padded with whitespace. `options.num_predict` caps
+the output, and streamed responses stop generating when the client hangs up.
+
+Usage: python -m benchmarks.fake_ollama --port 11435 --generate-latency 0.5
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SKILLS = ["Python", "Java", "C++", "SQL", "Docker", "Kubernetes", "AWS", "React", "Machine Learning",
+          "NLP", "Statistics", "Git", "Linux", "TensorFlow", "PyTorch", "Go", "Rust", "Spark"]
+
+
+class FakeOllamaConfig:
+    def __init__(self, embedding_dim: int = 768, embed_latency: float = 0.01, embed_latency_per_item: float = 0.002,
+                 generate_latency: float = 0.2, token_latency: float = 0.0, output_tokens: int = 120,
+                 failure_rate: float = 0.0, seed: int = 0, lexical_embeddings: bool = False,
+                 context_tokens: int = None, chatter_tokens: int = 0, malformed_rate: float = 0.0,
+                 padding_tokens: int = 0):
+        self.embedding_dim = embedding_dim
+        self.embed_latency = embed_latency
+        self.embed_latency_per_item = embed_latency_per_item
+        self.generate_latency = generate_latency
+        self.token_latency = token_latency
+        self.output_tokens = output_tokens
+        self.failure_rate = failure_rate
+        self.seed = seed
+        # Bag-of-words embeddings make similarity track word overlap, so ranking quality can be measured
+        self.lexical_embeddings = lexical_embeddings
+        # Like the real server, silently embed only the first context_tokens tokens (None: no limit)
+        self.context_tokens = context_tokens
+        # Free-form answers: explanation after the JSON, and the share of answers with unparseable JSON
+        self.chatter_tokens = chatter_tokens
+        self.malformed_rate = malformed_rate
+        # JSON-mode answers: whitespace tokens after the object, until num_predict stops them
+        self.padding_tokens = padding_tokens
+
+
+def fake_embedding(text: str, dim: int):
+    """Deterministic pseudo-random vector so identical texts get identical embeddings"""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    return [rng.gauss(0, 1) for _ in range(dim)]
+
+
+@lru_cache(maxsize=50000)
+def _word_vector(word: str, dim: int):
+    rng = random.Random(hashlib.sha256(word.encode("utf-8")).digest())
+    return [rng.gauss(0, 1) for _ in range(dim)]
+
+
+def lexical_embedding(text: str, dim: int):
+    """Sum of per-word random vectors: texts sharing words get similar embeddings"""
+    vector = [0.0] * dim
+    for word in re.findall(r"[a-z0-9+#]+", text.lower()):
+        for i, value in enumerate(_word_vector(word, dim)):
+            vector[i] += value
+    return vector
+
+
+def fake_generation(prompt: str, output_tokens: int, constrained: bool = False, chatter_tokens: int = 0,
+                    malformed_rate: float = 0.0, padding_tokens: int = 0) -> str:
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    skills = rng.sample(SKILLS, k=min(len(SKILLS), max(1, output_tokens // 20)))
+    # Pad with extra list entries until the response is roughly output_tokens long (~4 chars/token)
+    filler = [f"Responsibility {i}" for i in range(max(0, output_tokens // 5 - len(skills)))]
+    if "fit_score" in prompt:
+        body = {"fit_score": rng.randint(0, 100), "reason": "Matches several of the required skills."}
+    elif "JOB DESCRIPTION" in prompt:
+        body = {
+            "required_skills": skills,
+            "required_experience": f"{rng.randint(1, 10)}+ years",
+            "required_education": "Bachelor's degree",
+            "certifications": [],
+            "key_responsibilities": filler,
+        }
+    else:
+        body = {
+            "name": f"Candidate {rng.randint(1, 10 ** 6)}",
+            "email": f"candidate{rng.randint(1, 10 ** 6)}@example.com",
+            "education": ["BSc Computer Science"],
+            "experience": filler,
+            "skills": skills,
+            "certifications": [],
+        }
+    if constrained:
+        return json.dumps(body) + "\n" * padding_tokens
+    # Single quotes, as in a Python dict repr: a typical way for free-form "JSON" to be invalid
+    data = str(body) if rng.random() < malformed_rate else json.dumps(body, indent=2)
+    chatter = "\n\nNote: fields were inferred from the text and may be incomplete. " * (chatter_tokens // 15 + 1)
+    return "Here is the extracted data:\n" + data + (chatter[:chatter_tokens * 4] if chatter_tokens else "")
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOllama/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> FakeOllamaConfig:
+        return self.server.config
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _should_fail(self) -> bool:
+        with self.server.rng_lock:
+            return self.server.rng.random() < self.config.failure_rate
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json(200, {"version": "0.0.0-fake"})
+        elif self.path == "/api/tags":
+            self._send_json(200, {"models": []})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        self.server.count(self.path)
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if self._should_fail():
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        if self.path == "/api/embeddings":
+            time.sleep(self.config.embed_latency + self.config.embed_latency_per_item)
+            self._send_json(200, {"embedding": self._embedding(payload.get("prompt", ""))})
+        elif self.path == "/api/embed":
+            inputs = payload.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            time.sleep(self.config.embed_latency + self.config.embed_latency_per_item * len(inputs))
+            self._send_json(200, {
+                "model": payload.get("model"),
+                "embeddings": [self._embedding(text) for text in inputs],
+            })
+        elif self.path == "/api/generate":
+            self._generate(payload)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _embedding(self, text: str):
+        if self.config.context_tokens:
+            # ~4 characters per token
+            text = text[:self.config.context_tokens * 4]
+        if self.config.lexical_embeddings:
+            return lexical_embedding(text, self.config.embedding_dim)
+        return fake_embedding(text, self.config.embedding_dim)
+
+    def _generate(self, payload: dict):
+        prompt = payload.get("prompt", "")
+        config = self.config
+        text = fake_generation(prompt, config.output_tokens, constrained=payload.get("format") is not None,
+                               chatter_tokens=config.chatter_tokens, malformed_rate=config.malformed_rate,
+                               padding_tokens=config.padding_tokens)
+        # ~4 characters per token, except padding newlines, which are one token each
+        tokens = re.findall(r"[^\n]{1,4}|\n", text)
+        num_predict = (payload.get("options") or {}).get("num_predict") or -1
+        done_reason = "stop"
+        if 0 < num_predict < len(tokens):
+            tokens, done_reason = tokens[:num_predict], "length"
+        created_at = datetime.now(timezone.utc).isoformat()
+        final = {
+            "model": payload.get("model"),
+            "created_at": created_at,
+            "response": "",
+            "done": True,
+            "done_reason": done_reason,
+            "prompt_eval_count": max(1, len(prompt) // 4),
+            "eval_count": len(tokens),
+        }
+
+        if payload.get("stream", True) is False:
+            time.sleep(config.generate_latency + config.token_latency * len(tokens))
+            self.server.count_tokens(len(tokens))
+            self._send_json(200, {**final, "response": "".join(tokens)})
+            return
+
+        # Stream one token per newline-delimited JSON chunk like the real server
+        time.sleep(config.generate_latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        self.close_connection = True
+        generated = 0
+        try:
+            for token in tokens:
+                time.sleep(config.token_latency)
+                generated += 1
+                chunk = {"model": payload.get("model"), "created_at": created_at, "response": token, "done": False}
+                self.wfile.write((json.dumps(chunk) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write((json.dumps(final) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client hung up; like Ollama, stop generating
+        finally:
+            self.server.count_tokens(generated)
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Streamed generations close their connection, so bursts of new connections are common
+    request_queue_size = 128
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: FakeOllamaConfig = None):
+        super().__init__((host, port), FakeOllamaHandler)
+        self.config = config or FakeOllamaConfig()
+        self.rng = random.Random(self.config.seed)
+        self.rng_lock = threading.Lock()
+        self.request_counts = {}
+        self.generated_tokens = 0
+        self._counts_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path: str):
+        with self._counts_lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def count_tokens(self, tokens: int):
+        with self._counts_lock:
+            self.generated_tokens += tokens
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    parser.add_argument("--embed-latency", type=float, default=0.01)
+    parser.add_argument("--generate-latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--output-tokens", type=int, default=120)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--chatter-tokens", type=int, default=0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--padding-tokens", type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(embedding_dim=args.embedding_dim, embed_latency=args.embed_latency,
+                              generate_latency=args.generate_latency, token_latency=args.token_latency,
+                              output_tokens=args.output_tokens, failure_rate=args.failure_rate,
+                              chatter_tokens=args.chatter_tokens, malformed_rate=args.malformed_rate,
+                              padding_tokens=args.padding_tokens)
+    server = FakeOllamaServer(args.host, args.port, config)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Measure LLM calls and tokens saved by CVParser's rule-based fast path.
+
+Parses the same CVs with the LLM only, with the fast path (LLM for the
+remaining fields on trimmed context) and with the fast path limited to
+contact fields and skills. Reports LLM calls, prompt/completion tokens as
+reported by Ollama, wall time and, on the synthetic corpus, how often the
+name and email came out right.
+
+Usage: python -m benchmarks.fast_path --cvs 200
+       python -m benchmarks.fast_path --cv-dir ./cvs --ollama-url http://localhost:11434
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.corpus import cv_text
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+
+MODES = {
+    "llm_only": {"fast_path": False},
+    "fast_path": {"fast_path": True},
+    "fast_path_contact_and_skills": {"fast_path": True, "llm_fields": ["name", "email", "skills"]},
+}
+
+
+def counter_total(snapshot: dict, name: str) -> float:
+    return sum(c["value"] for c in snapshot["counters"] if c["name"] == name)
+
+
+def load_texts(args):
+    """(text, expected name, expected email) for each CV"""
+    if args.cv_dir:
+        from services.pdf_extractor import PDFExtractor, iter_pdf_paths
+
+        extractor = PDFExtractor()
+        try:
+            paths = list(iter_pdf_paths(args.cv_dir))
+            texts = [r["text"] for r in extractor.extract_many((p, p) for p in paths)]
+        finally:
+            extractor.shutdown()
+        return [(text, None, None) for text in texts if text]
+    rng = random.Random(args.seed)
+    texts = []
+    for _ in range(args.cvs):
+        text = cv_text(rng, args.paragraphs)
+        name, email = text.splitlines()[:2]
+        texts.append((text, name, email))
+    return texts
+
+
+def run_mode(mode: str, options: dict, texts, base_url: str) -> dict:
+    from agents.cv_parser import CVParser
+    from services.metrics import metrics
+
+    metrics.reset()
+    parser = CVParser(base_url=base_url, **options)
+    started = time.perf_counter()
+    results = [parser.parse(text) for text, _, _ in texts]
+    wall = time.perf_counter() - started
+    snapshot = metrics.snapshot()
+
+    report = {
+        "mode": mode,
+        "cvs": len(texts),
+        "llm_calls": counter_total(snapshot, "llm_calls_total"),
+        "prompt_tokens": counter_total(snapshot, "llm_prompt_tokens_total"),
+        "completion_tokens": counter_total(snapshot, "llm_completion_tokens_total"),
+        "estimated_prompt_tokens_saved": counter_total(snapshot, "llm_prompt_tokens_saved_total"),
+        "wall_seconds": wall,
+    }
+    labelled = [(result, name, email) for result, (_, name, email) in zip(results, texts) if name]
+    if labelled:
+        report["name_accuracy"] = sum(r.get("name") == name for r, name, _ in labelled) / len(labelled)
+        report["email_accuracy"] = sum(r.get("email") == email for r, _, email in labelled) / len(labelled)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cvs", type=int, default=100, help="Synthetic CVs to generate")
+    parser.add_argument("--cv-dir", help="Use the PDFs in this directory instead of synthetic CVs")
+    parser.add_argument("--paragraphs", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ollama-url", help="Benchmark a real Ollama server instead of the fake one")
+    parser.add_argument("--generate-latency", type=float, default=0.0, help="Fake server: seconds per generation")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.ollama_url
+    if not base_url:
+        server = FakeOllamaServer(config=FakeOllamaConfig(generate_latency=args.generate_latency)).start()
+        base_url = server.url
+
+    try:
+        texts = load_texts(args)
+        reports = [run_mode(mode, options, texts, base_url) for mode, options in MODES.items()]
+    finally:
+        if server is not None:
+            server.stop()
+
+    baseline = reports[0]
+    print(f"{'mode':<30} {'llm calls':>9} {'prompt tok':>10} {'saved':>7} {'wall s':>7}")
+    for report in reports:
+        if baseline["prompt_tokens"]:
+            report["prompt_tokens_saved_pct"] = 100 * (1 - report["prompt_tokens"] / baseline["prompt_tokens"])
+        report["llm_calls_saved"] = baseline["llm_calls"] - report["llm_calls"]
+        print(f"{report['mode']:<30} {report['llm_calls']:>9.0f} {report['prompt_tokens']:>10.0f} "
+              f"{report.get('prompt_tokens_saved_pct', 0):>6.1f}% {report['wall_seconds']:>7.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"ollama_url": args.ollama_url or "fake", "runs": reports}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
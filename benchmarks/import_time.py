@@ -0,0 +1,91 @@
+"""Measure cold import time of the app's modules.
+
+Each module is imported in a fresh interpreter, so the numbers include
+everything it pulls in transitively. `--max-seconds` turns the report into
+a check that exits non-zero when any module is slower than the budget.
+
+Usage: python -m benchmarks.import_time [--repeat 5] [--max-seconds 1.0] [--output import_times.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "agents.matching_engine",
+    "agents.cv_parser",
+    "agents.jd_summarizer",
+    "agents.email_scheduler",
+    "database.db_handler",
+    "services.pipeline",
+    "services.pdf_extractor",
+    "services.csv_loader",
+    "services.job_catalog",
+    "main",
+    "streamlit",
+    "pandas",
+]
+
+# The heavy dependencies that should no longer be imported up front
+HEAVY = ["torch", "fitz", "pandas"]
+
+_PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def measure(module: str, repeat: int) -> dict:
+    samples, heavy = [], []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+                                capture_output=True, text=True)
+        if output.returncode != 0:
+            return {"module": module, "error": output.stderr.strip().splitlines()[-1]}
+        elapsed, _, loaded = output.stdout.strip().partition(" ")
+        samples.append(float(elapsed))
+        heavy = [name for name in loaded.split(",") if name]
+    return {
+        "module": module,
+        "median_seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "max_seconds": max(samples),
+        "heavy_imports": heavy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, help="Fail if any module's median import exceeds this")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    results = [measure(module, args.repeat) for module in args.modules]
+    for r in results:
+        if "error" in r:
+            print(f"{r['module']:<28} ERROR {r['error']}")
+        else:
+            heavy = f"  (loads {', '.join(r['heavy_imports'])})" if r["heavy_imports"] else ""
+            print(f"{r['module']:<28} {r['median_seconds'] * 1000:8.1f} ms{heavy}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_seconds is not None:
+        slow = [r["module"] for r in results if r.get("median_seconds", 0) > args.max_seconds]
+        if slow:
+            print(f"Over budget ({args.max_seconds}s): {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
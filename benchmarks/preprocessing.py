@@ -0,0 +1,75 @@
+"""Measure how much text preprocessing trims from CVs at different token budgets.
+
+Builds synthetic multi-page CVs with running headers, footers, page numbers
+and ragged whitespace, then reports estimated tokens before and after
+cleanup, how many CVs each budget truncates, and the preprocessing time.
+
+Usage: python -m benchmarks.preprocessing --cvs 500 --budgets 0,2048,1024,512
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.corpus import cv_text
+
+
+def pdf_pages(rng: random.Random, text: str, lines_per_page: int = 45) -> list:
+    """Split a CV into pages the way a PDF extractor returns them, with the usual running header and footer"""
+    lines = [line.replace(" ", "  ") if rng.random() < 0.3 else line for line in text.splitlines()]
+    name = lines[0]
+    chunks = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)]
+    return [f"{name} - Curriculum Vitae\n\n" + "\n".join(chunk) + f"\n\n\nPage {i + 1} of {len(chunks)}\n"
+            for i, chunk in enumerate(chunks)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cvs", type=int, default=300)
+    parser.add_argument("--paragraphs", type=int, default=40, help="Experience entries per CV")
+    parser.add_argument("--budgets", default="0,2048,1024,512", help="Token budgets to try (0: no limit)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    from services.text_preprocessing import TextPreprocessor, clean_pages, estimate_tokens
+
+    rng = random.Random(args.seed)
+    documents = [pdf_pages(rng, cv_text(rng, rng.randint(2, args.paragraphs))) for _ in range(args.cvs)]
+    raw = [" ".join(pages) for pages in documents]
+
+    started = time.perf_counter()
+    cleaned = [clean_pages(pages) for pages in documents]
+    clean_seconds = time.perf_counter() - started
+    raw_tokens = sum(estimate_tokens(text) for text in raw)
+
+    reports = []
+    print(f"{'budget':>7} {'tokens':>9} {'saved':>7} {'max/doc':>8} {'truncated':>9} {'ms/doc':>7}")
+    for budget in [int(b) for b in args.budgets.split(",")]:
+        preprocessor = TextPreprocessor(budget or None)
+        started = time.perf_counter()
+        prepared = [preprocessor.prepare(text) for text in cleaned]
+        seconds = clean_seconds + time.perf_counter() - started
+        tokens = [estimate_tokens(text) for text in prepared]
+        report = {
+            "budget": budget,
+            "raw_tokens": raw_tokens,
+            "tokens": sum(tokens),
+            "saved_pct": 100 * (1 - sum(tokens) / raw_tokens),
+            "max_tokens_per_doc": max(tokens),
+            "truncated": sum(estimate_tokens(c) > budget for c in cleaned) if budget else 0,
+            "ms_per_doc": 1000 * seconds / len(documents),
+        }
+        reports.append(report)
+        print(f"{budget or 'none':>7} {report['tokens']:>9} {report['saved_pct']:>6.1f}% "
+              f"{report['max_tokens_per_doc']:>8} {report['truncated']:>9} {report['ms_per_doc']:>7.2f}")
+    print(f"raw tokens: {raw_tokens} ({raw_tokens / len(documents):.0f}/doc)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cvs": len(documents), "runs": reports}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measure scoring accuracy lost by storing embeddings as float16 or int8.
+
+Usage: python -m benchmarks.quantization [--db recruitment.db] [--output results.json]
+       python -m benchmarks.quantization --synthetic 2000   # no database or Ollama needed
+
+Every stored job is scored against every stored candidate with float32
+vectors and again after an encode/decode round-trip in each dtype; the
+report has the score drift, top-1 agreement and top-k overlap per dtype.
+`--synthetic` fills a temporary database with that many synthetic CVs,
+embedded by the fake server's bag-of-words model.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from database.codec import decode_embedding, quantization_error
+from database.db_handler import DBHandler
+
+
+def load_vectors(db: DBHandler, table: str, limit: int) -> np.ndarray:
+    rows = db.conn.execute(f"SELECT embedding FROM {table} LIMIT ?", (limit,)).fetchall()
+    vectors = [decode_embedding(row[0]) for row in rows]
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    dim = len(vectors[0])
+    return np.stack([v for v in vectors if len(v) == dim])
+
+
+def fill_synthetic(db: DBHandler, num_cvs: int, num_jobs: int, seed: int = 0):
+    """Store synthetic jobs and CVs with 768-d bag-of-words embeddings from the fake server"""
+    from agents.matching_engine import MatchingEngine
+    from benchmarks.corpus import TITLES, cv_text
+    from benchmarks.fake_ollama import SKILLS, FakeOllamaConfig, FakeOllamaServer
+
+    rng = random.Random(seed)
+    server = FakeOllamaServer(config=FakeOllamaConfig(embed_latency=0.0, embed_latency_per_item=0.0,
+                                                      lexical_embeddings=True)).start()
+    try:
+        engine = MatchingEngine(base_url=server.url, batch_size=64)
+        descriptions = [f"We are hiring a {TITLES[j % len(TITLES)]}. Must have: {', '.join(rng.sample(SKILLS, 4))}."
+                        for j in range(num_jobs)]
+        db.create_jobs([{"title": f"Job {j}", "raw_description": text, "summary": {}, "embedding": vector}
+                        for j, (text, vector) in enumerate(zip(descriptions, engine.get_embeddings(descriptions)))])
+        texts = [cv_text(rng, rng.randint(2, 8)) for _ in range(num_cvs)]
+        db.create_candidates([{"job_id": 1, "cv_text": text, "cv_data": {}, "embedding": vector, "score": 0.0}
+                              for text, vector in zip(texts, engine.get_embeddings(texts))])
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="recruitment.db")
+    parser.add_argument("--max-jobs", type=int, default=200)
+    parser.add_argument("--max-candidates", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=10, help="Size of the top-k lists compared per job")
+    parser.add_argument("--synthetic", type=int, metavar="CVS",
+                        help="Measure on this many synthetic CVs in a temporary database instead of --db")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        args.db = os.path.join(tempfile.mkdtemp(), "quantization.db")
+        fill_synthetic(DBHandler(args.db), args.synthetic, min(args.max_jobs, 50))
+    db = DBHandler(args.db)
+    jd_vectors = load_vectors(db, "jobs", args.max_jobs)
+    cv_vectors = load_vectors(db, "cv_documents", args.max_candidates)
+    if not len(jd_vectors) or not len(cv_vectors):
+        print("Need at least one stored job and one stored candidate")
+        return
+
+    report = {
+        "jobs": len(jd_vectors),
+        "candidates": len(cv_vectors),
+        "storage": db.storage_stats(),
+        "dtypes": [quantization_error(jd_vectors, cv_vectors, dtype, args.k) for dtype in ("float32", "float16", "int8")],
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
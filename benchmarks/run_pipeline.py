@@ -0,0 +1,192 @@
+"""End-to-end throughput benchmark for the screening pipeline.
+
+Starts a fake Ollama server (see benchmarks.fake_ollama), generates a
+synthetic corpus and measures per-stage latency percentiles and CVs/second
+for CVParser, JDSummarizer, MatchingEngine and DBHandler at several batch
+sizes and concurrency levels. Results are written as JSON so runs can be
+compared over time.
+
+Usage: python -m benchmarks.run_pipeline --output bench_results.json
+       python -m benchmarks.run_pipeline --ollama-url http://localhost:11434   # real server
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+
+
+def percentiles(samples) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+    }
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def run_stage(name: str, fn, items, concurrency: int) -> dict:
+    """Call fn on every item with `concurrency` threads; report latencies and throughput"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = [elapsed for _, elapsed in executor.map(lambda item: timed(fn, item), items)]
+    wall = time.perf_counter() - started
+    return {
+        "stage": name,
+        "concurrency": concurrency,
+        "items": len(items),
+        "wall_seconds": wall,
+        "items_per_second": len(items) / wall if wall else None,
+        "latency": percentiles(latencies),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def benchmark(args) -> dict:
+    from agents.cv_parser import CVParser
+    from agents.jd_summarizer import JDSummarizer
+    from agents.matching_engine import MatchingEngine
+    from database.db_handler import DBHandler
+    from services.csv_loader import read_csv_with_encoding
+    from services.pdf_extractor import PDFExtractor
+    from services.pipeline import CVPipeline
+
+    workdir = tempfile.mkdtemp(prefix="recruit_bench_")
+    max_batch = max(args.batch_sizes)
+    corpus = generate_corpus(workdir, num_cvs=max_batch, num_jobs=args.jobs, paragraphs=args.paragraphs)
+    jobs_df = read_csv_with_encoding(corpus["jobs_csv"])
+    jd_texts = list(jobs_df["Job Description"])
+
+    extractor = PDFExtractor(max_workers=args.extract_workers)
+    cv_texts = [r["text"] for r in extractor.extract_many((p, p) for p in corpus["cv_paths"])]
+
+    # No caches: every call measures a real round-trip
+    cv_parser = CVParser(base_url=args.ollama_url)
+    jd_summarizer = JDSummarizer(base_url=args.ollama_url)
+    matching_engine = MatchingEngine(base_url=args.ollama_url)
+    jd_embedding = matching_engine.get_embedding(jd_texts[0])
+
+    results = []
+    for batch_size in args.batch_sizes:
+        batch_paths = corpus["cv_paths"][:batch_size]
+        batch_texts = cv_texts[:batch_size]
+        for concurrency in args.concurrency:
+            print(f"batch={batch_size} concurrency={concurrency}")
+            stages = [
+                run_stage("pdf_extraction", extractor.extract, batch_paths, concurrency),
+                run_stage("cv_parser", cv_parser.parse, batch_texts, concurrency),
+                run_stage("jd_summarizer", jd_summarizer.summarize, jd_texts, concurrency),
+                run_stage("embedding_single", matching_engine.get_embedding, batch_texts, concurrency),
+            ]
+
+            started = time.perf_counter()
+            matching_engine.get_embeddings(batch_texts)
+            wall = time.perf_counter() - started
+            stages.append({"stage": "embedding_batched", "concurrency": 1, "items": batch_size,
+                           "wall_seconds": wall, "items_per_second": batch_size / wall if wall else None})
+
+            db = DBHandler(os.path.join(workdir, f"bench_{batch_size}_{concurrency}.db"))
+            job_id = db.create_job("Benchmark", jd_texts[0], {}, jd_embedding)
+            embedding = matching_engine.get_embedding(batch_texts[0])
+            rows = [{"job_id": job_id, "cv_text": text, "cv_data": {}, "embedding": embedding, "score": 50.0}
+                    for text in batch_texts]
+            stages.append(run_stage("db_create_candidate",
+                                    lambda row: db.create_candidate(row["job_id"], row["cv_text"], row["cv_data"],
+                                                                    row["embedding"], row["score"]),
+                                    rows, concurrency))
+            started = time.perf_counter()
+            db.create_candidates(rows)
+            wall = time.perf_counter() - started
+            stages.append({"stage": "db_create_candidates_bulk", "concurrency": 1, "items": batch_size,
+                           "wall_seconds": wall, "items_per_second": batch_size / wall if wall else None})
+            db.close()
+
+            pipeline = CVPipeline(cv_parser, matching_engine, extractor.extract, max_workers=concurrency,
+                                  serialize_extraction=False)
+            started = time.perf_counter()
+            completed = sum(1 for r in pipeline.run([(p, p) for p in batch_paths], jd_embedding) if not r["error"])
+            wall = time.perf_counter() - started
+            stages.append({"stage": "end_to_end", "concurrency": concurrency, "items": completed,
+                           "wall_seconds": wall, "cvs_per_second": completed / wall if wall else None})
+
+            results.append({"batch_size": batch_size, "concurrency": concurrency, "stages": stages})
+
+    extractor.shutdown()
+    return {"workdir": workdir, "runs": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CV screening pipeline")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write results to")
+    parser.add_argument("--ollama-url", help="Benchmark a real Ollama server instead of the fake one")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--paragraphs", type=int, default=6)
+    parser.add_argument("--extract-workers", type=int, default=None)
+    parser.add_argument("--generate-latency", type=float, default=0.2, help="Fake server: seconds per generation")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Fake server: seconds per output token")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="Fake server: seconds per embed call")
+    parser.add_argument("--output-tokens", type=int, default=120, help="Fake server: tokens per generation")
+    args = parser.parse_args()
+
+    server = None
+    if not args.ollama_url:
+        config = FakeOllamaConfig(generate_latency=args.generate_latency, token_latency=args.token_latency,
+                                  embed_latency=args.embed_latency, output_tokens=args.output_tokens)
+        server = FakeOllamaServer(config=config).start()
+        args.ollama_url = server.url
+
+    try:
+        report = benchmark(args)
+    finally:
+        if server is not None:
+            report_counts = dict(server.request_counts)
+            server.stop()
+
+    report.update({
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ollama_url": args.ollama_url if server is None else "fake",
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+    })
+    if server is not None:
+        report["fake_server_requests"] = report_counts
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Measure generated tokens and JSON parse failures with and without constrained generation.
+
+Runs CVParser (LLM only) and JDSummarizer over the same texts in three
+modes: free-form generation as before, free-form with the num_predict cap,
+and schema-constrained streaming that stops at the end of the JSON object.
+Reports completion tokens as counted by the client, tokens the server
+actually generated (fake server only), parse failures, truncated answers
+and wall time.
+
+The fake server answers free-form requests with JSON plus chatter and a
+share of malformed JSON, and pads constrained answers with whitespace, as
+small local models tend to do.
+
+Usage: python -m benchmarks.structured_output --cvs 100 --jds 30
+       python -m benchmarks.structured_output --ollama-url http://localhost:11434
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.corpus import SENTENCES, TITLES, cv_text
+from benchmarks.fake_ollama import SKILLS, FakeOllamaConfig, FakeOllamaServer
+
+MODES = {
+    "free": {"structured": False, "max_tokens": None},
+    "free_capped": {"structured": False},
+    "structured": {"structured": True},
+}
+
+
+def counter_total(snapshot: dict, name: str) -> float:
+    return sum(c["value"] for c in snapshot["counters"] if c["name"] == name)
+
+
+def jd_text(rng: random.Random) -> str:
+    title = rng.choice(TITLES)
+    return (f"We are hiring a {title}. Required skills: {', '.join(rng.sample(SKILLS, k=5))}. "
+            + " ".join(rng.choice(SENTENCES) for _ in range(8)))
+
+
+def run_mode(mode: str, options: dict, cvs, jds, base_url: str, server=None) -> dict:
+    from agents.cv_parser import CVParser
+    from agents.jd_summarizer import JDSummarizer
+    from services.metrics import metrics
+
+    metrics.reset()
+    server_tokens = server.generated_tokens if server else 0
+    cv_parser = CVParser(base_url=base_url, fast_path=False, **options)
+    jd_summarizer = JDSummarizer(base_url=base_url, **options)
+    started = time.perf_counter()
+    for text in cvs:
+        cv_parser.parse(text)
+    for text in jds:
+        jd_summarizer.summarize(text)
+    wall = time.perf_counter() - started
+    snapshot = metrics.snapshot()
+
+    report = {
+        "mode": mode,
+        "llm_calls": counter_total(snapshot, "llm_calls_total"),
+        "completion_tokens": counter_total(snapshot, "llm_completion_tokens_total"),
+        "parse_failures": counter_total(snapshot, "llm_parse_failures_total"),
+        "truncated": counter_total(snapshot, "llm_truncated_total"),
+        "stopped_early": counter_total(snapshot, "ollama_streams_stopped_early_total"),
+        "wall_seconds": wall,
+    }
+    if server is not None:
+        # The server notices a closed stream on its next write
+        time.sleep(0.2)
+        report["server_generated_tokens"] = server.generated_tokens - server_tokens
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cvs", type=int, default=100, help="Synthetic CVs to parse")
+    parser.add_argument("--jds", type=int, default=30, help="Synthetic job descriptions to summarize")
+    parser.add_argument("--paragraphs", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ollama-url", help="Benchmark a real Ollama server instead of the fake one")
+    parser.add_argument("--token-latency", type=float, default=0.0005, help="Fake server: seconds per token")
+    parser.add_argument("--chatter-tokens", type=int, default=60, help="Fake server: chatter after free-form JSON")
+    parser.add_argument("--malformed-rate", type=float, default=0.05,
+                        help="Fake server: share of free-form answers with invalid JSON")
+    parser.add_argument("--padding-tokens", type=int, default=400,
+                        help="Fake server: whitespace after constrained JSON")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.ollama_url
+    if not base_url:
+        server = FakeOllamaServer(config=FakeOllamaConfig(
+            generate_latency=0.0, token_latency=args.token_latency, chatter_tokens=args.chatter_tokens,
+            malformed_rate=args.malformed_rate, padding_tokens=args.padding_tokens,
+        )).start()
+        base_url = server.url
+
+    rng = random.Random(args.seed)
+    cvs = [cv_text(rng, args.paragraphs) for _ in range(args.cvs)]
+    jds = [jd_text(rng) for _ in range(args.jds)]
+    try:
+        reports = [run_mode(mode, options, cvs, jds, base_url, server) for mode, options in MODES.items()]
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(f"{'mode':<14} {'calls':>6} {'client tok':>10} {'server tok':>10} {'parse fail':>10} "
+          f"{'truncated':>9} {'wall s':>7}")
+    for report in reports:
+        print(f"{report['mode']:<14} {report['llm_calls']:>6.0f} {report['completion_tokens']:>10.0f} "
+              f"{report.get('server_generated_tokens', float('nan')):>10.0f} {report['parse_failures']:>10.0f} "
+              f"{report['truncated']:>9.0f} {report['wall_seconds']:>7.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"ollama_url": args.ollama_url or "fake", "runs": reports}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
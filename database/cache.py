@@ -0,0 +1,175 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry"""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache keyed by (model_name, hash of normalized text).
+
+    Lookups go through an in-memory LRU tier bounded by `max_memory_bytes`
+    first, then the SQLite table. The connection is shared between threads,
+    so every access goes through one lock.
+    """
+
+    def __init__(self, db_path="recruitment_cache.db", max_memory_bytes: int = 64 * 1024 * 1024):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.max_memory_bytes = max_memory_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._init_db()
+
+    def _init_db(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            model_name TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (model_name, text_hash)
+        )""")
+        self.conn.commit()
+
+    def _remember(self, key, vector: np.ndarray):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """Return a copy of the cached float32 vector, or None on a miss"""
+        key = (model_name, text_hash(text))
+        with self.lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector.copy()
+
+            row = self.conn.execute(
+                "SELECT vector FROM embedding_cache WHERE model_name = ? AND text_hash = ?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            vector = np.frombuffer(row[0], dtype=np.float32)
+            self._remember(key, vector)
+            self.disk_hits += 1
+            return vector.copy()
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        return [self.get(model_name, text) for text in texts]
+
+    def put(self, model_name: str, text: str, vector):
+        vector = np.ascontiguousarray(np.asarray(vector, dtype=np.float32).reshape(-1))
+        key = (model_name, text_hash(text))
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO embedding_cache (model_name, text_hash, dim, vector)
+                VALUES (?, ?, ?, ?)
+            """, (key[0], key[1], len(vector), vector.tobytes()))
+            self.conn.commit()
+            self._remember(key, vector)
+
+    def stats(self) -> dict:
+        with self.lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+
+def prompt_version(template: str) -> str:
+    """Short fingerprint of a prompt template; editing the prompt changes it"""
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMResultCache:
+    """Persistent cache of parsed LLM outputs keyed by model, prompt version and input hash.
+
+    Only successful extractions should be stored; callers skip `put` when they
+    fall back to placeholder data. Entries older than `max_age_seconds` are
+    treated as misses.
+    """
+
+    def __init__(self, db_path="recruitment_cache.db", max_age_seconds: Optional[float] = None):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._init_db()
+
+    def _init_db(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_result_cache (
+            model_name TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            input_hash TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (model_name, prompt_version, input_hash)
+        )""")
+        self.conn.commit()
+
+    def get(self, model_name: str, version: str, text: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT result, created_at FROM llm_result_cache
+                WHERE model_name = ? AND prompt_version = ? AND input_hash = ?
+            """, (model_name, version, text_hash(text))).fetchone()
+            if row is None or (self.max_age_seconds is not None
+                               and time.time() - row[1] > self.max_age_seconds):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, model_name: str, version: str, text: str, result: dict):
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO llm_result_cache (model_name, prompt_version, input_hash, result, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (model_name, version, text_hash(text), json.dumps(result), time.time()))
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
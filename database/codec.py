@@ -0,0 +1,141 @@
+import struct
+import zlib
+from typing import Union
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+# Embedding BLOB layout (version 1):
+#   magic "EMB" | version u8 | dtype u8 | pad | dim u32 | scale f32 | payload
+# Rows written before this format are headerless float32 bytes and still decode.
+EMBEDDING_MAGIC = b"EMB"
+EMBEDDING_VERSION = 1
+_HEADER = struct.Struct("<3sBBxIf")
+
+_DTYPES = {
+    "float32": (0, np.float32),
+    "float16": (1, np.float16),
+    "int8": (2, np.int8),
+}
+_DTYPE_CODES = {code: (name, dtype) for name, (code, dtype) in _DTYPES.items()}
+
+# Compressed text values are stored as BLOBs starting with one of these prefixes
+_ZLIB_PREFIX = b"ZL1:"
+_ZSTD_PREFIX = b"ZS1:"
+
+
+def encode_embedding(embedding, dtype: str = "float32") -> bytes:
+    """Encode a torch tensor or NumPy vector with a header recording dtype and dim.
+
+    int8 vectors are scaled per vector so the largest magnitude maps to 127.
+    """
+    if dtype not in _DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    code, np_dtype = _DTYPES[dtype]
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+
+    scale = 1.0
+    if dtype == "int8":
+        max_abs = float(np.abs(vector).max()) if len(vector) else 0.0
+        scale = max_abs / 127 if max_abs > 0 else 1.0
+        payload = np.clip(np.round(vector / scale), -127, 127).astype(np.int8)
+    else:
+        payload = vector.astype(np_dtype)
+
+    header = _HEADER.pack(EMBEDDING_MAGIC, EMBEDDING_VERSION, code, len(vector), scale)
+    return header + payload.tobytes()
+
+
+def is_legacy_embedding(blob: bytes) -> bool:
+    if len(blob) < _HEADER.size or blob[:3] != EMBEDDING_MAGIC:
+        return True
+    _, version, code, dim, _ = _HEADER.unpack_from(blob)
+    if version != EMBEDDING_VERSION or code not in _DTYPE_CODES:
+        return True
+    return len(blob) != _HEADER.size + dim * np.dtype(_DTYPE_CODES[code][1]).itemsize
+
+
+def embedding_dtype(blob: bytes) -> str:
+    if is_legacy_embedding(blob):
+        return "float32"
+    return _DTYPE_CODES[_HEADER.unpack_from(blob)[2]][0]
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    """Decode any stored embedding BLOB to a float32 vector"""
+    if is_legacy_embedding(blob):
+        return np.frombuffer(blob, dtype=np.float32)
+    _, _, code, dim, scale = _HEADER.unpack_from(blob)
+    _, np_dtype = _DTYPE_CODES[code]
+    payload = np.frombuffer(blob, dtype=np_dtype, count=dim, offset=_HEADER.size)
+    vector = payload.astype(np.float32)
+    if np_dtype == np.int8:
+        vector *= scale
+    return vector
+
+
+def encode_text(text: str, method: str = "zlib") -> Union[str, bytes]:
+    """Compress a text column value; method None stores the plain string"""
+    if method is None:
+        return text
+    data = text.encode("utf-8")
+    if method == "zstd" and zstandard is not None:
+        return _ZSTD_PREFIX + zstandard.ZstdCompressor(level=6).compress(data)
+    if method in ("zlib", "zstd"):
+        return _ZLIB_PREFIX + zlib.compress(data, 6)
+    raise ValueError(f"Unsupported text compression: {method}")
+
+
+def decode_text(value: Union[str, bytes]) -> str:
+    """Decode a text column value written by encode_text, or a plain legacy string"""
+    if isinstance(value, str):
+        return value
+    if value.startswith(_ZLIB_PREFIX):
+        return zlib.decompress(value[len(_ZLIB_PREFIX):]).decode("utf-8")
+    if value.startswith(_ZSTD_PREFIX):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed text")
+        return zstandard.ZstdDecompressor().decompress(value[len(_ZSTD_PREFIX):]).decode("utf-8")
+    return value.decode("utf-8")
+
+
+def is_compressed_text(value) -> bool:
+    return isinstance(value, bytes) and value[:4] in (_ZLIB_PREFIX, _ZSTD_PREFIX)
+
+
+def quantization_error(jd_vectors: np.ndarray, cv_vectors: np.ndarray, dtype: str, k: int = 10) -> dict:
+    """Compare 0-100 match scores from float32 vectors with scores after a storage round-trip"""
+    def scores(jd, cv):
+        jd = jd / np.maximum(np.linalg.norm(jd, axis=1, keepdims=True), 1e-12)
+        cv = cv / np.maximum(np.linalg.norm(cv, axis=1, keepdims=True), 1e-12)
+        return np.clip(jd @ cv.T * 100, 0, 100)
+
+    def round_trip(vectors):
+        return np.stack([decode_embedding(encode_embedding(v, dtype)) for v in vectors])
+
+    exact = scores(jd_vectors, cv_vectors)
+    approx = scores(round_trip(jd_vectors), round_trip(cv_vectors))
+    error = np.abs(exact - approx)
+    # Fraction of jobs whose best candidate is unchanged
+    top1_agreement = float(np.mean(exact.argmax(axis=1) == approx.argmax(axis=1))) if exact.size else 1.0
+    # Mean share of each job's top-k candidates that stay in its top-k
+    k = min(k, exact.shape[1])
+    if exact.size and k:
+        exact_top = np.argpartition(-exact, k - 1, axis=1)[:, :k]
+        approx_top = np.argpartition(-approx, k - 1, axis=1)[:, :k]
+        topk_overlap = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(exact_top, approx_top)]))
+    else:
+        topk_overlap = 1.0
+    return {
+        "dtype": dtype,
+        "bytes_per_vector": len(encode_embedding(cv_vectors[0], dtype)) if len(cv_vectors) else 0,
+        "mean_abs_score_error": float(error.mean()) if error.size else 0.0,
+        "max_abs_score_error": float(error.max()) if error.size else 0.0,
+        "top1_agreement": top1_agreement,
+        "k": k,
+        "top_k_overlap": topk_overlap,
+    }
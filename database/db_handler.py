@@ -1,11 +1,96 @@
 import sqlite3
 import json
-from typing import Optional
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Optional, List
+import numpy as np
+from services.metrics import Metrics, metrics
+from database.cache import text_hash
+from database.codec import (encode_embedding, decode_embedding, embedding_dtype, is_legacy_embedding,
+                            encode_text, decode_text, is_compressed_text)
+
+logger = logging.getLogger(__name__)
+
+
+class _Connection(sqlite3.Connection):
+    """Plain sqlite3 connection that supports weak references"""
+
 
 class DBHandler:
-    def __init__(self, db_path="recruitment.db"):
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path="recruitment.db", timeout: float = 30.0,
+                 embedding_dtype: str = "float32", text_compression: Optional[str] = "zlib"):
+        self.db_path = db_path
+        self.timeout = timeout
+        # Storage format for new rows; existing rows are decoded whatever their format
+        self.embedding_dtype = embedding_dtype
+        self.text_compression = text_compression
+        self._local = threading.local()
+        # Weak so connections of finished worker threads are closed when their thread-local goes away
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        self.candidate_index = None
+        self.skill_index = None
         self._init_db()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread, so workers can write while the UI reads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.add(conn)
+        return conn
+    
+    def _connect(self) -> sqlite3.Connection:
+        # `timeout` makes writers wait for the lock instead of failing with "database is locked".
+        # Each connection is only used by its own thread; check_same_thread is off so close() can
+        # run from any thread.
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False, factory=_Connection)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-32000")  # ~32 MB page cache
+        return conn
+    
+    def close(self):
+        with self._connections_lock:
+            for conn in list(self._connections):
+                conn.close()
+            self._connections = weakref.WeakSet()
+        self._local = threading.local()
+    
+    @contextmanager
+    def transaction(self):
+        """Run several statements in one write transaction with a single commit"""
+        conn = self.conn
+        # IMMEDIATE takes the write lock up front so rowids in the batch are contiguous
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def _encode_embedding(self, embedding) -> bytes:
+        return encode_embedding(embedding, self.embedding_dtype)
+    
+    def _encode_text(self, text: str):
+        return encode_text(text, self.text_compression)
+    
+    def _insert_many(self, sql: str, rows: list) -> List[int]:
+        if not rows:
+            return []
+        with metrics.timer("db_write_seconds", op="insert_many"), self.transaction() as conn:
+            conn.executemany(sql, rows)
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        metrics.incr("db_rows_written_total", len(rows))
+        return list(range(last_id - len(rows) + 1, last_id + 1))
         
     def _init_db(self):
         self.conn.execute("""
@@ -15,19 +100,61 @@ class DBHandler:
             raw_description TEXT NOT NULL,
             summary TEXT NOT NULL,
             embedding BLOB NOT NULL,
+            source_key TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )""")
+        # Jobs loaded through services.job_catalog are keyed by "<csv sha256>:<row>"
+        self._add_column("jobs", "source_key", "TEXT")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_source_key ON jobs(source_key)")
+        # How the job's embedding was made (MatchingEngine.embedding_config); NULL for older rows
+        self._add_column("jobs", "embedding_config", "TEXT")
         
+        # One row per distinct CV, keyed by the hash of its normalized text
         self.conn.execute("""
-        CREATE TABLE IF NOT EXISTS candidates (
-            candidate_id INTEGER PRIMARY KEY,
-            job_id INTEGER NOT NULL,
+        CREATE TABLE IF NOT EXISTS cv_documents (
+            document_id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL UNIQUE,
             cv_text TEXT NOT NULL,
             parsed_data TEXT NOT NULL,
             embedding BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+        
+        # One row per application: a CV document scored against a job
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS candidates (
+            candidate_id INTEGER PRIMARY KEY,
+            job_id INTEGER NOT NULL,
+            document_id INTEGER NOT NULL,
             score REAL NOT NULL,
-            FOREIGN KEY(job_id) REFERENCES jobs(job_id)
+            FOREIGN KEY(job_id) REFERENCES jobs(job_id),
+            FOREIGN KEY(document_id) REFERENCES cv_documents(document_id)
         )""")
+        self._migrate_legacy_candidates()
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_document ON candidates(document_id)")
+        # Second-stage results, so ranked views can be sorted and paged in SQL
+        for column, definition in [("skill_match", "REAL"), ("llm_score", "REAL"), ("final_score", "REAL"),
+                                   ("rerank_reason", "TEXT")]:
+            self._add_column("candidates", column, definition)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_job_score ON candidates(job_id, score)")
+        # Matches the "final" sort of list_candidates (reranked first, best blend first) so pages come off the index
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_candidates_job_final
+            ON candidates(job_id, llm_score IS NULL, COALESCE(final_score, score) DESC)
+        """)
+        
+        # Per-section embeddings of long CVs embedded in chunked mode
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS document_chunks (
+            chunk_id INTEGER PRIMARY KEY,
+            document_id INTEGER NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            text TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            FOREIGN KEY(document_id) REFERENCES cv_documents(document_id)
+        )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_document ON document_chunks(document_id)")
         
         self.conn.execute("""
         CREATE TABLE IF NOT EXISTS emails (
@@ -37,26 +164,291 @@ class DBHandler:
             content TEXT NOT NULL,
             FOREIGN KEY(candidate_id) REFERENCES candidates(candidate_id)
         )""")
+        
+        # Messages waiting to be sent by the outbox worker; a row moves to `emails` once delivered
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            outbox_id INTEGER PRIMARY KEY,
+            candidate_id INTEGER NOT NULL,
+            to_email TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP,
+            FOREIGN KEY(candidate_id) REFERENCES candidates(candidate_id)
+        )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, next_attempt_at)")
+        
+        # Durable screening queue: one row per uploaded CV, advanced stage by stage by
+        # services.work_queue workers so a crash only repeats the stage that was running
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS work_items (
+            item_id INTEGER PRIMARY KEY,
+            job_id INTEGER NOT NULL,
+            run_id TEXT,
+            filename TEXT NOT NULL,
+            pdf BLOB,
+            options TEXT NOT NULL DEFAULT '{}',
+            stage TEXT NOT NULL DEFAULT 'queued',
+            status TEXT NOT NULL DEFAULT 'pending',
+            cv_text TEXT,
+            parsed_data TEXT,
+            document_id INTEGER,
+            candidate_id INTEGER,
+            score REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            worker_id TEXT,
+            heartbeat_at REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(job_id) REFERENCES jobs(job_id),
+            FOREIGN KEY(document_id) REFERENCES cv_documents(document_id),
+            FOREIGN KEY(candidate_id) REFERENCES candidates(candidate_id)
+        )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items(status, item_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_job ON work_items(job_id)")
+        self._add_column("work_items", "run_id", "TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_run ON work_items(run_id)")
+        # list_candidates looks up each row's filename by candidate
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_candidate ON work_items(candidate_id)")
+        
+        # Metrics of the screening worker processes, one accumulated snapshot per worker,
+        # so the UI can show them next to its own
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS worker_metrics (
+            worker_id TEXT PRIMARY KEY,
+            snapshot TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )""")
+        
+        # Last, as merging repeated applications repoints rows in the tables above
+        self._merge_duplicate_applications()
+        # A CV applies to a job once; screening it again updates that application
+        self.conn.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_candidates_job_document ON candidates(job_id, document_id)
+        """)
+    
+    def _add_column(self, table: str, column: str, definition: str):
+        """Add a column that older databases were created without"""
+        if column not in [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]:
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            self.conn.commit()
+    
+    def _migrate_legacy_candidates(self, batch_size: int = 500):
+        """Split the old one-row-per-application candidates table into cv_documents + candidates.
+
+        Candidate IDs are kept, so emails and outbox rows still point at the
+        same applications. Identical CVs collapse into one document; stored
+        text and embeddings are moved as-is.
+        """
+        with self.transaction() as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(candidates)")]
+            if "cv_text" not in columns:
+                return
+            count = conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+            logger.info(f"Migrating {count} candidates to the cv_documents schema")
+            conn.execute("""
+            CREATE TABLE candidates_new (
+                candidate_id INTEGER PRIMARY KEY,
+                job_id INTEGER NOT NULL,
+                document_id INTEGER NOT NULL,
+                score REAL NOT NULL,
+                FOREIGN KEY(job_id) REFERENCES jobs(job_id),
+                FOREIGN KEY(document_id) REFERENCES cv_documents(document_id)
+            )""")
+            document_ids = {}
+            last_id = 0
+            while True:
+                rows = conn.execute("""
+                    SELECT candidate_id, job_id, cv_text, parsed_data, embedding, score FROM candidates
+                    WHERE candidate_id > ? ORDER BY candidate_id LIMIT ?
+                """, (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                applications = []
+                for candidate_id, job_id, cv_text, parsed_data, embedding, score in rows:
+                    digest = text_hash(decode_text(cv_text))
+                    if digest not in document_ids:
+                        document_ids[digest] = conn.execute("""
+                            INSERT INTO cv_documents (content_hash, cv_text, parsed_data, embedding)
+                            VALUES (?, ?, ?, ?)
+                        """, (digest, cv_text, parsed_data, embedding)).lastrowid
+                    applications.append((candidate_id, job_id, document_ids[digest], score))
+                conn.executemany("""
+                    INSERT INTO candidates_new (candidate_id, job_id, document_id, score) VALUES (?, ?, ?, ?)
+                """, applications)
+            conn.execute("DROP TABLE candidates")
+            conn.execute("ALTER TABLE candidates_new RENAME TO candidates")
+            logger.info(f"Migrated {count} candidates into {len(document_ids)} CV documents")
+    
+    def _merge_duplicate_applications(self):
+        """Collapse repeated (job, CV) rows left by re-runs before there was a unique index.
+
+        The newest row of each pair is kept; emails, outbox messages and
+        work items pointing at the older rows are moved to it.
+        """
+        if self.conn.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_candidates_job_document'
+        """).fetchone():
+            return
+        with self.transaction() as conn:
+            conn.execute("""
+                CREATE TEMP TABLE duplicate_candidates AS
+                SELECT c.candidate_id AS old_id, keep.candidate_id AS new_id
+                FROM candidates c
+                JOIN (SELECT job_id, document_id, MAX(candidate_id) AS candidate_id
+                      FROM candidates GROUP BY job_id, document_id HAVING COUNT(*) > 1) keep
+                  ON keep.job_id = c.job_id AND keep.document_id = c.document_id
+                WHERE c.candidate_id != keep.candidate_id
+            """)
+            for table in ("emails", "outbox", "work_items"):
+                conn.execute(f"""
+                    UPDATE {table} SET candidate_id = (
+                        SELECT new_id FROM duplicate_candidates WHERE old_id = {table}.candidate_id)
+                    WHERE candidate_id IN (SELECT old_id FROM duplicate_candidates)
+                """)
+            merged = conn.execute("""
+                DELETE FROM candidates WHERE candidate_id IN (SELECT old_id FROM duplicate_candidates)
+            """).rowcount
+            conn.execute("DROP TABLE duplicate_candidates")
+        if merged:
+            logger.info(f"Merged {merged} duplicate applications")
+    
+    def find_document(self, cv_text: str) -> Optional[dict]:
+        """Stored parse and embedding of an identical CV, or None if this text is new"""
+        row = self.conn.execute("""
+            SELECT document_id, parsed_data, embedding FROM cv_documents WHERE content_hash = ?
+        """, (text_hash(cv_text),)).fetchone()
+        if row is None:
+            return None
+        return {"document_id": row[0], "cv_data": json.loads(row[1]), "embedding": decode_embedding(row[2]),
+                "chunks": self.document_chunks(row[0])}
+    
+    def document_chunks(self, document_id: int) -> List[dict]:
+        """Stored chunks of a CV in order, each with section, text and embedding"""
+        rows = self.conn.execute("""
+            SELECT section, text, embedding FROM document_chunks WHERE document_id = ? ORDER BY chunk_index
+        """, (document_id,)).fetchall()
+        return [{"section": section, "text": decode_text(text), "embedding": decode_embedding(blob)}
+                for section, text, blob in rows]
+    
+    def best_chunks(self, document_ids: List[int], query_embedding) -> dict:
+        """{document_id: {section, text, score}} for the chunk of each CV closest to the query"""
+        if not document_ids:
+            return {}
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        placeholders = ",".join("?" * len(document_ids))
+        best = {}
+        for document_id, section, text, blob in self.conn.execute(f"""
+            SELECT document_id, section, text, embedding FROM document_chunks
+            WHERE document_id IN ({placeholders})
+        """, list(document_ids)):
+            vector = decode_embedding(blob)
+            if len(vector) != len(query):
+                continue
+            score = float(np.clip(vector @ query / max(float(np.linalg.norm(vector)), 1e-12) * 100, 0, 100))
+            if document_id not in best or score > best[document_id]["score"]:
+                best[document_id] = {"section": section, "text": text, "score": score}
+        for chunk in best.values():
+            chunk["text"] = decode_text(chunk["text"])
+        return best
+    
+    def _document_ids(self, conn, candidates: List[dict]) -> List[int]:
+        """Document ID for each candidate dict, inserting CVs that are not stored yet"""
+        ids = []
+        by_hash = {}
+        for c in candidates:
+            if c.get("document_id") is not None:
+                ids.append(c["document_id"])
+                continue
+            digest = text_hash(c["cv_text"])
+            if digest not in by_hash:
+                row = conn.execute("SELECT document_id FROM cv_documents WHERE content_hash = ?",
+                                   (digest,)).fetchone()
+                if row is not None:
+                    metrics.incr("db_documents_reused_total")
+                    by_hash[digest] = row[0]
+                else:
+                    document_id = by_hash[digest] = conn.execute("""
+                        INSERT INTO cv_documents (content_hash, cv_text, parsed_data, embedding)
+                        VALUES (?, ?, ?, ?)
+                    """, (digest, self._encode_text(c["cv_text"]), json.dumps(c["cv_data"]),
+                          self._encode_embedding(c["embedding"]))).lastrowid
+                    conn.executemany("""
+                        INSERT INTO document_chunks (document_id, chunk_index, section, text, embedding)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, [(document_id, i, chunk["section"], self._encode_text(chunk["text"]),
+                           self._encode_embedding(chunk["embedding"])) for i, chunk in enumerate(c.get("chunks") or [])])
+            ids.append(by_hash[digest])
+        return ids
+    
+    def get_job(self, job_id: int) -> Optional[dict]:
+        row = self.conn.execute("""
+            SELECT title, summary, embedding, embedding_config FROM jobs WHERE job_id = ?
+        """, (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {"job_id": job_id, "title": row[0], "summary": json.loads(row[1]),
+                "embedding": decode_embedding(row[2]), "embedding_config": row[3]}
+    
+    def document_embedding(self, document_id: int):
+        row = self.conn.execute("SELECT embedding FROM cv_documents WHERE document_id = ?",
+                                (document_id,)).fetchone()
+        return decode_embedding(row[0]) if row is not None else None
     
     def create_job(self, title: str, raw_description: str, summary: dict, embedding: bytes) -> int:
         cur = self.conn.cursor()
         cur.execute("""
             INSERT INTO jobs (title, raw_description, summary, embedding)
             VALUES (?, ?, ?, ?)
-        """, (title, raw_description, json.dumps(summary), embedding.numpy().tobytes()))
+        """, (title, self._encode_text(raw_description), json.dumps(summary), self._encode_embedding(embedding)))
         job_id = cur.lastrowid
-        self.conn.commit()
+        with metrics.timer("db_write_seconds", op="commit"):
+            self.conn.commit()
+        metrics.incr("db_rows_written_total")
         return job_id
     
-    def create_candidate(self, job_id: int, cv_text: str, cv_data: dict, embedding: bytes, score: float) -> int:
-        cur = self.conn.cursor()
-        cur.execute("""
-            INSERT INTO candidates (job_id, cv_text, parsed_data, embedding, score)
-            VALUES (?, ?, ?, ?, ?)
-        """, (job_id, cv_text, json.dumps(cv_data), embedding.numpy().tobytes(), score))
-        candidate_id = cur.lastrowid
-        self.conn.commit()
-        return candidate_id
+    def jobs_by_source_keys(self, source_keys: List[str], batch_size: int = 500) -> dict:
+        """{source_key: job_id} for the catalog jobs that are already stored"""
+        found = {}
+        for start in range(0, len(source_keys), batch_size):
+            batch = source_keys[start:start + batch_size]
+            found.update(self.conn.execute(f"""
+                SELECT source_key, job_id FROM jobs WHERE source_key IN ({','.join('?' * len(batch))})
+            """, batch).fetchall())
+        return found
+    
+    def save_catalog_jobs(self, jobs: List[dict]) -> dict:
+        """Store catalog jobs (create_job's arguments plus source_key and embedding_config); returns {source_key: job_id}.
+
+        Jobs whose source_key is already stored are left alone, so the
+        background precompute and an on-demand lookup can race safely.
+        """
+        if not jobs:
+            return {}
+        with metrics.timer("db_write_seconds", op="insert_many"), self.transaction() as conn:
+            conn.executemany("""
+                INSERT INTO jobs (title, raw_description, summary, embedding, embedding_config, source_key)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source_key) DO NOTHING
+            """, [(job["title"], self._encode_text(job["raw_description"]), json.dumps(job["summary"]),
+                   self._encode_embedding(job["embedding"]), job.get("embedding_config"), job["source_key"])
+                  for job in jobs])
+        metrics.incr("db_rows_written_total", len(jobs))
+        return self.jobs_by_source_keys([job["source_key"] for job in jobs])
+    
+    def create_candidate(self, job_id: int, cv_text: str, cv_data: dict, embedding: bytes, score: float,
+                         document_id: Optional[int] = None) -> int:
+        """Record an application; the CV itself is stored once however many jobs it is scored against"""
+        return self.create_candidates([{"job_id": job_id, "cv_text": cv_text, "cv_data": cv_data,
+                                        "embedding": embedding, "score": score, "document_id": document_id}])[0]
     
     def create_email(self, candidate_id: int, content: str) -> int:
         cur = self.conn.cursor()
@@ -64,5 +456,546 @@ class DBHandler:
             INSERT INTO emails (candidate_id, content)
             VALUES (?, ?)
         """, (candidate_id, content))
-        self.conn.commit()
-        return cur.lastrowid
\ No newline at end of file
+        with metrics.timer("db_write_seconds", op="commit"):
+            self.conn.commit()
+        metrics.incr("db_rows_written_total")
+        return cur.lastrowid
+    
+    def create_jobs(self, jobs: List[dict]) -> List[int]:
+        """Insert many jobs in one transaction; each dict has create_job's arguments"""
+        return self._insert_many("""
+            INSERT INTO jobs (title, raw_description, summary, embedding)
+            VALUES (?, ?, ?, ?)
+        """, [(job["title"], self._encode_text(job["raw_description"]), json.dumps(job["summary"]),
+               self._encode_embedding(job["embedding"])) for job in jobs])
+    
+    def create_candidates(self, candidates: List[dict]) -> List[int]:
+        """Insert many applications in one transaction; each dict has create_candidate's arguments"""
+        if not candidates:
+            return []
+        with metrics.timer("db_write_seconds", op="insert_many"), self.transaction() as conn:
+            candidate_ids = self._insert_candidates(conn, candidates)
+        metrics.incr("db_rows_written_total", len(candidates))
+        if self.candidate_index is not None:
+            self.candidate_index.add_many([
+                (candidate_id, c["job_id"], c["embedding"])
+                for candidate_id, c in zip(candidate_ids, candidates)
+            ])
+        if self.skill_index is not None:
+            self.skill_index.add_many([
+                (candidate_id, c["job_id"], c["cv_data"].get("skills"))
+                for candidate_id, c in zip(candidate_ids, candidates)
+            ])
+        return candidate_ids
+    
+    def _insert_candidates(self, conn, candidates: List[dict]) -> List[int]:
+        """Insert applications, or rescore existing ones for the same job and CV; returns their IDs in order"""
+        document_ids = self._document_ids(conn, candidates)
+        # A changed score makes the stored rerank blend stale; the LLM's own judgement still stands
+        return [conn.execute("""
+            INSERT INTO candidates (job_id, document_id, score) VALUES (?, ?, ?)
+            ON CONFLICT(job_id, document_id) DO UPDATE SET
+                score = excluded.score,
+                final_score = CASE WHEN score = excluded.score THEN final_score END
+            RETURNING candidate_id
+        """, (c["job_id"], document_id, c["score"])).fetchone()[0] for c, document_id in zip(candidates, document_ids)]
+    
+    def create_emails(self, emails: List[dict]) -> List[int]:
+        """Insert many email records in one transaction; each dict has create_email's arguments"""
+        return self._insert_many("""
+            INSERT INTO emails (candidate_id, content)
+            VALUES (?, ?)
+        """, [(e["candidate_id"], e["content"]) for e in emails])
+    
+    def iter_candidate_embeddings(self, after_id: int = 0):
+        """Yield (candidate_id, job_id, embedding) for candidates newer than after_id"""
+        cur = self.conn.execute("""
+            SELECT c.candidate_id, c.job_id, d.embedding
+            FROM candidates c JOIN cv_documents d ON d.document_id = c.document_id
+            WHERE c.candidate_id > ? ORDER BY c.candidate_id
+        """, (after_id,))
+        for candidate_id, job_id, blob in cur:
+            yield candidate_id, job_id, decode_embedding(blob)
+    
+    def iter_candidate_skills(self, after_id: int = 0):
+        """Yield (candidate_id, job_id, skills) for candidates newer than after_id"""
+        cur = self.conn.execute("""
+            SELECT c.candidate_id, c.job_id, json_extract(d.parsed_data, '$.skills')
+            FROM candidates c JOIN cv_documents d ON d.document_id = c.document_id
+            WHERE c.candidate_id > ? ORDER BY c.candidate_id
+        """, (after_id,))
+        for candidate_id, job_id, skills in cur:
+            # json_extract returns arrays as JSON text and plain strings as-is
+            if isinstance(skills, str) and skills.startswith(("[", "{")):
+                try:
+                    skills = json.loads(skills)
+                except json.JSONDecodeError:
+                    pass
+            yield candidate_id, job_id, skills
+    
+    def attach_index(self, index):
+        """Bring a CandidateIndex up to date and keep it updated on every insert"""
+        index.sync(self)
+        self.candidate_index = index
+    
+    def attach_skill_index(self, index):
+        """Bring a SkillIndex up to date and keep it updated on every insert"""
+        index.sync(self)
+        self.skill_index = index
+    
+    def search_candidates(self, query_embedding, k: int = 10, must_have: List[str] = None,
+                          skills: List[str] = None, skill_weight: float = 0.3) -> List[dict]:
+        """Top-k stored candidates across all jobs for a job embedding.
+
+        `must_have` skills prefilter candidates through the skill index, so
+        only the survivors are scored against the embedding. With `skills`
+        (e.g. the JD's required_skills) the score becomes a hybrid of
+        embedding similarity and skill coverage weighted by `skill_weight`.
+        A CV that applied to several jobs appears once, with its best
+        scoring application.
+        """
+        if self.candidate_index is None:
+            from database.vector_index import CandidateIndex
+            self.attach_index(CandidateIndex())
+        else:
+            self.candidate_index.sync(self)
+        
+        survivors = None
+        query_skills = list(must_have or []) + list(skills or [])
+        if query_skills:
+            if self.skill_index is None:
+                from database.skill_index import SkillIndex
+                self.attach_skill_index(SkillIndex())
+            else:
+                self.skill_index.sync(self)
+        if must_have:
+            survivors = self.skill_index.filter(must_have)
+            if not survivors:
+                return []
+        
+        # Over-fetch so that, after blending and folding applications of the same CV together,
+        # strong matches just outside the vector top-k can still make the list
+        fetch = max(k * 5, 50)
+        hits = self.candidate_index.search(np.asarray(query_embedding, dtype=np.float32), k=fetch,
+                                           candidate_ids=survivors)
+        if not hits:
+            return []
+        
+        vector_scores = {candidate_id: score for candidate_id, _, score in hits}
+        coverage = {}
+        if query_skills:
+            coverage = self.skill_index.coverage(query_skills, list(vector_scores))
+            hits = sorted(
+                ((candidate_id, job_id, (1 - skill_weight) * score + skill_weight * coverage[candidate_id][0])
+                 for candidate_id, job_id, score in hits),
+                key=lambda hit: hit[2], reverse=True,
+            )
+        
+        placeholders = ",".join("?" * len(hits))
+        rows = self.conn.execute(f"""
+            SELECT c.candidate_id, d.parsed_data, j.title, c.document_id
+            FROM candidates c
+            JOIN cv_documents d ON d.document_id = c.document_id
+            LEFT JOIN jobs j ON j.job_id = c.job_id
+            WHERE c.candidate_id IN ({placeholders})
+        """, [candidate_id for candidate_id, _, _ in hits]).fetchall()
+        details = {row[0]: (json.loads(row[1]), row[2], row[3]) for row in rows}
+        
+        results, seen_documents = [], set()
+        for candidate_id, job_id, score in hits:
+            parsed_data, job_title, document_id = details.get(candidate_id, ({}, None, None))
+            if document_id is not None:
+                if document_id in seen_documents:
+                    continue
+                seen_documents.add(document_id)
+            result = {**parsed_data, "id": candidate_id, "job_id": job_id, "applied_for": job_title, "score": score,
+                      "document_id": document_id}
+            if candidate_id in coverage:
+                result.update(vector_score=vector_scores[candidate_id], skill_score=coverage[candidate_id][0],
+                              matched_skills=coverage[candidate_id][1])
+            results.append(result)
+            if len(results) >= k:
+                break
+        return results
+    
+    # ORDER BY clauses for list_candidates; "final" keeps reranked candidates above the rest like the reranker does
+    CANDIDATE_SORTS = {
+        "final": "c.llm_score IS NULL, COALESCE(c.final_score, c.score) {direction}",
+        "score": "c.score {direction}",
+        "skill_match": "c.skill_match IS NULL, c.skill_match {direction}",
+        "name": "json_extract(d.parsed_data, '$.name') {direction}",
+    }
+    
+    def _candidate_filter(self, job_id: int, run_id: Optional[str], min_score: Optional[float],
+                          query: Optional[str]):
+        where, params = ["c.job_id = ?"], [job_id]
+        if run_id is not None:
+            where.append("c.candidate_id IN (SELECT candidate_id FROM work_items WHERE run_id = ?)")
+            params.append(run_id)
+        if min_score is not None:
+            where.append("COALESCE(c.final_score, c.score) >= ?")
+            params.append(min_score)
+        if query:
+            where.append("(json_extract(d.parsed_data, '$.name') LIKE ? OR json_extract(d.parsed_data, '$.email') LIKE ?)")
+            params += [f"%{query}%", f"%{query}%"]
+        return " AND ".join(where), params
+    
+    def count_candidates(self, job_id: int, run_id: Optional[str] = None, min_score: Optional[float] = None,
+                         query: Optional[str] = None) -> int:
+        where, params = self._candidate_filter(job_id, run_id, min_score, query)
+        join = "JOIN cv_documents d ON d.document_id = c.document_id" if query else ""
+        return self.conn.execute(f"SELECT COUNT(*) FROM candidates c {join} WHERE {where}", params).fetchone()[0]
+    
+    def list_candidates(self, job_id: int, run_id: Optional[str] = None, min_score: Optional[float] = None,
+                        query: Optional[str] = None, sort: str = "final", descending: bool = True,
+                        limit: Optional[int] = 25, offset: int = 0) -> List[dict]:
+        """One page of a job's applications (optionally one screening run), sorted and filtered in SQL.
+
+        `min_score` applies to the final score (the rerank blend when there is
+        one), `query` matches name or email. Each row is the parsed profile
+        plus id, filename, document_id and the stored scores.
+        """
+        if sort not in self.CANDIDATE_SORTS:
+            raise ValueError(f"Unsupported sort: {sort}")
+        where, params = self._candidate_filter(job_id, run_id, min_score, query)
+        order = self.CANDIDATE_SORTS[sort].format(direction="DESC" if descending else "ASC")
+        rows = self.conn.execute(f"""
+            SELECT c.candidate_id, c.document_id, c.score, c.skill_match, c.llm_score, c.final_score, c.rerank_reason,
+                   d.parsed_data, (SELECT w.filename FROM work_items w WHERE w.candidate_id = c.candidate_id)
+            FROM candidates c JOIN cv_documents d ON d.document_id = c.document_id
+            WHERE {where}
+            ORDER BY {order}, c.candidate_id
+            LIMIT ? OFFSET ?
+        """, (*params, -1 if limit is None else limit, offset)).fetchall()
+        results = []
+        for r in rows:
+            result = {**json.loads(r[7]), "id": r[0], "document_id": r[1], "score": r[2], "filename": r[8]}
+            for key, value in zip(("skill_match", "llm_score", "final_score", "rerank_reason"), r[3:7]):
+                if value is not None:
+                    result[key] = value
+            results.append(result)
+        return results
+    
+    def update_candidate_scores(self, updates: List[dict]):
+        """Store second-stage results; each dict has `id` and any of skill_match, llm_score, final_score, rerank_reason"""
+        columns = ("skill_match", "llm_score", "final_score", "rerank_reason")
+        rows = [tuple(u.get(column) for column in columns) + (u["id"],) for u in updates]
+        if not rows:
+            return
+        with metrics.timer("db_write_seconds", op="update_many"), self.transaction() as conn:
+            # COALESCE keeps values set by an earlier update (skill match before rerank)
+            conn.executemany(f"""
+                UPDATE candidates SET {", ".join(f"{c} = COALESCE(?, {c})" for c in columns)}
+                WHERE candidate_id = ?
+            """, rows)
+    
+    def get_candidate(self, candidate_id: int) -> Optional[dict]:
+        """Fetch one candidate with decoded text, parsed data and embedding"""
+        row = self.conn.execute("""
+            SELECT c.candidate_id, c.job_id, d.cv_text, d.parsed_data, d.embedding, c.score, c.document_id
+            FROM candidates c JOIN cv_documents d ON d.document_id = c.document_id
+            WHERE c.candidate_id = ?
+        """, (candidate_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "job_id": row[1],
+            "cv_text": decode_text(row[2]),
+            "cv_data": json.loads(row[3]),
+            "embedding": decode_embedding(row[4]),
+            "score": row[5],
+            "document_id": row[6],
+        }
+    
+    def migrate_storage(self, batch_size: int = 500) -> dict:
+        """Rewrite existing rows in the configured embedding dtype and text compression.
+
+        Safe to run repeatedly: rows already in the target format are skipped.
+        """
+        migrated = {"jobs": 0, "cv_documents": 0, "document_chunks": 0}
+        targets = [
+            ("jobs", "job_id", "raw_description"),
+            ("cv_documents", "document_id", "cv_text"),
+            ("document_chunks", "chunk_id", "text"),
+        ]
+        for table, id_column, text_column in targets:
+            last_id = 0
+            while True:
+                rows = self.conn.execute(f"""
+                    SELECT {id_column}, {text_column}, embedding FROM {table}
+                    WHERE {id_column} > ? ORDER BY {id_column} LIMIT ?
+                """, (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                
+                updates = []
+                for row_id, text, blob in rows:
+                    text_done = is_compressed_text(text) == (self.text_compression is not None)
+                    if text_done and not is_legacy_embedding(blob) and embedding_dtype(blob) == self.embedding_dtype:
+                        continue
+                    updates.append((self._encode_text(decode_text(text)),
+                                    self._encode_embedding(decode_embedding(blob)), row_id))
+                if updates:
+                    with self.transaction() as conn:
+                        conn.executemany(f"""
+                            UPDATE {table} SET {text_column} = ?, embedding = ? WHERE {id_column} = ?
+                        """, updates)
+                    migrated[table] += len(updates)
+        return migrated
+    
+    def storage_stats(self) -> dict:
+        """Bytes used by embeddings and text per table"""
+        stats = {}
+        for table, text_column in [("jobs", "raw_description"), ("cv_documents", "cv_text"),
+                                   ("document_chunks", "text")]:
+            rows, embedding_bytes, text_bytes = self.conn.execute(f"""
+                SELECT COUNT(*), COALESCE(SUM(LENGTH(embedding)), 0),
+                       COALESCE(SUM(LENGTH(CAST({text_column} AS BLOB))), 0)
+                FROM {table}
+            """).fetchone()
+            stats[table] = {"rows": rows, "embedding_bytes": embedding_bytes, "text_bytes": text_bytes}
+        return stats
+    
+    def enqueue_emails(self, messages: List[dict]) -> List[int]:
+        """Queue messages for the outbox worker; each dict has candidate_id, to_email, subject and body"""
+        return self._insert_many("""
+            INSERT INTO outbox (candidate_id, to_email, subject, body)
+            VALUES (?, ?, ?, ?)
+        """, [(m["candidate_id"], m["to_email"], m["subject"], m["body"]) for m in messages])
+    
+    def claim_outbox(self, limit: int = 50) -> List[dict]:
+        """Atomically mark up to `limit` due messages as 'sending' and return them"""
+        with self.transaction() as conn:
+            rows = conn.execute("""
+                SELECT outbox_id, candidate_id, to_email, subject, body, attempts FROM outbox
+                WHERE status = 'queued' AND next_attempt_at <= ?
+                ORDER BY outbox_id LIMIT ?
+            """, (time.time(), limit)).fetchall()
+            conn.executemany("UPDATE outbox SET status = 'sending' WHERE outbox_id = ?",
+                             [(row[0],) for row in rows])
+        return [
+            {"outbox_id": row[0], "candidate_id": row[1], "to_email": row[2], "subject": row[3],
+             "body": row[4], "attempts": row[5]}
+            for row in rows
+        ]
+    
+    def mark_outbox_sent(self, messages: List[dict]):
+        """Record delivery: update the outbox rows and log them in `emails`"""
+        if not messages:
+            return
+        with self.transaction() as conn:
+            conn.executemany("""
+                UPDATE outbox SET status = 'sent', attempts = attempts + 1, last_error = NULL,
+                                  sent_at = CURRENT_TIMESTAMP
+                WHERE outbox_id = ?
+            """, [(m["outbox_id"],) for m in messages])
+            conn.executemany("""
+                INSERT INTO emails (candidate_id, content) VALUES (?, ?)
+            """, [(m["candidate_id"], m["subject"]) for m in messages])
+    
+    def mark_outbox_failed(self, message: dict, error: str, retry_at: Optional[float]):
+        """Record a failed attempt; the message is retried at `retry_at` or given up on if None"""
+        with self.transaction() as conn:
+            conn.execute("""
+                UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ?, next_attempt_at = ?
+                WHERE outbox_id = ?
+            """, ("queued" if retry_at is not None else "failed", error, retry_at or 0, message["outbox_id"]))
+    
+    def requeue_stuck_outbox(self) -> int:
+        """Put messages left in 'sending' by a crashed worker back in the queue"""
+        with self.transaction() as conn:
+            return conn.execute("UPDATE outbox SET status = 'queued' WHERE status = 'sending'").rowcount
+    
+    def outbox_backlog(self) -> int:
+        """Messages still to send: queued, or left 'sending' by an interrupted run"""
+        return self.conn.execute("SELECT COUNT(*) FROM outbox WHERE status IN ('queued', 'sending')").fetchone()[0]
+    
+    def outbox_status(self, candidate_ids: Optional[List[int]] = None) -> List[dict]:
+        """Delivery status of queued messages, optionally for some candidates only"""
+        sql = """
+            SELECT outbox_id, candidate_id, to_email, status, attempts, last_error, sent_at
+            FROM outbox
+        """
+        params = []
+        if candidate_ids:
+            sql += f" WHERE candidate_id IN ({','.join('?' * len(candidate_ids))})"
+            params = list(candidate_ids)
+        rows = self.conn.execute(sql + " ORDER BY outbox_id", params).fetchall()
+        return [
+            {"outbox_id": r[0], "candidate_id": r[1], "to_email": r[2], "status": r[3],
+             "attempts": r[4], "last_error": r[5], "sent_at": r[6]}
+            for r in rows
+        ]
+    
+    def enqueue_work(self, job_id: int, files: List[tuple], options: Optional[dict] = None,
+                     run_id: Optional[str] = None) -> List[int]:
+        """Queue (filename, pdf bytes) pairs to be screened against a job by services.work_queue workers.
+
+        `run_id` groups the items of one upload, so a job can be screened many times.
+        """
+        return self._insert_many("""
+            INSERT INTO work_items (job_id, run_id, filename, pdf, options) VALUES (?, ?, ?, ?, ?)
+        """, [(job_id, run_id, filename, data, json.dumps(options or {})) for filename, data in files])
+    
+    def claim_work_item(self, worker_id: str, stale_after: float = 60.0, max_attempts: int = 3) -> Optional[dict]:
+        """Atomically take the oldest pending item, or one whose worker stopped sending heartbeats.
+
+        Items claimed `max_attempts` times without finishing are marked 'failed'
+        so one bad CV cannot crash workers forever.
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            while True:
+                row = conn.execute("""
+                    SELECT item_id, job_id, filename, pdf, options, stage, cv_text, parsed_data, document_id, attempts
+                    FROM work_items
+                    WHERE status = 'pending' OR (status = 'running' AND heartbeat_at < ?)
+                    ORDER BY item_id LIMIT 1
+                """, (now - stale_after,)).fetchone()
+                if row is None:
+                    return None
+                if row[9] >= max_attempts:
+                    conn.execute("""
+                        UPDATE work_items SET status = 'failed', worker_id = NULL, updated_at = CURRENT_TIMESTAMP,
+                                              last_error = COALESCE(last_error, 'Worker stopped responding')
+                        WHERE item_id = ?
+                    """, (row[0],))
+                    continue
+                conn.execute("""
+                    UPDATE work_items SET status = 'running', worker_id = ?, heartbeat_at = ?, attempts = attempts + 1,
+                                          updated_at = CURRENT_TIMESTAMP
+                    WHERE item_id = ?
+                """, (worker_id, now, row[0]))
+                break
+        return {
+            "item_id": row[0], "job_id": row[1], "filename": row[2], "pdf": row[3], "options": json.loads(row[4]),
+            "stage": row[5], "cv_text": decode_text(row[6]) if row[6] is not None else None,
+            "cv_data": json.loads(row[7]) if row[7] is not None else None, "document_id": row[8],
+            "attempts": row[9] + 1,
+        }
+    
+    def heartbeat_work_item(self, item_id: int, worker_id: str) -> bool:
+        """Refresh a claim; False if another worker has taken the item over"""
+        with self.transaction() as conn:
+            return conn.execute("""
+                UPDATE work_items SET heartbeat_at = ? WHERE item_id = ? AND worker_id = ? AND status = 'running'
+            """, (time.time(), item_id, worker_id)).rowcount == 1
+    
+    def advance_work_item(self, item_id: int, worker_id: str, stage: str, cv_text: Optional[str] = None,
+                          cv_data: Optional[dict] = None, document: Optional[dict] = None) -> Optional[int]:
+        """Record a finished stage; returns the item's document_id, or raises if the claim was lost.
+
+        `document` (cv_text, cv_data, embedding, chunks and optionally
+        document_id) is stored in cv_documents in the same transaction.
+        """
+        with self.transaction() as conn:
+            owner = conn.execute("SELECT worker_id, status FROM work_items WHERE item_id = ?", (item_id,)).fetchone()
+            if owner is None or owner[0] != worker_id or owner[1] != "running":
+                raise LookupError(f"Work item {item_id} is no longer claimed by {worker_id}")
+            document_id = self._document_ids(conn, [document])[0] if document is not None else None
+            # Every stage after extraction works from cv_text, so the PDF is dropped
+            conn.execute("""
+                UPDATE work_items SET stage = ?, heartbeat_at = ?, updated_at = CURRENT_TIMESTAMP, pdf = NULL,
+                                      cv_text = COALESCE(?, cv_text), parsed_data = COALESCE(?, parsed_data),
+                                      document_id = COALESCE(?, document_id)
+                WHERE item_id = ?
+            """, (stage, time.time(), self._encode_text(cv_text) if cv_text is not None else None,
+                  json.dumps(cv_data) if cv_data is not None else None, document_id, item_id))
+        return document_id
+    
+    def complete_work_item(self, item_id: int, worker_id: str, job_id: int, document_id: int, score: float) -> int:
+        """Insert the application and mark the item done in one transaction; returns the candidate_id"""
+        with self.transaction() as conn:
+            owner = conn.execute("SELECT worker_id, status FROM work_items WHERE item_id = ?", (item_id,)).fetchone()
+            if owner is None or owner[0] != worker_id or owner[1] != "running":
+                raise LookupError(f"Work item {item_id} is no longer claimed by {worker_id}")
+            candidate_id = self._insert_candidates(conn, [{"job_id": job_id, "document_id": document_id,
+                                                           "score": score}])[0]
+            # The CV now lives in cv_documents, so the per-item copies can go
+            conn.execute("""
+                UPDATE work_items SET stage = 'scored', status = 'done', candidate_id = ?, score = ?,
+                                      pdf = NULL, cv_text = NULL, parsed_data = NULL, last_error = NULL,
+                                      updated_at = CURRENT_TIMESTAMP
+                WHERE item_id = ?
+            """, (candidate_id, score, item_id))
+        metrics.incr("db_rows_written_total")
+        return candidate_id
+    
+    def fail_work_item(self, item_id: int, worker_id: str, error: str, retry: bool = True):
+        """Release a claim after an error; the item is retried from its last stage unless `retry` is False"""
+        with self.transaction() as conn:
+            conn.execute("""
+                UPDATE work_items SET status = ?, last_error = ?, worker_id = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE item_id = ? AND worker_id = ?
+            """, ("pending" if retry else "failed", error, item_id, worker_id))
+    
+    def _run_filter(self, job_id: int, run_id: Optional[str]):
+        if run_id is None:
+            return "w.job_id = ?", (job_id,)
+        return "w.job_id = ? AND w.run_id = ?", (job_id, run_id)
+    
+    def work_progress(self, job_id: int, run_id: Optional[str] = None) -> dict:
+        """Item counts for a job (or one run of it) by status and by stage"""
+        where, params = self._run_filter(job_id, run_id)
+        rows = self.conn.execute(f"""
+            SELECT status, stage, COUNT(*) FROM work_items w WHERE {where} GROUP BY status, stage
+        """, params).fetchall()
+        progress = {"total": 0, "status": {}, "stage": {}}
+        for status, stage, count in rows:
+            progress["total"] += count
+            progress["status"][status] = progress["status"].get(status, 0) + count
+            progress["stage"][stage] = progress["stage"].get(stage, 0) + count
+        progress["finished"] = progress["status"].get("done", 0) + progress["status"].get("failed", 0)
+        return progress
+    
+    def work_results(self, job_id: int, run_id: Optional[str] = None, status: Optional[str] = None) -> List[dict]:
+        """Items of a job (or run) in upload order, optionally with one status; list_candidates has the profiles"""
+        where, params = self._run_filter(job_id, run_id)
+        if status is not None:
+            where, params = f"{where} AND w.status = ?", (*params, status)
+        rows = self.conn.execute(f"""
+            SELECT w.item_id, w.filename, w.status, w.stage, w.last_error, w.candidate_id, w.score, w.document_id
+            FROM work_items w WHERE {where} ORDER BY w.item_id
+        """, params).fetchall()
+        return [
+            {"item_id": r[0], "filename": r[1], "status": r[2], "stage": r[3], "error": r[4], "candidate_id": r[5],
+             "score": r[6], "document_id": r[7]}
+            for r in rows
+        ]
+    
+    def add_worker_metrics(self, worker_id: str, snapshot: dict):
+        """Add a worker's drained metrics snapshot to what it has reported before"""
+        if not snapshot["counters"] and not snapshot["timers"]:
+            return
+        with self.transaction() as conn:
+            registry = Metrics()
+            row = conn.execute("SELECT snapshot FROM worker_metrics WHERE worker_id = ?", (worker_id,)).fetchone()
+            if row is not None:
+                registry.merge(json.loads(row[0]))
+            registry.merge(snapshot)
+            conn.execute("""
+                INSERT INTO worker_metrics (worker_id, snapshot, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(worker_id) DO UPDATE SET snapshot = excluded.snapshot, updated_at = excluded.updated_at
+            """, (worker_id, registry.to_json(), time.time()))
+    
+    def worker_metrics(self) -> Metrics:
+        """Every worker's reported metrics, summed into one registry"""
+        registry = Metrics()
+        for (snapshot,) in self.conn.execute("SELECT snapshot FROM worker_metrics"):
+            registry.merge(json.loads(snapshot))
+        return registry
+    
+    def clear_worker_metrics(self):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM worker_metrics")
+    
+    def unfinished_work_runs(self) -> List[dict]:
+        """Runs that still have queued or running items, newest first"""
+        rows = self.conn.execute("""
+            SELECT j.job_id, w.run_id, j.title, COUNT(*) FROM work_items w JOIN jobs j ON j.job_id = w.job_id
+            WHERE w.status IN ('pending', 'running')
+            GROUP BY j.job_id, w.run_id ORDER BY MAX(w.item_id) DESC
+        """).fetchall()
+        return [{"job_id": r[0], "run_id": r[1], "title": r[2], "remaining": r[3]} for r in rows]
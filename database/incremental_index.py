@@ -0,0 +1,38 @@
+import threading
+
+
+class IncrementalIndex:
+    """In-memory index over the candidates table that refreshes by candidate_id.
+
+    Subclasses implement `add_many` and `_rows_after`. Only `sync` moves
+    `last_candidate_id`: rows passed to add_many can have higher IDs than
+    rows another connection committed in the meantime, and moving past them
+    would make the next sync skip them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_candidate_id = 0
+
+    def add_many(self, rows):
+        raise NotImplementedError
+
+    def _rows_after(self, db, after_id: int):
+        """Yield (candidate_id, job_id, value) rows newer than after_id, in ID order"""
+        raise NotImplementedError
+
+    def sync(self, db, batch_size: int = 5000):
+        """Load candidates inserted since the last sync"""
+        batch = []
+        for row in self._rows_after(db, self.last_candidate_id):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self._add_synced(batch)
+                batch = []
+        if batch:
+            self._add_synced(batch)
+
+    def _add_synced(self, batch):
+        self.add_many(batch)
+        with self.lock:
+            self.last_candidate_id = max(self.last_candidate_id, batch[-1][0])
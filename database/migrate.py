@@ -0,0 +1,27 @@
+"""Rewrite stored rows into the compact storage format.
+
+Usage: python -m database.migrate [--db recruitment.db] [--embedding-dtype float16] [--text-compression zlib]
+"""
+import argparse
+import json
+
+from database.db_handler import DBHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="recruitment.db")
+    parser.add_argument("--embedding-dtype", default="float32", choices=["float32", "float16", "int8"])
+    parser.add_argument("--text-compression", default="zlib", choices=["zlib", "zstd", "none"])
+    args = parser.parse_args()
+
+    db = DBHandler(args.db, embedding_dtype=args.embedding_dtype,
+                   text_compression=None if args.text_compression == "none" else args.text_compression)
+    before = db.storage_stats()
+    migrated = db.migrate_storage()
+    db.conn.execute("VACUUM")
+    print(json.dumps({"migrated": migrated, "before": before, "after": db.storage_stats()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
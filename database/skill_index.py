@@ -0,0 +1,174 @@
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from database.incremental_index import IncrementalIndex
+
+# Common spellings folded onto one skill so "k8s" matches "Kubernetes"; also used by agents.rule_extractor
+SKILL_ALIASES = {
+    "golang": "Go", "js": "JavaScript", "ts": "TypeScript", "k8s": "Kubernetes", "postgres": "PostgreSQL",
+    "sklearn": "scikit-learn", "ml": "Machine Learning", "amazon web services": "AWS",
+    "google cloud": "GCP", "natural language processing": "NLP", "nodejs": "Node.js", "node": "Node.js",
+}
+_SYNONYMS = {alias: skill.lower() for alias, skill in SKILL_ALIASES.items()}
+
+
+def normalize_skill(term) -> str:
+    """Lowercase, drop qualifiers like '(5 years)' and punctuation, and fold synonyms"""
+    text = str(term).lower()
+    text = re.sub(r"\(.*?\)", " ", text)
+    # Keep characters that are part of skill names: c++, c#, node.js, ci/cd
+    text = re.sub(r"[^\w+#./ -]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip(" .-/")
+    return _SYNONYMS.get(text, text)
+
+
+def _skill_items(value, labels: bool = True):
+    """Every skill string in a parsed value, however the LLM nested it.
+
+    Strings outside lists may be comma separated. With `labels` False,
+    plain strings among a dict's values are skipped: in
+    {"category": "Backend", "technologies": [...]} only the list holds skills.
+    """
+    if isinstance(value, str):
+        yield from re.split(r"[,;\n]", value)
+    elif isinstance(value, dict):
+        named = value.get("name") or value.get("skill")
+        if named:
+            yield from _skill_items(named)
+            return
+        for item in value.values():
+            if labels or not isinstance(item, str):
+                yield from _skill_items(item, labels)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            if isinstance(item, str):
+                yield item
+            else:
+                yield from _skill_items(item, labels=False)
+    elif value is not None:
+        yield str(value)
+
+
+def skill_terms(skills) -> List[str]:
+    """Normalized, de-duplicated terms from a parsed `skills` value.
+
+    Accepts a comma string, a list, {group: [skills]} dicts and lists of
+    {"name": ...} or {"category": ..., "technologies": [...]} dicts.
+    """
+    terms = {}
+    for item in _skill_items(skills):
+        term = normalize_skill(item)
+        if term:
+            terms.setdefault(term, None)
+    return list(terms)
+
+
+class SkillIndex(IncrementalIndex):
+    """Inverted index from normalized skill terms to candidate IDs.
+
+    Supports boolean prefiltering ("must have python and kubernetes") by
+    intersecting posting sets, BM25 ranking over skill terms and an
+    IDF-weighted skill coverage score on the 0-100 scale used for
+    embedding scores, so the two can be blended. Like CandidateIndex,
+    `sync` only reads candidates newer than the last one it synced.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._postings: Dict[str, Set[int]] = {}
+        self._doc_terms: Dict[int, List[str]] = {}
+        self._job_ids: Dict[int, int] = {}
+        self._total_terms = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._doc_terms)
+
+    def add_many(self, rows: Iterable[Tuple[int, int, object]]):
+        """Add (candidate_id, job_id, skills) rows; `skills` is the raw parsed value"""
+        with self.lock:
+            for candidate_id, job_id, skills in rows:
+                if candidate_id in self._doc_terms:
+                    continue
+                terms = skill_terms(skills)
+                self._doc_terms[candidate_id] = terms
+                self._job_ids[candidate_id] = job_id
+                self._total_terms += len(terms)
+                for term in terms:
+                    self._postings.setdefault(term, set()).add(candidate_id)
+
+    def add(self, candidate_id: int, job_id: int, skills):
+        self.add_many([(candidate_id, job_id, skills)])
+
+    def _rows_after(self, db, after_id: int):
+        return db.iter_candidate_skills(after_id=after_id)
+
+    def vocabulary(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(term, number of candidates) pairs, most common first"""
+        with self.lock:
+            counts = sorted(((term, len(ids)) for term, ids in self._postings.items()), key=lambda x: (-x[1], x[0]))
+        return counts[:limit] if limit else counts
+
+    def filter(self, must_have: Iterable[str] = (), any_of: Iterable[str] = (),
+               job_id: Optional[int] = None) -> Set[int]:
+        """Candidate IDs that have every `must_have` skill and at least one `any_of` skill"""
+        must = [normalize_skill(term) for term in must_have]
+        some = [normalize_skill(term) for term in any_of]
+        with self.lock:
+            if must:
+                # Intersect the rarest postings first so the working set stays small
+                postings = sorted((self._postings.get(term, set()) for term in must), key=len)
+                survivors = set(postings[0])
+                for posting in postings[1:]:
+                    survivors &= posting
+                    if not survivors:
+                        break
+            else:
+                survivors = set(self._doc_terms)
+            if some:
+                survivors &= set().union(*(self._postings.get(term, set()) for term in some))
+            if job_id is not None:
+                survivors = {cid for cid in survivors if self._job_ids.get(cid) == job_id}
+        return survivors
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def bm25(self, query: Iterable[str], candidate_ids: Optional[Iterable[int]] = None,
+             k1: float = 1.2, b: float = 0.75) -> Dict[int, float]:
+        """BM25 scores of candidates (default: all that match any term) for the query skills"""
+        terms = list(dict.fromkeys(normalize_skill(term) for term in query))
+        with self.lock:
+            if not self.size:
+                return {}
+            avg_len = self._total_terms / self.size or 1.0
+            if candidate_ids is None:
+                candidate_ids = set().union(*(self._postings.get(term, set()) for term in terms)) if terms else set()
+            scores = {}
+            for cid in candidate_ids:
+                doc = self._doc_terms.get(cid)
+                if not doc:
+                    continue
+                doc_terms = set(doc)
+                norm = k1 * (1 - b + b * len(doc) / avg_len)
+                # Skill lists hold each term once, so term frequency is 0 or 1
+                score = sum(self._idf(term) * (k1 + 1) / (1 + norm) for term in terms if term in doc_terms)
+                if score:
+                    scores[cid] = score
+        return scores
+
+    def coverage(self, query: Iterable[str], candidate_ids: Iterable[int]) -> Dict[int, Tuple[float, List[str]]]:
+        """IDF-weighted share (0-100) of the query skills each candidate has, with the matched terms"""
+        terms = list(dict.fromkeys(normalize_skill(term) for term in query))
+        with self.lock:
+            weights = {term: max(self._idf(term), 1e-6) for term in terms}
+            total = sum(weights.values())
+            results = {}
+            for cid in candidate_ids:
+                doc_terms = set(self._doc_terms.get(cid, ()))
+                matched = [term for term in terms if term in doc_terms]
+                score = 100 * sum(weights[term] for term in matched) / total if total else 0.0
+                results[cid] = (score, matched)
+        return results
@@ -0,0 +1,103 @@
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from database.incremental_index import IncrementalIndex
+
+
+class CandidateIndex(IncrementalIndex):
+    """Cosine top-k search over stored candidate embeddings.
+
+    Vectors are L2-normalized once on insert and kept in one contiguous
+    float32 matrix that grows by doubling, so a query is a single
+    matrix-vector product plus an argpartition. `sync` only loads rows newer
+    than the last candidate_id it synced, which keeps refreshes incremental.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        super().__init__()
+        self.dim = None
+        self.size = 0
+        self._known_ids = set()
+        self._rows = {}  # candidate_id -> row in the matrix
+        self._capacity = initial_capacity
+        self._matrix = None
+        self._candidate_ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._job_ids = np.zeros(initial_capacity, dtype=np.int64)
+
+    def _grow(self, needed: int):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self.size] = self._matrix[:self.size]
+        self._matrix = matrix
+        self._candidate_ids = np.resize(self._candidate_ids, capacity)
+        self._job_ids = np.resize(self._job_ids, capacity)
+        self._capacity = capacity
+
+    def add_many(self, rows: List[Tuple[int, int, np.ndarray]]):
+        """Add (candidate_id, job_id, embedding) rows; zero or mismatched vectors are skipped"""
+        with self.lock:
+            for candidate_id, job_id, embedding in rows:
+                # A row can arrive both from create_candidate and from a concurrent sync
+                if candidate_id in self._known_ids:
+                    continue
+                self._known_ids.add(candidate_id)
+                vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+                if self.dim is None:
+                    self.dim = len(vector)
+                    self._matrix = np.zeros((self._capacity, self.dim), dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if len(vector) != self.dim or norm == 0:
+                    continue
+                self._grow(self.size + 1)
+                self._matrix[self.size] = vector / norm
+                self._candidate_ids[self.size] = candidate_id
+                self._job_ids[self.size] = job_id
+                self._rows[candidate_id] = self.size
+                self.size += 1
+
+    def add(self, candidate_id: int, job_id: int, embedding):
+        self.add_many([(candidate_id, job_id, embedding)])
+
+    def _rows_after(self, db, after_id: int):
+        return db.iter_candidate_embeddings(after_id=after_id)
+
+    def search(self, query, k: int = 10, job_id: Optional[int] = None,
+               candidate_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, int, float]]:
+        """Return up to k (candidate_id, job_id, score) tuples, best first.
+
+        Scores use the same 0-100 scale as MatchingEngine.calculate_match.
+        Pass `job_id` to restrict the search to one job's applicants, or
+        `candidate_ids` (e.g. a SkillIndex prefilter) to score only those rows.
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self.lock:
+            if self.size == 0 or len(query) != self.dim:
+                return []
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return []
+            if candidate_ids is None:
+                rows = slice(0, self.size)
+            else:
+                rows = np.fromiter((self._rows[cid] for cid in candidate_ids if cid in self._rows), dtype=np.int64)
+                rows.sort()
+            similarities = self._matrix[rows] @ (query / norm)
+            candidate_ids = self._candidate_ids[rows]
+            job_ids = self._job_ids[rows]
+
+        if job_id is not None:
+            mask = job_ids == job_id
+            similarities, candidate_ids, job_ids = similarities[mask], candidate_ids[mask], job_ids[mask]
+
+        k = min(k, len(similarities))
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        scores = np.clip(similarities[top] * 100, 0, 100)
+        return [(int(candidate_ids[i]), int(job_ids[i]), float(score)) for i, score in zip(top, scores)]
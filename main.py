@@ -1,19 +1,29 @@
 # main.py
 import streamlit as st
-import chardet
-import fitz  # PyMuPDF
-import pandas as pd
-import traceback
 from agents.jd_summarizer import JDSummarizer
 from agents.cv_parser import CVParser
 from agents.matching_engine import MatchingEngine
+from agents.reranker import CandidateReranker
 from database.db_handler import DBHandler
+from database.cache import EmbeddingCache, LLMResultCache
+from database.vector_index import CandidateIndex
+from database.skill_index import SkillIndex
 from agents.email_scheduler import EmailScheduler
+from services.job_catalog import JOB_EMBEDDING_CHUNKED, JobCatalog
+from services.pdf_extractor import content_hash
+from services.metrics import metrics, serve_metrics
+from services.outbox import OutboxWorker
+from services.work_queue import STAGES, ScreeningWorkerPool
 import logging
+import os
+import time
+import uuid
 
 # Filter out the specific RuntimeError warning from Streamlit's watcher
 logger = logging.getLogger('streamlit.watcher.local_sources_watcher')
 logger.setLevel(logging.ERROR)  # Only show errors, not warnings
+# How often one screening run restarts a worker pool whose processes have all exited
+MAX_WORKER_RESTARTS = 3
 # Configure page
 st.set_page_config(
     page_title="AI Recruitment System",
@@ -22,23 +32,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-def read_csv_with_encoding(file_path_or_buffer):
+def load_job_entries(catalog, file_path_or_buffer):
     try:
-        if hasattr(file_path_or_buffer, 'read'):
-            raw_data = file_path_or_buffer.read()
-            result = chardet.detect(raw_data)
-            file_path_or_buffer.seek(0)
-            return pd.read_csv(file_path_or_buffer, encoding=result['encoding'])
-        else:
-            with open(file_path_or_buffer, 'rb') as f:
-                result = chardet.detect(f.read())
-            return pd.read_csv(file_path_or_buffer, encoding=result['encoding'])
-    except UnicodeDecodeError:
-        try:
-            return pd.read_csv(file_path_or_buffer, encoding='latin1')
-        except Exception as e:
-            st.error(f"Failed to read file: {str(e)}")
-            st.stop()
+        return catalog.load(file_path_or_buffer)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    except Exception as e:
+        st.error(f"Failed to read file: {str(e)}")
+        st.stop()
 
 def handle_job_loading():
     if 'use_sample' not in st.session_state:
@@ -47,10 +49,9 @@ def handle_job_loading():
     st.session_state.use_sample = st.toggle("Use Sample Jobs", value=st.session_state.use_sample)
     
     if st.session_state.use_sample:
-        try:
-            return read_csv_with_encoding("jobs.csv")
-        except FileNotFoundError:
+        if not os.path.exists("jobs.csv"):
             st.error("Sample jobs.csv not found in project directory")
+            import pandas as pd
             sample_df = pd.DataFrame({
                 'Job Title': ['Software Engineer', 'Data Scientist', 'Product Manager'],
                 'Job Description': [
@@ -60,25 +61,13 @@ def handle_job_loading():
                 ]
             })
             sample_df.to_csv("jobs.csv", index=False)
-            return sample_df
+        return "jobs.csv"
     else:
         job_file = st.file_uploader("Upload Job Descriptions (CSV)", type=["csv"])
         if not job_file:
             st.info("Please upload a CSV file with job descriptions or toggle 'Use Sample Jobs'")
             st.stop()
-        return read_csv_with_encoding(job_file)
-
-def extract_text_from_pdf(uploaded_file):
-    try:
-        doc = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-        text = " ".join([page.get_text() for page in doc]).strip()
-        uploaded_file.seek(0)
-        return text
-    except Exception as e:
-        st.error(f"PDF Error: {str(e)}")
-        print(f"PDF extraction error: {traceback.format_exc()}")
-        return ""
-
+        return job_file
 
 
 @st.cache_resource
@@ -86,12 +75,54 @@ def load_models():
     try:
         with st.spinner("Loading language models..."):
             # No need to load SentenceTransformer anymore
-            matching_engine = MatchingEngine(model_name="nomic-embed-text")
-            return matching_engine, JDSummarizer(), CVParser(), matching_engine
+            matching_engine = MatchingEngine(model_name="nomic-embed-text", cache=EmbeddingCache())
+            llm_cache = LLMResultCache()
+            return matching_engine, JDSummarizer(cache=llm_cache), CVParser(cache=llm_cache), matching_engine
     except Exception as e:
         st.error(f"Model loading error: {str(e)}")
         st.stop()
 
+@st.cache_resource
+def load_job_catalog():
+    # Shared across sessions so each CSV is summarized and embedded once, in the background
+    matching_engine, jd_summarizer, _, _ = load_models()
+    return JobCatalog(DBHandler(), jd_summarizer, matching_engine)
+
+@st.cache_resource
+def load_reranker():
+    return CandidateReranker(cache=LLMResultCache())
+
+@st.cache_resource
+def load_worker_pool():
+    # Screening workers outlive reruns; run `python -m services.work_queue` for workers on other machines
+    return ScreeningWorkerPool(size=1).start()
+
+
+@st.cache_resource
+def start_metrics_server():
+    # Optional Prometheus scrape target, e.g. METRICS_PORT=9108
+    port = os.getenv("METRICS_PORT")
+    return serve_metrics(int(port)) if port else None
+
+
+@st.cache_resource
+def start_outbox_worker():
+    # One background sender per server; queued invites survive reruns and restarts
+    worker = OutboxWorker(DBHandler(), EmailScheduler(), min_interval=float(os.getenv("SMTP_MIN_INTERVAL", 1.0)))
+    worker.start()
+    return worker
+
+
+@st.cache_resource
+def load_candidate_index():
+    # Shared across reruns; DBHandler.attach_index only loads rows added since the last sync
+    return CandidateIndex()
+
+
+@st.cache_resource
+def load_skill_index():
+    return SkillIndex()
+
 
 def display_json_as_table(json_data, title=None):
     if title:
@@ -116,10 +147,43 @@ def display_json_as_table(json_data, title=None):
     else:
         st.json(json_data)
 
+SHORTLIST_THRESHOLD = 65
+SORT_LABELS = {"final": "Final score", "score": "Match score", "skill_match": "Skill match", "name": "Name"}
+DISPLAY_COLUMNS = ["name", "email", "score", "skill_match", "llm_score", "final_score", "rerank_reason", "filename"]
+
+
+def select_page(total, page_size, key):
+    """Page picker; returns the offset of the chosen page"""
+    pages = max(1, -(-total // page_size))
+    if pages == 1:
+        return 0
+    page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1, key=key)
+    return (int(page) - 1) * page_size
+
+
+def show_candidate_table(candidates):
+    if not candidates:
+        st.info("No candidates match")
+        return
+    import pandas as pd  # imported on first use; it is half of the app's cold start otherwise
+    candidates_df = pd.DataFrame(candidates)
+    for col in ['score', 'llm_score', 'final_score', 'skill_match']:
+        if col in candidates_df.columns:
+            candidates_df[col] = candidates_df[col].apply(lambda x: f"{x:.2f}%" if pd.notna(x) else "")
+    available_cols = [col for col in DISPLAY_COLUMNS if col in candidates_df.columns]
+    st.dataframe(candidates_df[available_cols], use_container_width=True)
+
+
 # Main App
 def main():
     st.title("AI Recruitment System 🚀")
+    start_metrics_server()
     db = DBHandler()
+    db.attach_index(load_candidate_index())
+    db.attach_skill_index(load_skill_index())
+    # Invites queued (or cut off mid-send) before a restart go out without waiting for the next send click
+    if db.outbox_backlog():
+        start_outbox_worker()
 
     with st.sidebar:
         st.subheader("About AI Recruiter")
@@ -137,121 +201,255 @@ def main():
             if "not set" in status:
                 st.code("EMAIL_USER=your-email@gmail.com\nEMAIL_PASSWORD=your-app-password")
 
+        st.subheader("Processing Settings")
+        num_workers = st.slider("Screening worker processes", min_value=1, max_value=16, value=4,
+                                help="Number of CVs extracted, parsed and embedded at the same time")
+        unfinished = db.unfinished_work_runs()
+        if unfinished and "screening_job" not in st.session_state:
+            resume = st.selectbox("Unfinished screening runs", unfinished,
+                                  format_func=lambda r: f"#{r['job_id']} {r['title']} ({r['remaining']} left)")
+            if st.button("Resume run"):
+                st.session_state["screening_job"] = resume["job_id"]
+                st.session_state["screening_run"] = resume["run_id"]
+        chunked = st.toggle("Chunked embeddings", value=False,
+                            help="Embed long CVs section by section and pool the vectors instead of "
+                                 "truncating them at the model's context window")
+        pooling = st.selectbox("Chunk pooling", ["mean", "max", "weighted"], disabled=not chunked)
+        use_rerank = st.toggle("LLM rerank of top candidates", value=False,
+                               help="Ask the LLM to judge the best embedding matches against the job summary")
+        if use_rerank:
+            rerank_top_n = st.number_input("Candidates to rerank", min_value=1, max_value=100, value=10)
+            rerank_tokens = st.number_input("Rerank token budget", min_value=1000, max_value=500000,
+                                            value=20000, step=1000)
+            rerank_seconds = st.number_input("Rerank time budget (seconds)", min_value=5, max_value=1800, value=120)
+
+        st.subheader("Diagnostics")
+        metrics.enabled = st.toggle("Collect metrics", value=metrics.enabled)
+        if st.checkbox("Show Diagnostics"):
+            # Screening workers are separate processes; they report their metrics through the database
+            combined = db.worker_metrics()
+            combined.merge(metrics.snapshot())
+            snapshot = combined.snapshot()
+            if snapshot["timers"]:
+                st.dataframe([{k: v for k, v in timer.items() if k != "buckets"} for timer in snapshot["timers"]],
+                             use_container_width=True)
+            if snapshot["counters"]:
+                st.dataframe(snapshot["counters"], use_container_width=True)
+            st.download_button("Download metrics (JSON)", combined.to_json(), file_name="metrics.json")
+            st.download_button("Download metrics (Prometheus)", combined.to_prometheus(), file_name="metrics.prom")
+            if st.button("Reset metrics"):
+                metrics.reset()
+                db.clear_worker_metrics()
+            st.caption("Includes the screening workers' metrics. The toggle above and the METRICS_PORT endpoint "
+                       "cover this process only.")
+
     # Job Uploading
     try:
-        job_df = handle_job_loading()
+        job_source = handle_job_loading()
     except Exception as e:
         st.error(f"Job Loading Error: {str(e)}")
         st.stop()
 
-    if 'Job Title' not in job_df.columns or 'Job Description' not in job_df.columns:
-        st.error("CSV must contain 'Job Title' and 'Job Description' columns")
+    catalog = load_job_catalog()
+    job_entries = load_job_entries(catalog, job_source)
+    # First row wins when a title appears more than once
+    entries_by_title = {}
+    for entry in job_entries:
+        entries_by_title.setdefault(entry["title"], entry)
+    if not entries_by_title:
+        st.error("No jobs found in the CSV")
         st.stop()
 
-    selected_job = st.selectbox("Select Job Title", job_df['Job Title'].unique())
-    selected_jd = job_df[job_df['Job Title'] == selected_job].iloc[0]['Job Description']
+    selected_job = st.selectbox("Select Job Title", list(entries_by_title))
+    selected_entry = entries_by_title[selected_job]
+    selected_jd = selected_entry["description"]
+    ready, total = catalog.progress(job_entries)
+    if ready < total:
+        st.caption(f"Preparing job summaries in the background: {ready}/{total} ready")
 
     with st.expander("Show Full Job Description"):
         st.write(selected_jd)
 
+    if st.checkbox("Search Stored Candidates"):
+        top_k = st.slider("Number of candidates", min_value=1, max_value=50, value=10)
+        known_skills = [term for term, _ in db.skill_index.vocabulary(limit=500)]
+        must_have = st.multiselect("Must-have skills", known_skills,
+                                   help="Only candidates with all of these skills are scored")
+        nice_to_have = st.multiselect("Nice-to-have skills", known_skills)
+        skill_weight = st.slider("Skill weight", min_value=0.0, max_value=1.0, value=0.3, step=0.05,
+                                 help="Share of the score that comes from skill coverage instead of embeddings",
+                                 disabled=not (must_have or nice_to_have))
+        matching_engine, _, _, _ = load_models()
+        # The engine is shared by every session, so this session's mode goes with the call
+        query_embedding = matching_engine.get_embedding(selected_jd, chunked=chunked, pooling=pooling)
+        matches = db.search_candidates(query_embedding, k=top_k, must_have=must_have,
+                                       skills=nice_to_have, skill_weight=skill_weight)
+        if matches:
+            best = db.best_chunks([m["document_id"] for m in matches if m.get("document_id")], query_embedding)
+            for m in matches:
+                if m.get("document_id") in best:
+                    m["best_section"] = best[m["document_id"]]["section"]
+            import pandas as pd
+            matches_df = pd.DataFrame(matches)
+            matches_df['score'] = matches_df['score'].apply(lambda x: f"{x:.2f}%")
+            if 'matched_skills' in matches_df.columns:
+                matches_df['matched_skills'] = matches_df['matched_skills'].apply(", ".join)
+            search_cols = [col for col in ["name", "email", "applied_for", "score", "matched_skills", "best_section"]
+                           if col in matches_df.columns]
+            st.dataframe(matches_df[search_cols], use_container_width=True)
+        else:
+            st.info("No stored candidates yet")
+
     uploaded_files = st.file_uploader("Upload Candidate CVs (PDF)", type=["pdf"], accept_multiple_files=True)
     process_btn = st.button("Process Applications", type="primary", disabled=len(uploaded_files) == 0)
 
     if process_btn:
-        matching_engine, jd_summarizer, cv_parser, _ = load_models()
-
-        jd_summary = jd_summarizer.summarize(selected_jd)
+        job = catalog.job(selected_entry["source_key"])
+        if job is not None:
+            jd_summary, job_id = job["summary"], job["job_id"]
+        else:
+            # The LLM could not summarize this job; screen against placeholder data without caching it
+            matching_engine, jd_summarizer, _, _ = load_models()
+            jd_summary = jd_summarizer.summarize(selected_jd)
+            job_id = db.create_job(
+                title=selected_job,
+                raw_description=selected_jd,
+                summary=jd_summary,
+                embedding=matching_engine.get_embedding(selected_jd, chunked=JOB_EMBEDDING_CHUNKED)
+            )
         display_json_as_table(jd_summary, "Job Summary")
-        jd_embedding = matching_engine.get_embedding(selected_jd)
-        job_id = db.create_job(
-            title=selected_job,
-            raw_description=selected_jd,
-            summary=jd_summary,
-            embedding=jd_embedding
-        )
-
-        candidates = []
-        progress_bar = st.progress(0, text="Processing CVs...")
-
-        for i, file in enumerate(uploaded_files):
-            progress_bar.progress(i / len(uploaded_files), text=f"Processing ({i+1}/{len(uploaded_files)})")
-            cv_text = extract_text_from_pdf(file)
-            if not cv_text:
+
+        files, seen_hashes = [], {}
+        for file in uploaded_files:
+            data = file.getvalue()
+            digest = content_hash(data)
+            if digest in seen_hashes:
+                st.info(f"Skipping {file.name}: identical to {seen_hashes[digest]}")
                 continue
-            cv_data = cv_parser.parse(cv_text)
-            cv_embedding = matching_engine.get_embedding(cv_text)
-            score = matching_engine.calculate_match(jd_embedding, cv_embedding)
-            candidate_id = db.create_candidate(
-                job_id=job_id,
-                cv_text=cv_text,
-                cv_data=cv_data,
-                embedding=cv_embedding,
-                score=score
-            )
-            candidates.append({**cv_data, "score": score, "id": candidate_id, "filename": file.name})
+            seen_hashes[digest] = file.name
+            files.append((file.name, data))
+        # Worker processes do the extraction, parsing, embedding and scoring; progress lives in
+        # SQLite, so a dropped session or a crashed worker does not lose finished stages
+        run_id = uuid.uuid4().hex
+        db.enqueue_work(job_id, files, {"chunked": chunked, "pooling": pooling}, run_id=run_id)
+        st.session_state["screening_job"] = job_id
+        st.session_state["screening_run"] = run_id
+
+    screening_job = st.session_state.get("screening_job")
+    screening_run = st.session_state.get("screening_run")
+    if screening_job is not None:
+        workers = load_worker_pool().resize(num_workers)
+        progress_bar = st.progress(0.0, text="Waiting for screening workers...")
+        restarts = 0
+        while True:
+            progress = db.work_progress(screening_job, screening_run)
+            stages = ", ".join(f"{progress['stage'][stage]} {stage}" for stage in STAGES if stage in progress["stage"])
+            progress_bar.progress(progress["finished"] / max(progress["total"], 1),
+                                  text=f"Processing ({progress['finished']}/{progress['total']}) - {stages} - "
+                                       f"{workers.alive()} worker(s)")
+            if progress["finished"] >= progress["total"]:
+                break
+            if workers.alive() == 0:
+                # Workers that die as soon as they start (a broken install, say) would leave this loop waiting forever
+                if restarts >= MAX_WORKER_RESTARTS:
+                    st.session_state.pop("screening_job", None)
+                    st.session_state.pop("screening_run", None)
+                    st.error("Screening workers keep exiting; see the server log. The remaining CVs stay queued "
+                             "and the run can be resumed from the sidebar.")
+                    st.stop()
+                restarts += 1
+                workers.start()
+            time.sleep(1.0)
+
+        job = db.get_job(screening_job)
+        jd_summary = job["summary"]
+        for item in db.work_results(screening_job, screening_run, status="failed"):
+            st.error(f"{item['filename']}: {item['error']}")
+        candidate_ids = [item["candidate_id"] for item in db.work_results(screening_job, screening_run, status="done")]
+
+        required_skills = jd_summary.get("required_skills")
+        if isinstance(required_skills, list) and required_skills and candidate_ids:
+            db.skill_index.sync(db)
+            coverage = db.skill_index.coverage(required_skills, candidate_ids)
+            db.update_candidate_scores([{"id": cid, "skill_match": coverage[cid][0]} for cid in candidate_ids])
 
         progress_bar.progress(1.0, text="Processing complete!")
 
-        # Store in session state for persistence
-        st.session_state["candidates"] = candidates
-        st.session_state["selected_job"] = selected_job
+        if use_rerank and candidate_ids:
+            # The reranker is shared by every session, so this session's budgets go with the call
+            reranker = load_reranker()
+            head = db.list_candidates(screening_job, screening_run, sort="score", limit=rerank_top_n)
+            with st.spinner(f"Reranking the top {len(head)} candidates..."):
+                reranked = reranker.rerank(jd_summary, head, top_n=rerank_top_n, token_budget=rerank_tokens,
+                                           time_budget=rerank_seconds)
+            db.update_candidate_scores([c for c in reranked if "llm_score" in c])
 
-        # Prepare shortlist
-        shortlisted = [c for c in candidates if c["score"] >= 65]
-        st.session_state["shortlisted"] = shortlisted
+        # Only the run's keys live in session state; every view below pages through the database
+        st.session_state["results"] = {"job_id": screening_job, "run_id": screening_run, "title": job["title"]}
+        del st.session_state["screening_job"]
+        st.session_state.pop("screening_run", None)
 
-    # Show results if candidates are available
-    if "candidates" in st.session_state and st.session_state["candidates"]:
-        candidates = st.session_state["candidates"]
+    results = st.session_state.get("results")
+    if results and db.count_candidates(results["job_id"], results["run_id"]):
+        job_id, run_id = results["job_id"], results["run_id"]
 
         st.header("Candidate Rankings")
-        candidates_df = pd.DataFrame(candidates).sort_values("score", ascending=False)
-        if 'score' in candidates_df.columns:
-            candidates_df['score'] = candidates_df['score'].apply(lambda x: f"{x:.2f}%")
-        display_cols = ["name", "email", "score", "filename"]
-        available_cols = [col for col in display_cols if col in candidates_df.columns]
-        st.dataframe(candidates_df[available_cols], use_container_width=True)
-
-        if st.checkbox("Show Detailed Profiles"):
-            for candidate in candidates:
-                with st.expander(f"{candidate.get('name', 'Unknown')} - {candidate.get('filename', '')}"):
-                    display_data = {k: v for k, v in candidate.items() if k not in ['id', 'filename', 'score']}
+        col1, col2, col3 = st.columns([2, 3, 1])
+        sort = col1.selectbox("Sort by", list(SORT_LABELS), format_func=SORT_LABELS.get)
+        query = col2.text_input("Filter by name or email")
+        page_size = col3.selectbox("Rows per page", [10, 25, 50, 100], index=1)
+        total = db.count_candidates(job_id, run_id, query=query)
+        offset = select_page(total, page_size, "rankings_page")
+        page = db.list_candidates(job_id, run_id, query=query, sort=sort, limit=page_size, offset=offset)
+        show_candidate_table(page)
+        st.caption(f"Showing {offset + 1 if page else 0}-{offset + len(page)} of {total}")
+
+        if page and st.checkbox("Show Detailed Profiles"):
+            best = db.best_chunks([c["document_id"] for c in page], db.get_job(job_id)["embedding"])
+            for candidate in page:
+                with st.expander(f"{candidate.get('name', 'Unknown')} - {candidate.get('filename') or ''}"):
+                    display_data = {k: v for k, v in candidate.items()
+                                    if k not in ['id', 'filename', 'score', 'llm_score', 'final_score', 'skill_match',
+                                                 'rerank_reason', 'document_id']}
                     st.markdown(f"**Match Score**: {float(candidate.get('score', 0)):.2f}%")
+                    best_section = best.get(candidate["document_id"])
+                    if best_section:
+                        st.markdown(f"**Best Matching Section**: {best_section['section'].title()} "
+                                    f"({best_section['score']:.2f}%)")
+                        st.caption(best_section["text"][:600])
                     display_json_as_table(display_data)
 
-        shortlisted = st.session_state.get("shortlisted", [])
-        if shortlisted:
-            st.success(f"✅ Shortlisted {len(shortlisted)} candidates")
+        shortlist_total = db.count_candidates(job_id, run_id, min_score=SHORTLIST_THRESHOLD)
+        if shortlist_total:
+            st.success(f"✅ Shortlisted {shortlist_total} candidates")
             st.subheader("Shortlisted Candidates")
-            shortlisted_df = pd.DataFrame(shortlisted)
-            if 'score' in shortlisted_df.columns:
-                shortlisted_df['score'] = shortlisted_df['score'].apply(lambda x: f"{x:.2f}%")
-            st.dataframe(shortlisted_df[available_cols], use_container_width=True)
+            offset = select_page(shortlist_total, page_size, "shortlist_page")
+            show_candidate_table(db.list_candidates(job_id, run_id, min_score=SHORTLIST_THRESHOLD,
+                                                    limit=page_size, offset=offset))
 
     # Email Button Section
     if st.button("Send Interview Invites"):
         scheduler = EmailScheduler()
         status = scheduler.test_email_connection()
 
-        shortlisted = st.session_state.get("shortlisted", [])
-        selected_job = st.session_state.get("selected_job", "Job")
+        results = st.session_state.get("results")
+        shortlisted = db.list_candidates(results["job_id"], results["run_id"], min_score=SHORTLIST_THRESHOLD,
+                                         limit=None) if results else []
+        selected_job = results["title"] if results else "Job"
 
         if not shortlisted:
             st.warning("No shortlisted candidates found. Please process applications first.")
         elif "successful" in status:
-            for candidate in shortlisted:
-                email = candidate.get("email", "unknown@example.com")
-                name = candidate.get("name", "Candidate")
-
-                success, message = scheduler.send_interview_invite(email, name, selected_job)
-                if success:
-                    db.create_email(
-                        candidate_id=candidate["id"],
-                        content=f"Interview invite sent for {selected_job}"
-                    )
-                    st.success(f"Email sent to {name} at {email}")
-                else:
-                    st.error(f"Failed to send email to {email}: {message}")
+            # Queue everything at once; the background worker sends over a single connection
+            db.enqueue_emails([
+                {"candidate_id": candidate["id"],
+                 **scheduler.build_invite(candidate.get("email", "unknown@example.com"),
+                                          candidate.get("name", "Candidate"), selected_job)}
+                for candidate in shortlisted
+            ])
+            start_outbox_worker().notify()
+            st.session_state["invited_ids"] = [candidate["id"] for candidate in shortlisted]
+            st.success(f"Queued {len(shortlisted)} interview invites")
         else:
             # Simulation mode
             st.warning("Email credentials not configured. Running in simulation mode.")
@@ -261,6 +459,16 @@ def main():
                 name = candidate.get("name", "Candidate")
                 st.markdown(f"- {name}: {email}")
 
+    invited_ids = st.session_state.get("invited_ids")
+    if invited_ids:
+        st.subheader("Invite Delivery")
+        outbox = db.outbox_status(invited_ids)
+        if outbox:
+            st.dataframe(outbox, column_order=["to_email", "status", "attempts", "last_error", "sent_at"],
+                         use_container_width=True)
+        if st.button("Refresh Delivery Status"):
+            st.rerun()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,77 @@
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+import chardet
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Bytes handed to chardet; detection cost no longer grows with the file
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+
+def _read_sample(file_path_or_buffer, size: int) -> bytes:
+    if hasattr(file_path_or_buffer, 'read'):
+        position = file_path_or_buffer.tell()
+        sample = file_path_or_buffer.read(size)
+        file_path_or_buffer.seek(position)
+        return sample
+    with open(file_path_or_buffer, 'rb') as f:
+        return f.read(size)
+
+
+def detect_encoding(file_path_or_buffer, sample_size: int = ENCODING_SAMPLE_BYTES) -> str:
+    """Guess the encoding from the first `sample_size` bytes of a path or binary file-like object"""
+    encoding = chardet.detect(_read_sample(file_path_or_buffer, sample_size))['encoding'] or 'utf-8'
+    # A pure-ASCII sample says nothing about the rest of the file; UTF-8 is the safe superset
+    return 'utf-8' if encoding.lower() == 'ascii' else encoding
+
+
+def _rewind(file_path_or_buffer, position):
+    if position is not None:
+        file_path_or_buffer.seek(position)
+
+
+def iter_csv_chunks(file_path_or_buffer, chunksize: int = 1000, usecols: Optional[List[str]] = None,
+                    encoding: Optional[str] = None) -> Iterator["pd.DataFrame"]:
+    """Stream a CSV as DataFrames of at most `chunksize` rows, detecting its encoding from a sample.
+
+    If the detected encoding fails part-way through, reading restarts as
+    latin1 and skips the rows that were already yielded.
+    """
+    import pandas as pd  # ~0.5 s to import, so only once a CSV is actually read
+
+    position = file_path_or_buffer.tell() if hasattr(file_path_or_buffer, 'seek') else None
+    encoding = encoding or detect_encoding(file_path_or_buffer)
+    yielded = 0
+    try:
+        with pd.read_csv(file_path_or_buffer, encoding=encoding, chunksize=chunksize, usecols=usecols) as reader:
+            for chunk in reader:
+                yielded += len(chunk)
+                yield chunk
+        return
+    except UnicodeDecodeError:
+        if encoding.lower() == 'latin1':
+            raise
+    _rewind(file_path_or_buffer, position)
+    with pd.read_csv(file_path_or_buffer, encoding='latin1', chunksize=chunksize, usecols=usecols) as reader:
+        for chunk in reader:
+            # Rows are counted rather than skipped with `skiprows` so quoted multi-line fields stay intact
+            if yielded >= len(chunk):
+                yielded -= len(chunk)
+                continue
+            yield chunk.iloc[yielded:]
+            yielded = 0
+
+
+def read_csv_with_encoding(file_path_or_buffer) -> "pd.DataFrame":
+    """Read a jobs CSV from a path or file-like object, detecting its encoding.
+
+    Falls back to latin1 when the detected encoding cannot decode the file.
+    Errors are raised to the caller rather than reported to the UI.
+    """
+    import pandas as pd
+
+    chunks = list(iter_csv_chunks(file_path_or_buffer, chunksize=10000))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
@@ -0,0 +1,157 @@
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from services.csv_loader import iter_csv_chunks
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TITLE_COLUMN = "Job Title"
+DESCRIPTION_COLUMN = "Job Description"
+# Stored job vectors are shared by every screening run, whatever mode it embeds CVs in,
+# so they are always made the same way: whole descriptions, cut to the input budget
+JOB_EMBEDDING_CHUNKED = False
+
+
+def source_hash(file_path_or_buffer, chunk_size: int = 1 << 20) -> str:
+    """sha256 of a CSV given as a path or binary file-like object, read in chunks"""
+    digest = hashlib.sha256()
+    if hasattr(file_path_or_buffer, "read"):
+        position = file_path_or_buffer.tell()
+        for chunk in iter(lambda: file_path_or_buffer.read(chunk_size), b""):
+            digest.update(chunk)
+        file_path_or_buffer.seek(position)
+    else:
+        with open(file_path_or_buffer, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JobCatalog:
+    """Jobs from CSV files, with summaries and embeddings precomputed into the `jobs` table.
+
+    Each CSV row is keyed by "<file sha256>:<row number>", so loading the
+    same file again (or after a restart) finds the stored jobs instead of
+    summarizing them again. Missing jobs are summarized and embedded by one
+    background thread per file; `job()` computes a job on the spot if the
+    user picks it before the thread gets there. Embeddings are made with
+    JOB_EMBEDDING_CHUNKED, and the engine's description of that mode is
+    stored with each job.
+    """
+
+    def __init__(self, db, jd_summarizer, matching_engine, batch_size: int = 16, chunksize: int = 1000):
+        self.db = db
+        self.jd_summarizer = jd_summarizer
+        self.matching_engine = matching_engine
+        self.batch_size = batch_size
+        self.chunksize = chunksize
+        self.lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}  # source_key -> {source_key, title, description, job_id}
+        self._files: Dict[str, List[str]] = {}  # file hash -> source keys in row order
+        self._threads: Dict[str, threading.Thread] = {}
+
+    def load(self, file_path_or_buffer, background: bool = True) -> List[dict]:
+        """Read a jobs CSV (streamed in chunks) and start precomputing its jobs; returns its entries in row order"""
+        digest = source_hash(file_path_or_buffer)
+        with self.lock:
+            known = self._files.get(digest)
+        if known is None:
+            entries = []
+            for chunk in iter_csv_chunks(file_path_or_buffer, chunksize=self.chunksize):
+                missing = {TITLE_COLUMN, DESCRIPTION_COLUMN} - set(chunk.columns)
+                if missing:
+                    raise ValueError(f"CSV must contain '{TITLE_COLUMN}' and '{DESCRIPTION_COLUMN}' columns")
+                for row, title, description in zip(chunk.index, chunk[TITLE_COLUMN], chunk[DESCRIPTION_COLUMN]):
+                    if isinstance(title, str) and isinstance(description, str) and description.strip():
+                        entries.append({"source_key": f"{digest}:{row}", "title": title,
+                                        "description": description, "job_id": None})
+            stored = self.db.jobs_by_source_keys([e["source_key"] for e in entries])
+            for entry in entries:
+                entry["job_id"] = stored.get(entry["source_key"])
+            metrics.incr("job_catalog_rows_total", len(entries))
+            metrics.incr("job_catalog_rows_stored_total", len(stored))
+            with self.lock:
+                self._entries.update((e["source_key"], e) for e in entries)
+                known = self._files[digest] = [e["source_key"] for e in entries]
+        if background:
+            self._start(digest)
+        with self.lock:
+            return [dict(self._entries[key]) for key in known]
+
+    def progress(self, entries: List[dict]) -> tuple:
+        """(ready, total) for a list of entries returned by load()"""
+        with self.lock:
+            ready = sum(self._entries[e["source_key"]]["job_id"] is not None for e in entries)
+        return ready, len(entries)
+
+    def prepare(self, entries: List[dict]):
+        """Summarize and embed the given entries now, in batches, skipping those already stored"""
+        with self.lock:
+            pending = [dict(self._entries[e["source_key"]]) for e in entries
+                       if self._entries[e["source_key"]]["job_id"] is None]
+        for start in range(0, len(pending), self.batch_size):
+            self._precompute(pending[start:start + self.batch_size])
+
+    def job(self, source_key: str) -> Optional[dict]:
+        """The stored job (job_id, title, summary, embedding) for an entry, computing it now if needed"""
+        with self.lock:
+            entry = dict(self._entries[source_key])
+        if entry["job_id"] is None:
+            self._precompute([entry])
+            with self.lock:
+                entry = dict(self._entries[source_key])
+        if entry["job_id"] is None:
+            return None
+        metrics.incr("job_catalog_lookups_total")
+        return self.db.get_job(entry["job_id"])
+
+    def _start(self, digest: str):
+        with self.lock:
+            thread = self._threads.get(digest)
+            if thread is not None and thread.is_alive():
+                return
+            pending = [self._entries[key] for key in self._files[digest] if self._entries[key]["job_id"] is None]
+            if not pending:
+                return
+            thread = threading.Thread(target=self._run, args=(digest,), name=f"job-catalog-{digest[:8]}",
+                                      daemon=True)
+            self._threads[digest] = thread
+        logger.info(f"Precomputing {len(pending)} job(s) in the background")
+        thread.start()
+
+    def _run(self, digest: str):
+        with self.lock:
+            keys = list(self._files[digest])
+        for start in range(0, len(keys), self.batch_size):
+            with self.lock:
+                batch = [dict(self._entries[key]) for key in keys[start:start + self.batch_size]
+                         if self._entries[key]["job_id"] is None]
+            try:
+                self._precompute(batch)
+            except Exception as e:
+                logger.error(f"Job catalog precompute error: {str(e)}")
+
+    def _precompute(self, entries: List[dict]):
+        """Summarize and embed entries and store them; jobs whose summary failed are retried on the next load"""
+        if not entries:
+            return
+        with metrics.timer("job_catalog_precompute_seconds"):
+            embeddings = self.matching_engine.get_embeddings([e["description"] for e in entries],
+                                                             chunked=JOB_EMBEDDING_CHUNKED)
+            embedding_config = self.matching_engine.embedding_config(chunked=JOB_EMBEDDING_CHUNKED)
+            jobs = []
+            for entry, embedding in zip(entries, embeddings):
+                summary = self.jd_summarizer.try_summarize(entry["description"])
+                if summary is None:
+                    metrics.incr("job_catalog_failures_total")
+                    continue
+                jobs.append({"title": entry["title"], "raw_description": entry["description"], "summary": summary,
+                             "embedding": embedding, "embedding_config": embedding_config,
+                             "source_key": entry["source_key"]})
+            stored = self.db.save_catalog_jobs(jobs)
+        with self.lock:
+            for source_key, job_id in stored.items():
+                self._entries[source_key]["job_id"] = job_id
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL_TIMER = nullcontext()
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * bucket_count
+
+
+class Metrics:
+    """Process-wide counters and latency histograms, exportable as JSON or Prometheus text.
+
+    Metric names follow Prometheus conventions (`*_total` for counters,
+    `*_seconds` for timers). Labels are passed as keyword arguments. When
+    `enabled` is False every call returns immediately. Snapshots taken in
+    other processes (screening workers) can be added with `merge`.
+    """
+
+    def __init__(self, enabled: bool = True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._histograms: Dict[Tuple[str, tuple], _Histogram] = {}
+
+    def incr(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets))
+            histogram.count += 1
+            histogram.total += seconds
+            histogram.max = max(histogram.max, seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram.buckets[i] += 1
+                    break
+
+    def timer(self, name: str, **labels):
+        """Context manager recording the duration of its block under `name`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(name, labels)
+
+    @contextmanager
+    def _timer(self, name: str, labels: dict):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def drain(self) -> dict:
+        """Snapshot and reset in one step, so nothing recorded in between is lost"""
+        with self._lock:
+            snapshot = self._snapshot()
+            self._counters.clear()
+            self._histograms.clear()
+        return snapshot
+
+    def merge(self, snapshot: dict):
+        """Add a snapshot (e.g. from another process) to this registry, even when disabled"""
+        with self._lock:
+            for counter in snapshot.get("counters", []):
+                key = (counter["name"], tuple(sorted(counter["labels"].items())))
+                self._counters[key] = self._counters.get(key, 0) + counter["value"]
+            for timer in snapshot.get("timers", []):
+                key = (timer["name"], tuple(sorted(timer["labels"].items())))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = _Histogram(len(self.buckets))
+                histogram.count += timer["count"]
+                histogram.total += timer["sum"]
+                histogram.max = max(histogram.max, timer["max"])
+                if len(timer.get("buckets", ())) == len(self.buckets):
+                    histogram.buckets = [a + b for a, b in zip(histogram.buckets, timer["buckets"])]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(self._counters.items())
+        ]
+        timers = [
+            {"name": name, "labels": dict(labels), "count": h.count, "sum": h.total, "max": h.max,
+             "mean": h.total / h.count if h.count else 0.0, "buckets": list(h.buckets)}
+            for (name, labels), h in sorted(self._histograms.items())
+        ]
+        return {"counters": counters, "timers": timers}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        def label_str(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                lines.append(f"{name}{label_str(labels)} {value}")
+            for (name, labels), h in sorted(self._histograms.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                cumulative = 0
+                for bound, count in zip(self.buckets, h.buckets):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{label_str(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{label_str(labels, [('le', '+Inf')])} {h.count}")
+                lines.append(f"{name}_sum{label_str(labels)} {h.total}")
+                lines.append(f"{name}_count{label_str(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry; set RECRUITER_METRICS=0 to turn instrumentation off
+metrics = Metrics(enabled=os.getenv("RECRUITER_METRICS", "1") != "0")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = metrics.to_json(), "application/json"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def record_llm_call(agent: str, generation_info: dict):
+    """Count one LLM generation and the prompt/completion tokens Ollama reported for it"""
+    info = generation_info or {}
+    metrics.incr("llm_calls_total", agent=agent)
+    metrics.incr("llm_prompt_tokens_total", info.get("prompt_eval_count") or 0, agent=agent)
+    metrics.incr("llm_completion_tokens_total", info.get("eval_count") or 0, agent=agent)
+    if info.get("done_reason") == "length":
+        # Cut off by num_predict; the JSON is probably incomplete
+        metrics.incr("llm_truncated_total", agent=agent)
@@ -0,0 +1,385 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics import metrics
+from services.text_preprocessing import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Worth retrying: the server is overloaded, restarting or loading a model
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class OllamaError(Exception):
+    """Raised when an Ollama request fails after all retries"""
+
+
+class OllamaDeadlineExceeded(OllamaError):
+    """Raised when a streamed answer is still incomplete at the caller's deadline"""
+
+
+class JSONObjectScanner:
+    """Track brace depth over streamed text to spot the end of each top-level JSON object.
+
+    Braces inside strings (including escaped quotes) are ignored; `feed`
+    returns the (start, end) offsets, in all text fed so far, of every
+    object completed by the new piece.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.start = None
+        self.length = 0
+
+    def feed(self, text: str) -> List[tuple]:
+        completed = []
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif self.depth == 0:
+                if ch == "{":
+                    self.depth, self.start = 1, self.length + i
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    completed.append((self.start, self.length + i + 1))
+        self.length += len(text)
+        return completed
+
+
+class _JSONStream:
+    """Consume /api/generate NDJSON lines until the response holds a complete, valid JSON object"""
+
+    def __init__(self):
+        self.scanner = JSONObjectScanner()
+        self.pieces = []
+        self.chunks = 0
+        self.parsed = None
+        self.final = {}
+
+    def feed_line(self, line) -> bool:
+        """Process one line; True once there is nothing more worth reading"""
+        if not line:
+            return False
+        chunk = json.loads(line)
+        if chunk.get("error"):
+            raise OllamaError(f"Ollama generation failed: {chunk['error']}")
+        piece = chunk.get("response", "")
+        if piece:
+            self.pieces.append(piece)
+            self.chunks += 1
+            for start, end in self.scanner.feed(piece):
+                try:
+                    self.parsed = json.loads("".join(self.pieces)[start:end])
+                    return True
+                except ValueError:
+                    continue
+        if chunk.get("done"):
+            self.final = chunk
+            return True
+        return False
+
+    def result(self) -> dict:
+        stopped_early = not self.final
+        if stopped_early:
+            metrics.incr("ollama_streams_stopped_early_total")
+        return {
+            **self.final,
+            "response": "".join(self.pieces),
+            "parsed": self.parsed,
+            # Ollama streams one token per chunk; its own count only arrives with the final chunk
+            "eval_count": self.final.get("eval_count") or self.chunks,
+            "done_reason": self.final.get("done_reason", "stopped"),
+            "stopped_early": stopped_early,
+        }
+
+
+class OllamaClient:
+    """Shared HTTP client for the Ollama API.
+
+    One keep-alive connection pool serves every agent. A concurrency limit
+    caps in-flight requests, which keeps large fan-outs from exhausting
+    sockets. Failed requests are retried up to `max_retries` times with
+    jittered exponential backoff. The `a*` methods are the asyncio
+    equivalents, built on httpx, with one connection pool and limiter per
+    event loop.
+    """
+
+    def __init__(self, base_url: str = None, connect_timeout: float = 5.0, read_timeout: float = 300.0,
+                 max_concurrency: int = 16, max_retries: int = 2, backoff: float = 0.5, max_backoff: float = 10.0):
+        self.base_url = (base_url or os.getenv("OLLAMA_HOST", "http://localhost:11434")).rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._limiter = threading.BoundedSemaphore(max_concurrency)
+
+        self._async_lock = threading.Lock()
+        self._async_state = {}  # event loop -> (httpx.AsyncClient, asyncio.Semaphore)
+
+    def _retry_delay(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from many workers instead of synchronising them
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def post(self, path: str, payload: dict, timeout: Optional[float] = None, retries: Optional[int] = None) -> dict:
+        """POST JSON to `path` and return the decoded response, retrying transient failures"""
+        url = f"{self.base_url}{path}"
+        timeout = (self.connect_timeout, timeout or self.read_timeout)
+
+        def send():
+            with self._limiter, metrics.timer("ollama_request_seconds", path=path):
+                response = self.session.post(url, json=payload, timeout=timeout)
+            _check_status(response, path)
+            return response.json()
+
+        return self._with_retries(path, send, retries)
+
+    def _stream_json(self, path: str, payload: dict, timeout: Optional[float] = None,
+                     retries: Optional[int] = None, deadline: Optional[float] = None) -> dict:
+        url = f"{self.base_url}{path}"
+        timeout = (self.connect_timeout, timeout or self.read_timeout)
+
+        def send():
+            stream = _JSONStream()
+            with self._limiter, metrics.timer("ollama_request_seconds", path=path):
+                _check_deadline(deadline, path)
+                # Leaving the block early closes the connection, which makes Ollama stop generating
+                with self.session.post(url, json=payload, timeout=timeout, stream=True) as response:
+                    _check_status(response, path)
+                    for line in response.iter_lines():
+                        if stream.feed_line(line):
+                            break
+                        _check_deadline(deadline, path)
+            return stream.result()
+
+        return self._with_retries(path, send, retries)
+
+    def _with_retries(self, path: str, send, retries: Optional[int] = None):
+        """Call `send`, retrying transient failures `retries` times (None: the client's max_retries; 0: never)"""
+        attempts = 1 + (self.max_retries if retries is None else retries)
+        last_error = None
+        for attempt in range(attempts):
+            try:
+                return send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError, requests.exceptions.HTTPError) as e:
+                status = getattr(e.response, "status_code", None) if isinstance(e, requests.exceptions.HTTPError) else None
+                if status is not None and status not in RETRY_STATUS_CODES:
+                    raise OllamaError(f"Ollama request to {path} failed: {str(e)}") from e
+                last_error = e
+                logger.warning(f"Ollama request to {path} failed (attempt {attempt+1}/{attempts}): {str(e)}")
+                if attempt < attempts - 1:
+                    metrics.incr("ollama_retries_total", path=path)
+                    time.sleep(self._retry_delay(attempt))
+            except ValueError as e:
+                raise OllamaError(f"Ollama returned invalid JSON for {path}: {str(e)}") from e
+        metrics.incr("ollama_failures_total", path=path)
+        raise OllamaError(f"Ollama request to {path} failed after {attempts} attempts: {str(last_error)}")
+
+    def generate(self, model: str, prompt: str, options: dict = None, format=None, timeout: float = None,
+                 retries: int = None) -> dict:
+        """Non-streaming /api/generate; the result has `response`, `eval_count` and `prompt_eval_count`"""
+        return self.post("/api/generate", _generate_payload(model, prompt, options, format), timeout=timeout,
+                         retries=retries)
+
+    def generate_json(self, model: str, prompt: str, schema: dict = None, options: dict = None,
+                      timeout: float = None, retries: int = None, deadline: float = None) -> dict:
+        """Streaming /api/generate constrained to a JSON `schema` (any JSON object when None).
+
+        Reading stops as soon as the text holds one complete, valid object,
+        so trailing whitespace some models pad constrained output with is
+        never generated. Besides generate's fields the result has `parsed`
+        (the object, or None if none arrived) and `stopped_early`; when
+        stopped early, eval_count is the number of chunks received and
+        prompt_eval_count is estimated from the prompt.
+
+        `timeout` only bounds each read, so a slow but steady stream can run
+        past it; `deadline` (a time.monotonic() value) is checked after every
+        chunk and raises OllamaDeadlineExceeded once passed.
+        """
+        payload = {**_generate_payload(model, prompt, options, schema or "json"), "stream": True}
+        result = self._stream_json("/api/generate", payload, timeout=timeout, retries=retries, deadline=deadline)
+        result.setdefault("prompt_eval_count", estimate_tokens(prompt))
+        return result
+
+    def embeddings(self, model: str, prompt: str) -> List[float]:
+        """Single-text /api/embeddings"""
+        return self.post("/api/embeddings", {"model": model, "prompt": prompt}).get("embedding")
+
+    def embed(self, model: str, inputs: Union[str, List[str]]) -> List[List[float]]:
+        """Multi-input /api/embed"""
+        return self.post("/api/embed", {"model": model, "input": inputs}).get("embeddings")
+
+    def _async_client(self):
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            state = self._async_state.get(loop)
+            if state is None:
+                client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                    limits=httpx.Limits(max_connections=self.max_concurrency,
+                                        max_keepalive_connections=self.max_concurrency),
+                )
+                state = self._async_state[loop] = (client, asyncio.Semaphore(self.max_concurrency))
+            return state
+
+    async def apost(self, path: str, payload: dict, timeout: Optional[float] = None,
+                    retries: Optional[int] = None) -> dict:
+        """asyncio version of `post`"""
+        client, limiter = self._async_client()
+
+        async def send():
+            async with limiter:
+                started = time.perf_counter()
+                response = await client.post(path, json=payload, timeout=timeout or self.read_timeout)
+                metrics.observe("ollama_request_seconds", time.perf_counter() - started, path=path)
+            _acheck_status(response, path)
+            return response.json()
+
+        return await self._awith_retries(path, send, retries)
+
+    async def _astream_json(self, path: str, payload: dict, timeout: Optional[float] = None,
+                            retries: Optional[int] = None, deadline: Optional[float] = None) -> dict:
+        client, limiter = self._async_client()
+
+        async def send():
+            stream = _JSONStream()
+            async with limiter:
+                _check_deadline(deadline, path)
+                started = time.perf_counter()
+                async with client.stream("POST", path, json=payload, timeout=timeout or self.read_timeout) as response:
+                    _acheck_status(response, path)
+                    async for line in response.aiter_lines():
+                        if stream.feed_line(line):
+                            break
+                        _check_deadline(deadline, path)
+                metrics.observe("ollama_request_seconds", time.perf_counter() - started, path=path)
+            return stream.result()
+
+        return await self._awith_retries(path, send, retries)
+
+    async def _awith_retries(self, path: str, send, retries: Optional[int] = None):
+        """asyncio version of `_with_retries`"""
+        import httpx
+
+        attempts = 1 + (self.max_retries if retries is None else retries)
+        last_error = None
+        for attempt in range(attempts):
+            try:
+                return await send()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                last_error = e
+                logger.warning(f"Ollama request to {path} failed (attempt {attempt+1}/{attempts}): {str(e)}")
+                if attempt < attempts - 1:
+                    metrics.incr("ollama_retries_total", path=path)
+                    await asyncio.sleep(self._retry_delay(attempt))
+            except ValueError as e:
+                raise OllamaError(f"Ollama returned invalid JSON for {path}: {str(e)}") from e
+        metrics.incr("ollama_failures_total", path=path)
+        raise OllamaError(f"Ollama request to {path} failed after {attempts} attempts: {str(last_error)}")
+
+    async def agenerate(self, model: str, prompt: str, options: dict = None, format=None, timeout: float = None,
+                        retries: int = None) -> dict:
+        return await self.apost("/api/generate", _generate_payload(model, prompt, options, format), timeout=timeout,
+                                retries=retries)
+
+    async def agenerate_json(self, model: str, prompt: str, schema: dict = None, options: dict = None,
+                             timeout: float = None, retries: int = None, deadline: float = None) -> dict:
+        """asyncio version of `generate_json`"""
+        payload = {**_generate_payload(model, prompt, options, schema or "json"), "stream": True}
+        result = await self._astream_json("/api/generate", payload, timeout=timeout, retries=retries,
+                                          deadline=deadline)
+        result.setdefault("prompt_eval_count", estimate_tokens(prompt))
+        return result
+
+    async def aembeddings(self, model: str, prompt: str) -> List[float]:
+        return (await self.apost("/api/embeddings", {"model": model, "prompt": prompt})).get("embedding")
+
+    async def aembed(self, model: str, inputs: Union[str, List[str]]) -> List[List[float]]:
+        return (await self.apost("/api/embed", {"model": model, "input": inputs})).get("embeddings")
+
+    async def aclose(self):
+        """Close the async connection pool of the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            state = self._async_state.pop(loop, None)
+        if state is not None:
+            await state[0].aclose()
+
+    def close(self):
+        self.session.close()
+
+
+def _check_status(response, path: str):
+    if response.status_code in RETRY_STATUS_CODES:
+        raise requests.exceptions.HTTPError(f"{response.status_code} from {path}", response=response)
+    response.raise_for_status()
+
+
+def _check_deadline(deadline: Optional[float], path: str):
+    if deadline is not None and time.monotonic() >= deadline:
+        metrics.incr("ollama_deadline_exceeded_total", path=path)
+        raise OllamaDeadlineExceeded(f"Ollama request to {path} ran past its deadline")
+
+
+def _acheck_status(response, path: str):
+    """httpx version of `_check_status`: retryable statuses raise HTTPStatusError, other errors OllamaError"""
+    if response.status_code in RETRY_STATUS_CODES:
+        import httpx
+        raise httpx.HTTPStatusError(f"{response.status_code} from {path}", request=response.request,
+                                    response=response)
+    if response.is_error:
+        raise OllamaError(f"Ollama request to {path} failed: {response.status_code}")
+
+
+def _generate_payload(model: str, prompt: str, options: dict = None, format=None) -> dict:
+    payload = {"model": model, "prompt": prompt, "stream": False}
+    if options:
+        payload["options"] = options
+    if format is not None:
+        payload["format"] = format
+    return payload
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_ollama_client(base_url: str = None) -> OllamaClient:
+    """Process-wide client per base URL, so every agent shares one connection pool"""
+    base_url = (base_url or os.getenv("OLLAMA_HOST", "http://localhost:11434")).rstrip("/")
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = OllamaClient(base_url)
+        return client
@@ -0,0 +1,105 @@
+import logging
+import random
+import threading
+import time
+from typing import Optional
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """Deliver messages queued with DBHandler.enqueue_emails.
+
+    Due messages are claimed in batches and sent over one SMTP connection per
+    batch (EmailScheduler.send_bulk), spaced `min_interval` seconds apart to
+    stay under provider rate limits. Failed messages are retried with
+    exponential backoff until `max_attempts`, then marked 'failed'; a
+    permanent rejection (5xx, e.g. an unknown mailbox) is marked 'failed'
+    straight away. Because the queue lives in SQLite, messages survive
+    restarts of the app.
+    """
+
+    def __init__(self, db, scheduler, batch_size: int = 20, min_interval: float = 1.0,
+                 max_attempts: int = 5, backoff: float = 30.0, max_backoff: float = 3600.0,
+                 poll_interval: float = 5.0):
+        self.db = db  # DBHandler; its connections are per-thread, so one instance is enough
+        self.scheduler = scheduler
+        self.batch_size = batch_size
+        self.min_interval = min_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _retry_at(self, attempts: int) -> Optional[float]:
+        if attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+        return time.time() + delay * random.uniform(0.5, 1.0)
+
+    def send_batch(self) -> int:
+        """Claim and send one batch; returns how many messages were attempted"""
+        batch = self.db.claim_outbox(self.batch_size)
+        if not batch:
+            return 0
+
+        with metrics.timer("email_batch_seconds"):
+            results = self.scheduler.send_bulk(batch, min_interval=self.min_interval)
+
+        sent = [message for message, (ok, _, _) in zip(batch, results) if ok]
+        self.db.mark_outbox_sent(sent)
+        for message, (ok, detail, retryable) in zip(batch, results):
+            if not ok:
+                retry_at = self._retry_at(message["attempts"] + 1) if retryable else None
+                self.db.mark_outbox_failed(message, detail, retry_at)
+                if retry_at is None:
+                    logger.error(f"Giving up on email to {message['to_email']}: {detail}")
+        metrics.incr("emails_total", len(sent), status="sent")
+        metrics.incr("emails_total", len(batch) - len(sent), status="failed")
+        logger.info(f"Outbox batch: {len(sent)}/{len(batch)} sent")
+        return len(batch)
+
+    def drain(self) -> int:
+        """Send everything that is currently due; returns the number of messages attempted"""
+        total = 0
+        while not self._stopped.is_set():
+            attempted = self.send_batch()
+            if not attempted:
+                break
+            total += attempted
+        return total
+
+    def notify(self):
+        """Wake the background thread after enqueueing new messages"""
+        self._wakeup.set()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # Only one worker runs per database, so anything left mid-send was interrupted
+        requeued = self.db.requeue_stuck_outbox()
+        if requeued:
+            logger.warning(f"Requeued {requeued} emails interrupted by a previous run")
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {str(e)}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
@@ -0,0 +1,261 @@
+import fnmatch
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from services.metrics import metrics
+from services.text_preprocessing import clean_pages
+
+logger = logging.getLogger(__name__)
+
+PDFSource = Union[bytes, str]
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_page_text(source: PDFSource, max_pages: Optional[int] = None,
+                   deadline: Optional[float] = None) -> Iterator[str]:
+    """Yield the text of each page in turn instead of building one string.
+
+    `source` is PDF bytes or a path. Stops early after `max_pages` pages or
+    once `time.monotonic()` passes `deadline`.
+    """
+    with _open_pdf(source) as doc:
+        yield from _page_texts(doc, max_pages, deadline)
+
+
+def _open_pdf(source: PDFSource):
+    import fitz  # PyMuPDF, imported lazily so worker processes pay for it once
+
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _page_texts(doc, max_pages: Optional[int], deadline: Optional[float]) -> Iterator[str]:
+    for page_number, page in enumerate(doc):
+        if max_pages is not None and page_number >= max_pages:
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            break
+        yield page.get_text()
+
+
+def _extract_text(source: PDFSource, max_pages: Optional[int], time_limit: Optional[float]) -> dict:
+    # Runs inside a worker process; pages are cleaned and joined here so only one string is sent back
+    started = time.monotonic()
+    deadline = started + time_limit if time_limit else None
+    with _open_pdf(source) as doc:
+        page_count = doc.page_count
+        pages = list(_page_texts(doc, max_pages, deadline))
+    return {
+        "text": join_pages(pages),
+        "pages": len(pages),
+        "page_count": page_count,
+        "truncated": len(pages) < page_count,
+        "seconds": time.monotonic() - started,
+    }
+
+
+def iter_pdf_paths(directory: str, pattern: str = "*.pdf") -> Iterator[str]:
+    """Lazily walk `directory` in a stable order, yielding files matching `pattern`"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(fnmatch.filter(files, pattern)):
+            yield os.path.join(root, name)
+
+
+def join_pages(pages) -> str:
+    """One text for a PDF: pages normalized, running headers/footers removed, joined line by line"""
+    return clean_pages(pages)
+
+
+class PDFExtractor:
+    """Extract PDF text in a process pool so PyMuPDF never blocks the UI thread.
+
+    Each file is limited to `max_pages` pages and `time_limit` seconds. The
+    limit is checked between pages inside the worker; a file still running
+    `timeout_grace` seconds after that (a page PyMuPDF is stuck on) gets its
+    worker killed: the pool is replaced and the other files that were in
+    it are submitted again, up to `max_attempts` times each.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pages: Optional[int] = 50,
+                 time_limit: Optional[float] = 30.0, timeout_grace: float = 10.0, mp_context=None,
+                 max_attempts: int = 3, poll_interval: float = 0.5):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pages = max_pages
+        self.time_limit = time_limit
+        self.timeout_grace = timeout_grace
+        self.mp_context = mp_context
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self.executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+
+    def _result_timeout(self) -> Optional[float]:
+        return self.time_limit + self.timeout_grace if self.time_limit else None
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """Kill the workers of `executor` and start a fresh pool, unless that already happened"""
+        with self._lock:
+            if executor is not self.executor:
+                return
+            self.executor = self._new_executor()
+        metrics.incr("pdf_pool_recycled_total")
+        kill = getattr(executor, "kill_workers", None)  # Python 3.14+
+        if kill is not None:
+            kill()
+        else:
+            for process in list((executor._processes or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, entry: dict) -> dict:
+        for _ in range(2):
+            with self._lock:
+                executor = self.executor
+                try:
+                    entry["future"] = executor.submit(_extract_text, entry["source"], self.max_pages, self.time_limit)
+                    break
+                except BrokenProcessPool:
+                    pass
+            # A worker crashed and nobody has noticed yet
+            self._recycle(executor)
+        else:
+            raise BrokenProcessPool("PDF extraction pool could not be restarted")
+        entry.update(executor=executor, started=None, attempts=entry.get("attempts", 0) + 1)
+        return entry
+
+    def _collect(self, in_flight: list) -> List[dict]:
+        """Wait until at least one in-flight file is finished or has overrun; remove and return those.
+
+        Collected entries have `result`, or `exception` if extraction failed.
+        The time limit runs from when a file is handed to a worker, so files
+        queued behind others are not timed out early.
+        """
+        timeout = self._result_timeout()
+        while True:
+            now = time.monotonic()
+            for entry in in_flight:
+                if entry["started"] is None and (entry["future"].running() or entry["future"].done()):
+                    entry["started"] = now
+            overrun = [e for e in in_flight if timeout and e["started"] is not None and not e["future"].done()
+                       and now - e["started"] > timeout]
+            if overrun:
+                collected = []
+                for entry in overrun:
+                    in_flight.remove(entry)
+                    self._recycle(entry["executor"])
+                    metrics.incr("pdf_timeouts_total")
+                    entry["exception"] = TimeoutError(f"Extraction exceeded {self.time_limit}s")
+                    collected.append(entry)
+                return collected
+
+            done, _ = wait([e["future"] for e in in_flight], timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+            collected = []
+            for entry in [e for e in in_flight if e["future"] in done]:
+                try:
+                    entry["result"] = entry["future"].result()
+                except BrokenProcessPool as e:
+                    # Killed along with a stuck file, or the pool died with a crashing one
+                    self._recycle(entry["executor"])
+                    if entry["attempts"] < self.max_attempts:
+                        self._submit(entry)
+                        continue
+                    entry["exception"] = e
+                except Exception as e:
+                    entry["exception"] = e
+                in_flight.remove(entry)
+                collected.append(entry)
+            if collected:
+                return collected
+
+    def extract(self, source: PDFSource) -> str:
+        """Extract one PDF (bytes or path) and return its text; raises on failure"""
+        in_flight = [self._submit({"source": source})]
+        with metrics.timer("pdf_extraction_seconds"):
+            [entry] = self._collect(in_flight)
+        if "exception" in entry:
+            metrics.incr("pdf_errors_total")
+            raise entry["exception"]
+        result = entry["result"]
+        metrics.incr("pdf_pages_total", result["pages"])
+        if result["truncated"]:
+            metrics.incr("pdf_truncated_total")
+            logger.warning(f"PDF truncated to {result['pages']} of {result['page_count']} pages")
+        return result["text"]
+
+    def extract_many(self, items: Iterable[Tuple[str, PDFSource]], max_in_flight: Optional[int] = None) -> Iterator[dict]:
+        """Extract (name, bytes-or-path) items, yielding a result dict per file as it completes.
+
+        Each result has name, hash, text, pages (extracted), page_count,
+        duplicate_of and error. Byte-identical files are not extracted
+        again; they are yielded with `duplicate_of` set to the name of the
+        first copy. At most `max_in_flight` files are queued at once, so
+        `items` can be a lazy iterator over an arbitrarily large corpus.
+        """
+        max_in_flight = max_in_flight or self.max_workers * 2
+        seen = {}
+        in_flight = []
+
+        def result(entry):
+            out = {"name": entry["name"], "hash": entry["hash"], "duplicate_of": None, "error": None,
+                   "text": "", "pages": 0}
+            if "exception" in entry:
+                error = entry["exception"]
+                out["error"] = str(error) if isinstance(error, TimeoutError) else f"PDF Error: {str(error)}"
+                metrics.incr("pdf_errors_total")
+            else:
+                out.update(entry["result"])
+                metrics.observe("pdf_extraction_seconds", out["seconds"])
+                metrics.incr("pdf_pages_total", out["pages"])
+            return out
+
+        for name, source in items:
+            try:
+                digest = content_hash(source) if isinstance(source, bytes) else file_hash(source)
+            except OSError as e:
+                yield {"name": name, "hash": None, "duplicate_of": None, "error": f"PDF Error: {str(e)}",
+                       "text": "", "pages": 0}
+                continue
+            if digest in seen:
+                metrics.incr("pdf_duplicates_total")
+                yield {"name": name, "hash": digest, "duplicate_of": seen[digest], "error": None, "text": "",
+                       "pages": 0}
+                continue
+            seen[digest] = name
+
+            in_flight.append(self._submit({"name": name, "hash": digest, "source": source}))
+            while len(in_flight) >= max_in_flight:
+                for entry in self._collect(in_flight):
+                    yield result(entry)
+
+        while in_flight:
+            for entry in self._collect(in_flight):
+                yield result(entry)
+
+    def extract_directory(self, directory: str, pattern: str = "*.pdf", **kwargs) -> Iterator[dict]:
+        """Extract every PDF under `directory` matching `pattern` (recursively)"""
+        return self.extract_many(((path, path) for path in iter_pdf_paths(directory, pattern)), **kwargs)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,99 @@
+import logging
+import threading
+import traceback
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CVPipeline:
+    """Process many CVs concurrently: extract text, parse, embed and score.
+
+    Worker threads overlap the Ollama round-trips of different files. Results
+    are handed back to the caller's thread in upload order, so the caller stays
+    the single database writer and ends up with the same rows as the serial loop.
+    """
+
+    def __init__(self, cv_parser, matching_engine, extract_text: Callable[[bytes], str], max_workers: int = 4,
+                 serialize_extraction: bool = True, find_document: Optional[Callable[[str], Optional[dict]]] = None):
+        self.cv_parser = cv_parser
+        self.matching_engine = matching_engine
+        self.extract_text = extract_text
+        self.max_workers = max(1, int(max_workers))
+        # PyMuPDF is not thread-safe, so in-thread extraction runs one file at a
+        # time while parsing and embedding of other files keep going. Extractors
+        # that run in their own processes (services.pdf_extractor) can skip this.
+        self._extract_lock = threading.Lock() if serialize_extraction else nullcontext()
+        # e.g. DBHandler.find_document: CVs seen before reuse their stored parse and embedding
+        self.find_document = find_document
+
+    def _process_one(self, index: int, filename: str, data: bytes, jd_embedding) -> dict:
+        result = {"index": index, "filename": filename, "cv_text": "", "error": None}
+        try:
+            with self._extract_lock:
+                cv_text = self.extract_text(data)
+        except Exception as e:
+            logger.error(f"PDF extraction error for {filename}: {traceback.format_exc()}")
+            result["error"] = f"PDF Error: {str(e)}"
+            return result
+
+        if not cv_text:
+            return result
+
+        try:
+            existing = self.find_document(cv_text) if self.find_document else None
+            if existing is not None:
+                metrics.incr("pipeline_documents_reused_total")
+                result["document_id"] = existing["document_id"]
+                cv_data, cv_embedding = existing["cv_data"], existing["embedding"]
+                chunks = existing.get("chunks", [])
+            else:
+                cv_data = self.cv_parser.parse(cv_text)
+                # Chunks are empty unless the engine runs in chunked mode and the CV is long
+                cv_embedding, chunks = self.matching_engine.get_document_embedding(cv_text)
+            # Without a JD the caller scores the embeddings itself (e.g. against many jobs)
+            score = None if jd_embedding is None else self.matching_engine.calculate_match(jd_embedding, cv_embedding)
+        except Exception as e:
+            logger.error(f"CV processing error for {filename}: {traceback.format_exc()}")
+            result["error"] = f"Processing Error: {str(e)}"
+            return result
+
+        result.update(cv_text=cv_text, cv_data=cv_data, embedding=cv_embedding, chunks=chunks, score=score)
+        return result
+
+    def run(self, files: List[Tuple[str, bytes]], jd_embedding,
+            on_progress: Optional[Callable[[int, int], None]] = None) -> Iterator[dict]:
+        """Yield one result per file, in upload order.
+
+        `on_progress(done, total)` is called on the caller's thread every time a
+        file finishes, even if earlier files are still running.
+        """
+        total = len(files)
+        if total == 0:
+            return
+
+        pending = {}
+        next_index = 0
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, total)) as executor:
+            futures = [
+                executor.submit(self._process_one, i, name, data, jd_embedding)
+                for i, (name, data) in enumerate(files)
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                metrics.incr("pipeline_files_total",
+                             status="error" if result["error"] else ("ok" if result["cv_text"] else "empty"))
+                pending[result["index"]] = result
+                done += 1
+                if on_progress:
+                    on_progress(done, total)
+
+                # Release the longest finished prefix so writes keep upload order
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
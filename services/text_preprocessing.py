@@ -0,0 +1,157 @@
+"""Cleanup of CV and JD text before it is sent to the LLM or the embedding model.
+
+PDF and CSV text carries ragged whitespace, ligatures, invisible characters
+and, for multi-page PDFs, the same header and footer on every page. None of
+it helps the models, and long documents make prompt processing time vary a
+lot from one CV to the next. `clean_pages` tidies extracted pages; a
+`TextPreprocessor` normalizes text and cuts it to a token budget, keeping
+the most useful CV sections.
+"""
+import logging
+import re
+import unicodedata
+from collections import Counter
+from typing import Iterable, List, Optional
+
+from agents.rule_extractor import iter_sections
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Characters NFKC leaves in place that carry no text: soft hyphen, zero-width spaces and joiners, BOM
+_INVISIBLE_RE = re.compile("[\u00ad\u200b\u200c\u200d\u2060\ufeff]")
+_SPACES_RE = re.compile(r"[^\S\n]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_DIGITS_RE = re.compile(r"\d+")
+# "3", "- 3 -", "Page 3", "Page 3 of 5", "3/5"; a year on its own line is not a page number
+_PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?[-–—]?\s*\d{1,3}\s*[-–—]?(?:\s*(?:of|/)\s*\d{1,3})?$",
+                             re.IGNORECASE)
+
+# When a text is over budget, sections are kept in this order; contact details and skills go first
+SECTION_PRIORITY = ("header", "skills", "experience", "education", "certifications", "summary", "projects",
+                    "languages", "interests", "references")
+# A section is only cut to fit if at least this many tokens of it would remain
+MIN_PARTIAL_TOKENS = 16
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+
+def clean_text(text: str) -> str:
+    """NFKC-normalize, drop invisible characters, collapse runs of spaces and blank lines; line breaks are kept"""
+    text = _INVISIBLE_RE.sub("", unicodedata.normalize("NFKC", text))
+    lines = (_SPACES_RE.sub(" ", line).strip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"))
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _line_key(line: str) -> str:
+    return _DIGITS_RE.sub("#", line.strip().lower())
+
+
+def strip_repeated_lines(pages: List[str], edge_lines: int = 3) -> List[str]:
+    """Remove running headers and footers from a list of page texts.
+
+    A line among the first or last `edge_lines` lines of a page is a header
+    or footer if it appears there on every page (digits ignored, so
+    "Page 2 of 3" matches "Page 3 of 3"). The top of the first page keeps
+    its copy, since a CV's running header is usually the candidate's name.
+    Bare page numbers are removed everywhere.
+    """
+    page_lines = [page.split("\n") for page in pages]
+    heads, tails = [], []
+    for lines in page_lines:
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        heads.append(set(content[:edge_lines]))
+        tails.append(set(content[-edge_lines:]))
+    repeated = set()
+    if len(pages) > 1:
+        counts = Counter(key for lines, head, tail in zip(page_lines, heads, tails)
+                         for key in {_line_key(lines[i]) for i in head | tail})
+        # Lines without letters (years, amounts) are too likely to recur by chance
+        repeated = {key for key, count in counts.items()
+                    if count == len(pages) and any(ch.isalpha() for ch in key)}
+
+    cleaned = []
+    for number, (lines, head, tail) in enumerate(zip(page_lines, heads, tails)):
+        strippable = tail if number == 0 else head | tail
+        kept = [line for i, line in enumerate(lines)
+                if not (i in head | tail and _PAGE_NUMBER_RE.match(line.strip()))
+                and not (i in strippable and _line_key(line) in repeated)]
+        cleaned.append("\n".join(kept).strip())
+    return cleaned
+
+
+def clean_pages(pages: Iterable[str]) -> str:
+    """Normalize each page of extracted PDF text, drop repeated headers/footers and join the pages"""
+    pages = [clean_text(page) for page in pages]
+    return "\n".join(page for page in strip_repeated_lines(pages) if page)
+
+
+def _cut(text: str, max_tokens: int) -> str:
+    """Leading part of text within max_tokens, ending at a line break or else a space"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    end = cut.rfind("\n")
+    if end < max_chars // 2:
+        end = cut.rfind(" ")
+    return (cut[:end] if end > 0 else cut).rstrip()
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, filling the budget with whole sections in SECTION_PRIORITY order.
+
+    The section that no longer fits is cut at a line boundary; the parts
+    kept stay in document order. Text without headings is one 'header'
+    section, so a JD simply keeps its beginning.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    blocks = iter_sections(text, keep_headings=True)
+    rank = {section: i for i, section in enumerate(SECTION_PRIORITY)}
+    order = sorted(range(len(blocks)), key=lambda i: (rank.get(blocks[i][0], len(rank)), i))
+    kept, remaining = {}, max_tokens
+    for i in order:
+        body = blocks[i][1]
+        if not body:
+            continue
+        tokens = estimate_tokens(body) + 1  # and the line break joining it to the next block
+        if tokens <= remaining:
+            kept[i] = body
+            remaining -= tokens
+        elif remaining >= MIN_PARTIAL_TOKENS:
+            kept[i] = _cut(body, remaining - 1)
+            remaining = 0
+    return "\n".join(kept[i] for i in sorted(kept))
+
+
+class TextPreprocessor:
+    """Normalize text and, with `max_tokens`, cut it to that many (estimated) tokens.
+
+    Used by the agents on every CV/JD they receive; the tokens saved per
+    document are logged and counted in preprocess_tokens_saved_total.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens
+
+    def prepare(self, text: str, kind: str = "cv", truncate: bool = True) -> str:
+        """Normalized (and unless truncate=False, budget-cut) text; `kind` labels the log line and metrics"""
+        before = estimate_tokens(text)
+        prepared = clean_text(text)
+        truncated = truncate and bool(self.max_tokens) and estimate_tokens(prepared) > self.max_tokens
+        if truncated:
+            prepared = truncate_to_budget(prepared, self.max_tokens)
+            metrics.incr("preprocess_truncated_total", kind=kind)
+        after = estimate_tokens(prepared)
+        metrics.incr("preprocess_tokens_total", before, kind=kind)
+        metrics.incr("preprocess_tokens_saved_total", before - after, kind=kind)
+        if before > after:
+            # Cuts are what the budget is tuned by; whitespace cleanup alone is only worth a debug line
+            logger.log(logging.INFO if truncated else logging.DEBUG,
+                       f"Preprocessed {kind}: ~{before} -> ~{after} tokens "
+                       f"({100 * (before - after) / before:.0f}% saved{', truncated' if truncated else ''})")
+        return prepared
@@ -0,0 +1,284 @@
+"""Worker processes for the durable screening queue (the work_items table).
+
+The UI (or any other producer) queues uploaded CVs with
+DBHandler.enqueue_work; workers claim one item at a time and move it through
+the stages extracted -> parsed -> embedded -> scored, saving the result of
+each stage before starting the next. A worker that dies stops sending
+heartbeats, and once its claim is `stale_after` seconds old another worker
+picks the item up again from the last saved stage.
+
+Usage: python -m services.work_queue --workers 4 [--db recruitment.db]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, List, Optional
+
+from services.metrics import metrics
+from services.pdf_extractor import iter_page_text, join_pages
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("queued", "extracted", "parsed", "embedded", "scored")
+
+
+def extract_pdf_text(data: bytes, max_pages: Optional[int] = 50, time_limit: Optional[float] = 30.0) -> str:
+    # Each worker is its own process, so PyMuPDF can run in-process here
+    deadline = time.monotonic() + time_limit if time_limit else None
+    return join_pages(iter_page_text(data, max_pages, deadline))
+
+
+class ScreeningWorker:
+    """Claim queued CVs and run them through extraction, parsing, embedding and scoring.
+
+    A background thread refreshes the heartbeat of the item being worked on
+    every `heartbeat_interval` seconds. Items that fail are retried from their
+    last saved stage until they have been claimed `max_attempts` times.
+    With `export_metrics`, the process's metrics are moved into the
+    worker_metrics table after every item, where the UI can read them.
+    """
+
+    def __init__(self, db, cv_parser, matching_engine, extract_text: Callable[[bytes], str] = extract_pdf_text,
+                 worker_id: Optional[str] = None, heartbeat_interval: float = 5.0, stale_after: float = 60.0,
+                 max_attempts: int = 3, poll_interval: float = 1.0, export_metrics: bool = False):
+        self.db = db
+        self.cv_parser = cv_parser
+        self.matching_engine = matching_engine
+        self.extract_text = extract_text
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.export_metrics = export_metrics
+        self._current: Optional[int] = None
+        self._jobs = {}  # job_id -> JD embedding
+        self._stopped = threading.Event()
+
+    def process_next(self) -> bool:
+        """Claim and process one item; False if the queue was empty"""
+        item = self.db.claim_work_item(self.worker_id, stale_after=self.stale_after, max_attempts=self.max_attempts)
+        if item is None:
+            return False
+        if item["attempts"] > 1:
+            logger.warning(f"Resuming {item['filename']} at stage '{item['stage']}' (attempt {item['attempts']})")
+        self._current = item["item_id"]
+        try:
+            with metrics.timer("work_item_seconds"):
+                status = self._process(item)
+            metrics.incr("work_items_total", status=status)
+        except LookupError as e:
+            # Our claim went stale and another worker owns the item now; drop it
+            logger.warning(str(e))
+            metrics.incr("work_items_total", status="lost")
+        except Exception as e:
+            logger.error(f"Screening error for {item['filename']}: {traceback.format_exc()}")
+            retry = item["attempts"] < self.max_attempts
+            self.db.fail_work_item(item["item_id"], self.worker_id, f"{type(e).__name__}: {str(e)}", retry=retry)
+            metrics.incr("work_items_total", status="retry" if retry else "failed")
+        finally:
+            self._current = None
+        return True
+
+    def _process(self, item: dict) -> str:
+        item_id, stage = item["item_id"], item["stage"]
+        # Each item carries its run's embedding mode; the engine itself is left as configured
+        chunked = bool(item["options"].get("chunked", False))
+        pooling = item["options"].get("pooling", "mean")
+        embedding = None
+
+        if stage == "queued":
+            cv_text = self.extract_text(item["pdf"])
+            if not cv_text:
+                self.db.fail_work_item(item_id, self.worker_id, "No text found in PDF", retry=False)
+                return "empty"
+            existing = self.db.find_document(cv_text)
+            if existing is not None:
+                # Seen before: skip straight to scoring with the stored parse and embedding
+                metrics.incr("pipeline_documents_reused_total")
+                item["document_id"] = self.db.advance_work_item(item_id, self.worker_id, "embedded",
+                                                                document={"document_id": existing["document_id"]})
+                embedding = existing["embedding"]
+                stage = "embedded"
+            else:
+                self.db.advance_work_item(item_id, self.worker_id, "extracted", cv_text=cv_text)
+                item["cv_text"], stage = cv_text, "extracted"
+
+        if stage == "extracted":
+            item["cv_data"] = self.cv_parser.parse(item["cv_text"])
+            self.db.advance_work_item(item_id, self.worker_id, "parsed", cv_data=item["cv_data"])
+            stage = "parsed"
+
+        if stage == "parsed":
+            embedding, chunks = self.matching_engine.get_document_embedding(item["cv_text"], chunked=chunked,
+                                                                            pooling=pooling)
+            item["document_id"] = self.db.advance_work_item(item_id, self.worker_id, "embedded", document={
+                "cv_text": item["cv_text"], "cv_data": item["cv_data"], "embedding": embedding, "chunks": chunks,
+            })
+            stage = "embedded"
+
+        if stage == "embedded":
+            if embedding is None:
+                embedding = self.db.document_embedding(item["document_id"])
+            score = self.matching_engine.calculate_match(self._jd_embedding(item["job_id"]), embedding)
+            self.db.complete_work_item(item_id, self.worker_id, item["job_id"], item["document_id"], score)
+        return "done"
+
+    def _jd_embedding(self, job_id: int):
+        if job_id not in self._jobs:
+            job = self.db.get_job(job_id)
+            if job is None:
+                raise ValueError(f"Job {job_id} not found")
+            self._jobs[job_id] = job["embedding"]
+        return self._jobs[job_id]
+
+    def _heartbeat(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            item_id = self._current
+            if item_id is None:
+                continue
+            try:
+                if not self.db.heartbeat_work_item(item_id, self.worker_id):
+                    logger.warning(f"Lost the claim on work item {item_id}")
+            except Exception as e:
+                logger.error(f"Heartbeat error: {str(e)}")
+
+    def run(self, stop_event=None, exit_when_idle: bool = False):
+        """Process items until `stop_event` is set (or the queue is empty, with exit_when_idle)"""
+        stop_event = stop_event or threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, name="work-heartbeat", daemon=True)
+        heartbeat.start()
+        logger.info(f"Screening worker {self.worker_id} started")
+        try:
+            while not stop_event.is_set():
+                try:
+                    if self.process_next():
+                        self._export_metrics()
+                        continue
+                except Exception as e:
+                    logger.error(f"Screening worker error: {str(e)}")
+                if exit_when_idle:
+                    break
+                stop_event.wait(self.poll_interval)
+        finally:
+            self._stopped.set()
+            heartbeat.join()
+            self._export_metrics()
+
+    def _export_metrics(self):
+        if not self.export_metrics:
+            return
+        try:
+            self.db.add_worker_metrics(self.worker_id, metrics.drain())
+        except Exception as e:
+            logger.error(f"Could not export metrics: {str(e)}")
+
+
+def run_worker(db_path: str = "recruitment.db", stop_event=None, exit_when_idle: bool = False,
+               ollama_url: Optional[str] = None, max_input_tokens: Optional[int] = None, **worker_options):
+    """Entry point of one worker process: builds its own models and database connections.
+
+    `max_input_tokens` is the per-CV token budget (0: no limit, None: the agents' defaults).
+    """
+    from agents.cv_parser import CVParser
+    from agents.matching_engine import MatchingEngine
+    from database.cache import EmbeddingCache, LLMResultCache
+    from database.db_handler import DBHandler
+
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(processName)s: %(message)s")
+    db = DBHandler(db_path)
+    budget = {} if max_input_tokens is None else {"max_input_tokens": max_input_tokens or None}
+    matching_engine = MatchingEngine(model_name="nomic-embed-text", cache=EmbeddingCache(), base_url=ollama_url,
+                                     **budget)
+    cv_parser = CVParser(cache=LLMResultCache(), base_url=ollama_url, **budget)
+    # Metrics are per process; the UI reads the workers' from the database
+    worker_options.setdefault("export_metrics", True)
+    worker = ScreeningWorker(db, cv_parser, matching_engine, **worker_options)
+    try:
+        worker.run(stop_event, exit_when_idle=exit_when_idle)
+    finally:
+        db.close()
+
+
+class ScreeningWorkerPool:
+    """Run `size` screening workers as separate processes; throughput scales with their number"""
+
+    def __init__(self, size: int = 4, db_path: str = "recruitment.db", ollama_url: Optional[str] = None,
+                 **worker_options):
+        self.size = max(1, int(size))
+        self.db_path = db_path
+        self.ollama_url = ollama_url
+        self.worker_options = worker_options
+        # spawn: the parent may be running threads (Streamlit, the outbox worker) that fork would copy badly
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self.processes: List[multiprocessing.Process] = []
+
+    def start(self):
+        self.processes = [p for p in self.processes if p.is_alive()]
+        self._stop.clear()
+        while len(self.processes) < self.size:
+            process = self._context.Process(
+                target=run_worker, name=f"screening-worker-{len(self.processes) + 1}", daemon=True,
+                args=(self.db_path, self._stop), kwargs={"ollama_url": self.ollama_url, **self.worker_options},
+            )
+            process.start()
+            self.processes.append(process)
+        return self
+
+    def resize(self, size: int):
+        """Start more workers; extra workers are only stopped with stop()"""
+        self.size = max(self.size, int(size))
+        return self.start()
+
+    def alive(self) -> int:
+        return sum(p.is_alive() for p in self.processes)
+
+    def stop(self, timeout: Optional[float] = 30.0):
+        """Let workers finish the item they are on, then exit"""
+        self._stop.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run screening workers for queued CVs")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--db", default="recruitment.db")
+    parser.add_argument("--ollama-url", default=None)
+    parser.add_argument("--stale-after", type=float, default=60.0,
+                        help="Seconds without a heartbeat before another worker takes an item over")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--exit-when-idle", action="store_true", help="Stop once the queue is empty")
+    parser.add_argument("--max-input-tokens", type=int, default=None,
+                        help="Cut each CV to about this many tokens, by section, before parsing and embedding "
+                             "(0: no limit; default: the agents' own budgets)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(processName)s: %(message)s")
+
+    options = {"stale_after": args.stale_after, "max_attempts": args.max_attempts}
+    if args.exit_when_idle:
+        options["exit_when_idle"] = True
+    if args.max_input_tokens is not None:
+        options["max_input_tokens"] = args.max_input_tokens
+    pool = ScreeningWorkerPool(args.workers, args.db, args.ollama_url, **options).start()
+    try:
+        for process in pool.processes:
+            process.join()
+    except KeyboardInterrupt:
+        logger.info("Stopping workers after their current item")
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
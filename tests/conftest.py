@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from benchmarks.corpus import cv_text
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+from database.cache import EmbeddingCache, LLMResultCache
+from database.db_handler import DBHandler
+from services.metrics import metrics
+
+
+@pytest.fixture
+def fake_ollama():
+    """Fake Ollama server with no artificial latency"""
+    server = FakeOllamaServer(config=FakeOllamaConfig(embedding_dim=64, embed_latency=0.0,
+                                                      embed_latency_per_item=0.0, generate_latency=0.0)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def db(tmp_path):
+    handler = DBHandler(str(tmp_path / "recruitment.db"))
+    yield handler
+    handler.close()
+
+
+@pytest.fixture
+def embedding_cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / "cache.db"))
+
+
+@pytest.fixture
+def llm_cache(tmp_path):
+    return LLMResultCache(str(tmp_path / "cache.db"))
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def cvs():
+    rng = random.Random(0)
+    return [cv_text(rng, rng.randint(2, 8)) for _ in range(12)]
+
+
+def counter(name: str, **labels) -> float:
+    """Current value of a counter, summed over the labels not given"""
+    return sum(c["value"] for c in metrics.snapshot()["counters"]
+               if c["name"] == name and all(c["labels"].get(k) == v for k, v in labels.items()))
@@ -0,0 +1,168 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.cv_parser import CVParser
+from agents.jd_summarizer import JDSummarizer
+from agents.reranker import CandidateReranker
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+from tests.conftest import counter
+
+CV = """Ada Lovelace
+ada@example.com
++44 20 7946 0958
+
+SKILLS
+Python, SQL, Docker
+
+EXPERIENCE
+Engineer at Analytical Engines Ltd
+
+EDUCATION
+BSc Mathematics
+"""
+
+
+@pytest.fixture
+def chatty_ollama():
+    """Free-form answers come wrapped in chatter, and a fifth of them is not valid JSON"""
+    server = FakeOllamaServer(config=FakeOllamaConfig(generate_latency=0.0, chatter_tokens=60, malformed_rate=0.2,
+                                                      padding_tokens=200)).start()
+    yield server
+    server.stop()
+
+
+def test_structured_parsing_never_fails_to_parse(chatty_ollama, cvs):
+    structured = CVParser(base_url=chatty_ollama.url, fast_path=False)
+    free = CVParser(base_url=chatty_ollama.url, fast_path=False, structured=False, max_tokens=None)
+    for text in cvs:
+        assert structured.parse(text)["name"].startswith("Candidate")
+    assert counter("llm_parse_failures_total") == 0
+    tokens = counter("llm_completion_tokens_total")
+
+    for text in cvs:
+        free.parse(text)
+    assert counter("llm_parse_failures_total") > 0
+    assert counter("llm_completion_tokens_total") - tokens > tokens
+
+
+def test_fast_path_only_asks_the_llm_for_missing_fields(fake_ollama, llm_cache):
+    parser = CVParser(base_url=fake_ollama.url, cache=llm_cache, llm_fields=["name", "email", "skills"])
+    result = parser.parse(CV)
+
+    assert result["name"] == "Ada Lovelace" and result["email"] == "ada@example.com"
+    assert result["skills"] == ["Python", "SQL", "Docker"]
+    assert "/api/generate" not in fake_ollama.request_counts
+    assert counter("llm_calls_saved_total") == 1
+
+    full = CVParser(base_url=fake_ollama.url, cache=llm_cache)
+    result = full.parse(CV)
+    # Rule-extracted fields win over the LLM's answer
+    assert result["email"] == "ada@example.com" and result["experience"]
+    assert fake_ollama.request_counts["/api/generate"] == 1
+    assert full.parse(CV) == result
+    assert fake_ollama.request_counts["/api/generate"] == 1
+
+
+def test_failed_parse_is_not_cached(llm_cache):
+    parser = CVParser(base_url="http://127.0.0.1:9", cache=llm_cache, fast_path=False)
+    parser.client.max_retries = 0
+    assert parser.parse(CV)["name"] == "Unknown Name"
+    assert llm_cache.stats()["hits"] == 0 and parser._lookup(CV) is None
+
+
+def test_partial_parse_is_not_cached(llm_cache):
+    parser = CVParser(cache=llm_cache, fast_path=False)
+    parser._extract = lambda text, fields: {"name": "Ada Lovelace", "skills": ["Python"]}
+    result = parser.parse(CV)
+
+    assert result["name"] == "Ada Lovelace" and result["email"] == "unknown@example.com"
+    assert parser._lookup(CV) is None
+    assert counter("llm_partial_results_total") == 1
+
+    # A complete answer is cached without the placeholders for fields nobody asked for
+    parser = CVParser(cache=llm_cache, llm_fields=["name", "email", "skills"])
+    assert parser.parse(CV)["education"] == []
+    assert "education" not in llm_cache.get(parser.model, parser.prompt_version, CV)
+
+
+def test_jd_summary(fake_ollama, llm_cache):
+    summarizer = JDSummarizer(base_url=fake_ollama.url, cache=llm_cache)
+    summary = summarizer.summarize("We are hiring a Python developer. Required skills: Python, Docker.")
+
+    assert summary["required_skills"] and summary["required_education"] == "Bachelor's degree"
+    assert summarizer.summarize("We are hiring a Python developer.  Required skills: Python, Docker.") == summary
+    assert fake_ollama.request_counts["/api/generate"] == 1
+
+
+def test_async_parse_and_summarize_match_sync(fake_ollama):
+    parser = CVParser(base_url=fake_ollama.url, fast_path=False)
+    summarizer = JDSummarizer(base_url=fake_ollama.url)
+    jd = "We are hiring a Python developer. Required skills: Python, Docker."
+
+    async def run():
+        try:
+            return await asyncio.gather(parser.aparse(CV), summarizer.asummarize(jd))
+        finally:
+            await parser.client.aclose()
+
+    parsed, summary = asyncio.run(run())
+    assert parsed == parser.parse(CV)
+    assert summary == summarizer.summarize(jd)
+    assert fake_ollama.request_counts["/api/generate"] == 4
+
+
+def candidates(count):
+    return [{"id": i, "name": f"C{i}", "skills": ["Python"], "experience": [f"Role {i}"], "score": float(i)}
+            for i in range(count)]
+
+
+def test_rerank_scores_top_n_only(fake_ollama):
+    reranker = CandidateReranker(base_url=fake_ollama.url, top_n=3)
+    ranked = reranker.rerank({"required_skills": ["Python"]}, candidates(6))
+
+    assert [c["id"] for c in ranked[3:]] == [2, 1, 0]
+    head = ranked[:3]
+    assert {c["id"] for c in head} == {5, 4, 3}
+    assert all("llm_score" in c and c["rerank_reason"] for c in head)
+    assert [c["final_score"] for c in head] == sorted((c["final_score"] for c in head), reverse=True)
+    for c in head:
+        assert c["final_score"] == pytest.approx(0.6 * c["llm_score"] + 0.4 * c["score"])
+    assert fake_ollama.request_counts["/api/generate"] == 3
+
+
+def test_rerank_limits_per_call_leave_the_instance_alone(fake_ollama):
+    reranker = CandidateReranker(base_url=fake_ollama.url, top_n=5)
+    ranked = reranker.rerank({"required_skills": ["Python"]}, candidates(6), top_n=2)
+
+    assert sum("llm_score" in c for c in ranked) == 2
+    assert reranker.top_n == 5
+    assert reranker.rerank({"required_skills": ["Python"]}, candidates(6), token_budget=0)[0].get("llm_score") is None
+
+
+def test_rerank_stops_at_token_budget(fake_ollama):
+    reranker = CandidateReranker(base_url=fake_ollama.url, top_n=5, token_budget=400)
+    ranked = reranker.rerank({"required_skills": ["Python"]}, candidates(5))
+
+    reranked = [c for c in ranked if "llm_score" in c]
+    assert 0 < len(reranked) < 5
+    assert counter("rerank_skipped_total", reason="token_budget") == 5 - len(reranked)
+
+
+def test_rerank_stops_at_time_budget_mid_answer():
+    # Every answer streams for ~6s, one token at a time, so no single read ever times out
+    server = FakeOllamaServer(config=FakeOllamaConfig(generate_latency=0.0, token_latency=0.05)).start()
+    try:
+        reranker = CandidateReranker(base_url=server.url, top_n=3)
+        started = time.monotonic()
+        ranked = reranker.rerank({"required_skills": ["Python"]}, candidates(4), time_budget=0.5)
+
+        assert time.monotonic() - started < 2
+        assert [c["id"] for c in ranked] == [3, 2, 1, 0]
+        assert all("llm_score" not in c and c["final_score"] == c["score"] for c in ranked)
+        assert counter("rerank_skipped_total", reason="time_budget") == 3
+        assert counter("ollama_deadline_exceeded_total") == 1
+    finally:
+        server.stop()
+
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from database.db_handler import DBHandler
+
+
+def add_candidates(db, job_id, count):
+    return db.create_candidates([
+        {"job_id": job_id, "cv_text": f"CV number {i}", "cv_data": {"name": f"Candidate {i:02d}",
+                                                                  "email": f"c{i}@example.com"},
+         "embedding": np.ones(4) * (i + 1), "score": float(i)}
+        for i in range(count)
+    ])
+
+
+def test_bulk_inserts_return_ids_in_order(db):
+    job_ids = db.create_jobs([{"title": f"Job {i}", "raw_description": "d", "summary": {}, "embedding": np.ones(4)}
+                              for i in range(3)])
+    assert job_ids == [1, 2, 3]
+    candidate_ids = add_candidates(db, job_ids[0], 5)
+    assert candidate_ids == [1, 2, 3, 4, 5]
+    assert db.get_candidate(3)["cv_data"]["name"] == "Candidate 02"
+    assert db.get_job(2)["title"] == "Job 1"
+
+
+def test_identical_cvs_are_stored_once(db):
+    job_a = db.create_job("A", "d", {}, np.ones(4))
+    job_b = db.create_job("B", "d", {}, np.ones(4))
+    first = db.create_candidate(job_a, "Same CV", {"name": "X"}, np.ones(4), 50.0)
+    second = db.create_candidate(job_b, "Same  CV\n", {"name": "X"}, np.ones(4), 60.0)
+
+    assert db.get_candidate(first)["document_id"] == db.get_candidate(second)["document_id"]
+    assert db.find_document("Same CV")["cv_data"] == {"name": "X"}
+    assert db.storage_stats()["cv_documents"]["rows"] == 1
+
+
+def test_rescreening_updates_the_application(db):
+    job_id = db.create_job("Engineer", "d", {}, np.ones(4))
+    first = add_candidates(db, job_id, 3)
+    db.update_candidate_scores([{"id": first[0], "llm_score": 80.0, "final_score": 70.0}])
+
+    assert add_candidates(db, job_id, 3) == first
+    assert db.count_candidates(job_id) == 3
+    # Same score: the rerank blend is still valid
+    assert db.list_candidates(job_id, limit=1)[0]["final_score"] == 70.0
+    assert db.create_candidate(job_id, "CV number 0", {}, np.ones(4), 42.0) == first[0]
+    rescored = db.list_candidates(job_id, limit=1)[0]
+    assert (rescored["id"], rescored["score"], rescored["llm_score"]) == (first[0], 42.0, 80.0)
+    assert "final_score" not in rescored
+
+
+def test_duplicate_applications_are_merged_on_open(tmp_path):
+    path = str(tmp_path / "recruitment.db")
+    db = DBHandler(path)
+    job_id = db.create_job("Engineer", "d", {}, np.ones(4))
+    kept = db.create_candidate(job_id, "Same CV", {}, np.ones(4), 10.0)
+    # Rows a re-run inserted before applications were unique
+    with db.transaction() as conn:
+        conn.execute("DROP INDEX idx_candidates_job_document")
+        conn.execute("INSERT INTO candidates (job_id, document_id, score) VALUES (?, 1, 20.0)", (job_id,))
+        newest = conn.execute("INSERT INTO candidates (job_id, document_id, score) VALUES (?, 1, 30.0)",
+                              (job_id,)).lastrowid
+    db.enqueue_emails([{"candidate_id": kept, "to_email": "a@example.com", "subject": "Invite", "body": "Hi"}])
+    db.close()
+
+    db = DBHandler(path)
+    assert [(c["id"], c["score"]) for c in db.list_candidates(job_id)] == [(newest, 30.0)]
+    assert db.outbox_status()[0]["candidate_id"] == newest
+    db.close()
+
+
+def test_list_candidates_pages_in_sql(db):
+    job_id = db.create_job("Engineer", "d", {}, np.ones(4))
+    add_candidates(db, job_id, 30)
+    db.update_candidate_scores([{"id": 2, "llm_score": 90.0, "final_score": 95.0, "rerank_reason": "Strong"}])
+
+    assert db.count_candidates(job_id) == 30
+    first_page = db.list_candidates(job_id, limit=10)
+    # Reranked candidates stay on top, then the rest by score
+    assert [c["id"] for c in first_page] == [2] + list(range(30, 21, -1))
+    assert first_page[0]["rerank_reason"] == "Strong"
+    pages = [db.list_candidates(job_id, sort="score", limit=10, offset=offset) for offset in (0, 10, 20)]
+    assert [c["id"] for page in pages for c in page] == list(range(30, 0, -1))
+    assert [c["name"] for c in db.list_candidates(job_id, sort="name", descending=False, limit=3)] == [
+        "Candidate 00", "Candidate 01", "Candidate 02"]
+    assert db.count_candidates(job_id, min_score=25) == 6
+    assert [c["id"] for c in db.list_candidates(job_id, query="c7@")] == [8]
+    with pytest.raises(ValueError):
+        db.list_candidates(job_id, sort="email")
+
+
+def test_final_sort_reads_from_the_index(db):
+    order = db.CANDIDATE_SORTS["final"].format(direction="DESC")
+    plan = " | ".join(row[3] for row in db.conn.execute(f"""
+        EXPLAIN QUERY PLAN
+        SELECT c.candidate_id, (SELECT w.filename FROM work_items w WHERE w.candidate_id = c.candidate_id)
+        FROM candidates c WHERE c.job_id = ? ORDER BY {order}, c.candidate_id LIMIT 25
+    """, (1,)))
+    assert "idx_candidates_job_final" in plan and "idx_work_items_candidate" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_migrate_storage_rewrites_rows(tmp_path):
+    path = str(tmp_path / "recruitment.db")
+    db = DBHandler(path, text_compression=None)
+    job_id = db.create_job("Engineer", "Long description " * 50, {}, np.ones(8))
+    db.create_candidate(job_id, "CV text " * 50, {}, np.ones(8), 10.0)
+    db.close()
+
+    db = DBHandler(path, embedding_dtype="float16")
+    assert db.migrate_storage() == {"jobs": 1, "cv_documents": 1, "document_chunks": 0}
+    assert db.migrate_storage() == {"jobs": 0, "cv_documents": 0, "document_chunks": 0}
+    assert db.get_candidate(1)["cv_text"] == "CV text " * 50
+    db.close()
+
+
+def test_outbox_lifecycle(db):
+    db.enqueue_emails([{"candidate_id": 1, "to_email": f"c{i}@example.com", "subject": "Invite", "body": "Hi"}
+                       for i in range(3)])
+    batch = db.claim_outbox(limit=2)
+    assert [m["outbox_id"] for m in batch] == [1, 2]
+    assert db.claim_outbox(limit=2)[0]["outbox_id"] == 3
+
+    db.mark_outbox_sent(batch[:1])
+    db.mark_outbox_failed(batch[1], "550 no such user", None)
+    assert db.requeue_stuck_outbox() == 1
+    assert [(m["status"], m["attempts"]) for m in db.outbox_status()] == [("sent", 1), ("failed", 1), ("queued", 0)]
@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from agents.jd_summarizer import JDSummarizer
+from agents.matching_engine import MatchingEngine
+from services.csv_loader import detect_encoding, iter_csv_chunks, read_csv_with_encoding
+from services.job_catalog import JobCatalog
+
+CSV = ("Job Title,Job Description\n"
+       "Software Engineer,\"We need Python, Java and C++.\"\n"
+       "Data Scientist,Machine learning and statistics.\n"
+       "Empty,\n"
+       "Café Manager,Runs the café.\n")
+
+
+def catalog(db, url):
+    return JobCatalog(db, JDSummarizer(base_url=url), MatchingEngine(base_url=url), batch_size=2)
+
+
+def test_csv_loader_handles_encodings():
+    latin = CSV.encode("latin1")
+    assert detect_encoding(io.BytesIO(CSV.encode("utf-8"))) == "utf-8"
+    frame = read_csv_with_encoding(io.BytesIO(latin))
+    assert list(frame["Job Title"]) == ["Software Engineer", "Data Scientist", "Empty", "Café Manager"]
+    chunks = list(iter_csv_chunks(io.BytesIO(CSV.encode("utf-8")), chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+
+
+def test_catalog_stores_each_job_once(db, fake_ollama):
+    entries = catalog(db, fake_ollama.url).load(io.BytesIO(CSV.encode()), background=False)
+    assert [e["title"] for e in entries] == ["Software Engineer", "Data Scientist", "Café Manager"]
+
+    jobs = catalog(db, fake_ollama.url)
+    jobs.prepare(jobs.load(io.BytesIO(CSV.encode()), background=False))
+    assert jobs.progress(entries) == (3, 3)
+    generated = fake_ollama.request_counts["/api/generate"]
+
+    # A restart with the same file finds the stored jobs
+    again = catalog(db, fake_ollama.url)
+    entries = again.load(io.BytesIO(CSV.encode()), background=False)
+    assert all(e["job_id"] for e in entries)
+    job = again.job(entries[0]["source_key"])
+    assert job["title"] == "Software Engineer" and job["summary"]["required_skills"]
+    assert job["embedding_config"] == "nomic-embed-text;whole;input:2048"
+    assert fake_ollama.request_counts["/api/generate"] == generated
+
+
+def test_catalog_computes_on_demand(db, fake_ollama):
+    jobs = catalog(db, fake_ollama.url)
+    entries = jobs.load(io.BytesIO(CSV.encode()), background=False)
+    assert jobs.progress(entries) == (0, 3)
+    assert jobs.job(entries[1]["source_key"])["title"] == "Data Scientist"
+    assert jobs.progress(entries) == (1, 3)
+
+
+def test_catalog_rejects_missing_columns(db, fake_ollama):
+    with pytest.raises(ValueError):
+        catalog(db, fake_ollama.url).load(io.BytesIO(b"Title,Description\na,b\n"))
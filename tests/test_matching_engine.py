@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from agents.matching_engine import MatchingEngine
+from tests.conftest import counter
+
+
+@pytest.fixture
+def engine(fake_ollama, embedding_cache):
+    return MatchingEngine(base_url=fake_ollama.url, cache=embedding_cache, batch_size=4)
+
+
+def test_batched_embeddings_match_single_calls(fake_ollama, cvs):
+    batched = MatchingEngine(base_url=fake_ollama.url, batch_size=5).get_embeddings(cvs)
+    single = np.stack([MatchingEngine(base_url=fake_ollama.url).get_embedding(text) for text in cvs])
+
+    assert batched.shape == (len(cvs), 64) and batched.dtype == np.float32
+    np.testing.assert_allclose(batched, single)
+    # 12 texts in batches of 5
+    assert fake_ollama.request_counts["/api/embed"] == 3
+
+
+def test_async_embeddings_match_sync(fake_ollama, cvs):
+    engine = MatchingEngine(base_url=fake_ollama.url, batch_size=5, chunk_tokens=64)
+    longest = max(cvs, key=len)
+
+    async def run():
+        try:
+            return (await engine.aget_embeddings(cvs), await engine.aget_embedding(cvs[0]),
+                    await engine.aget_embedding(longest, chunked=True, pooling="max"))
+        finally:
+            await engine.client.aclose()
+
+    batched, single, pooled = asyncio.run(run())
+    assert fake_ollama.request_counts["/api/embed"] > 3
+    np.testing.assert_allclose(batched, engine.get_embeddings(cvs))
+    np.testing.assert_allclose(single, engine.get_embedding(cvs[0]))
+    np.testing.assert_allclose(pooled, engine.get_embedding(longest, chunked=True, pooling="max"))
+
+
+def test_embeddings_are_cached(engine, fake_ollama, cvs):
+    first = engine.get_embeddings(cvs)
+    requests = dict(fake_ollama.request_counts)
+    second = engine.get_embeddings(cvs)
+
+    np.testing.assert_array_equal(first, second)
+    assert fake_ollama.request_counts == requests
+    assert counter("cache_hits_total", cache="embedding") == len(cvs)
+
+
+def test_chunked_mode_is_chosen_per_call(fake_ollama, cvs):
+    engine = MatchingEngine(base_url=fake_ollama.url, chunk_tokens=64)
+    text = max(cvs, key=len)
+
+    _, chunks = engine.get_document_embedding(text, chunked=True, pooling="max")
+    assert len(chunks) > 1
+    assert engine.get_document_embedding(text)[1] == []
+    assert (engine.chunked, engine.pooling) == (False, "mean")
+    assert engine.embedding_config() != engine.embedding_config(chunked=True)
+    with pytest.raises(ValueError):
+        engine.get_embedding(text, chunked=True, pooling="median")
+
+
+def test_failed_embeddings_become_zero_vectors(embedding_cache):
+    engine = MatchingEngine(base_url="http://127.0.0.1:9", cache=embedding_cache)
+    engine.client.max_retries = 0
+
+    vector = engine.get_embedding("unreachable")
+    assert not vector.any()
+    assert engine.calculate_match(vector, np.ones(768)) == 0.0
+    assert embedding_cache.get(engine.model_name, "unreachable") is None
+
+
+def test_score_matrix_matches_calculate_match():
+    rng = np.random.default_rng(0)
+    jds, cvs = rng.normal(size=(4, 16)), rng.normal(size=(9, 16))
+    cvs[3] = 0
+    engine = MatchingEngine(base_url="http://127.0.0.1:9")
+
+    scores = engine.score_matrix(jds, cvs)
+    expected = [[engine.calculate_match(jd, cv) for cv in cvs] for jd in jds]
+    np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-4)
+    assert (scores[:, 3] == 0).all()
+
+
+def test_match_many_top_k_equals_brute_force():
+    rng = np.random.default_rng(1)
+    jds, cvs = rng.normal(size=(5, 16)), rng.normal(size=(40, 16))
+    engine = MatchingEngine(base_url="http://127.0.0.1:9")
+
+    result = engine.match_many(jds, cvs, k=7)
+    scores = result["scores"]
+    indices, values = result["top_cvs_per_job"]
+    for row in range(len(jds)):
+        assert list(indices[row]) == list(np.argsort(-scores[row], kind="stable")[:7])
+        np.testing.assert_allclose(values[row], np.sort(scores[row])[::-1][:7])
+    job_indices, _ = result["top_jobs_per_cv"]
+    assert job_indices.shape == (40, 5)
+    assert all(job_indices[i][0] == np.argmax(scores[:, i]) for i in range(40))
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+from services.ollama_client import JSONObjectScanner, OllamaClient, OllamaError
+from tests.conftest import counter
+
+
+@pytest.fixture
+def padded_ollama():
+    """Fake server that pads constrained answers with whitespace, as small models do"""
+    server = FakeOllamaServer(config=FakeOllamaConfig(generate_latency=0.0, token_latency=0.001,
+                                                      padding_tokens=300)).start()
+    yield server
+    server.stop()
+
+
+def test_scanner_finds_objects_across_pieces():
+    scanner = JSONObjectScanner()
+    text = 'Sure: {"a": "}{", "b": {"c": "\\"}"}} and {"d": 1}'
+    completed = []
+    for i in range(0, len(text), 3):
+        completed += scanner.feed(text[i:i + 3])
+    assert [text[start:end] for start, end in completed] == ['{"a": "}{", "b": {"c": "\\"}"}}', '{"d": 1}']
+
+
+def test_generate_json_stops_at_end_of_object(padded_ollama):
+    client = OllamaClient(padded_ollama.url)
+    result = client.generate_json("llama3.2", "JOB DESCRIPTION: Python developer",
+                                  schema={"type": "object"}, options={"num_predict": 1000})
+
+    assert result["stopped_early"]
+    assert set(result["parsed"]) >= {"required_skills", "key_responsibilities"}
+    assert result["eval_count"] < 300
+    assert result["prompt_eval_count"] > 0
+    assert counter("ollama_streams_stopped_early_total") == 1
+
+
+def test_async_generate_json_stops_at_end_of_object(padded_ollama):
+    client = OllamaClient(padded_ollama.url)
+
+    async def run():
+        try:
+            return await client.agenerate_json("llama3.2", "JOB DESCRIPTION: Python developer",
+                                               schema={"type": "object"}, options={"num_predict": 1000})
+        finally:
+            await client.aclose()
+
+    result = asyncio.run(run())
+    assert result["stopped_early"] and "required_skills" in result["parsed"]
+    assert result["eval_count"] < 300
+
+
+def test_generate_json_without_early_stop(fake_ollama):
+    result = OllamaClient(fake_ollama.url).generate_json("llama3.2", "CV Content: Ada Lovelace")
+    # Without padding the object ends with the stream, so the final chunk is read too
+    assert result["parsed"]["skills"]
+    assert result["eval_count"] > 0
+
+
+def test_non_retryable_status_fails_fast(fake_ollama):
+    client = OllamaClient(fake_ollama.url)
+    with pytest.raises(OllamaError):
+        client.post("/api/missing", {})
+    assert fake_ollama.request_counts["/api/missing"] == 1
+    assert counter("ollama_retries_total") == 0
+
+
+def test_retries_transient_failures():
+    server = FakeOllamaServer(config=FakeOllamaConfig(failure_rate=1.0)).start()
+    try:
+        client = OllamaClient(server.url, max_retries=2, backoff=0.0)
+        with pytest.raises(OllamaError):
+            client.embed("nomic-embed-text", ["text"])
+        assert server.request_counts["/api/embed"] == 3
+        # retries=0 is one attempt, not "use the default"
+        with pytest.raises(OllamaError):
+            client.post("/api/embed", {"model": "nomic-embed-text", "input": ["text"]}, retries=0)
+        assert server.request_counts["/api/embed"] == 4
+    finally:
+        server.stop()
+
+
+def test_async_retries_transient_failures():
+    server = FakeOllamaServer(config=FakeOllamaConfig(failure_rate=1.0)).start()
+    client = OllamaClient(server.url, max_retries=2, backoff=0.0)
+
+    async def run():
+        try:
+            with pytest.raises(OllamaError):
+                await client.aembed("nomic-embed-text", ["text"])
+            with pytest.raises(OllamaError):
+                await client.apost("/api/embed", {"model": "nomic-embed-text", "input": ["text"]}, retries=0)
+        finally:
+            await client.aclose()
+
+    try:
+        asyncio.run(run())
+        assert server.request_counts["/api/embed"] == 4
+        assert counter("ollama_retries_total") == 2
+    finally:
+        server.stop()
@@ -0,0 +1,86 @@
+import socket
+import time
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from agents.email_scheduler import EmailScheduler
+from services.outbox import OutboxWorker
+from tests.conftest import counter
+
+
+class Mailbox:
+    """aiosmtpd handler: "gone" addresses get 550, "busy" ones 451, the rest are delivered"""
+
+    def __init__(self):
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("gone"):
+            return "550 5.1.1 No such user"
+        if address.startswith("busy"):
+            return "451 4.3.0 Mailbox busy, try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    mailbox = Mailbox()
+    controller = Controller(mailbox, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield mailbox, port
+    controller.stop()
+
+
+def test_permanent_rejections_fail_at_once(db, smtp_server):
+    mailbox, port = smtp_server
+    scheduler = EmailScheduler("127.0.0.1", port, use_tls=False, use_auth=False, sender="hr@example.com")
+    db.enqueue_emails([{"candidate_id": i, "to_email": f"{who}@example.com", "subject": "Invite", "body": "Hi"}
+                       for i, who in enumerate(["ada", "gone", "busy"], 1)])
+
+    assert OutboxWorker(db, scheduler, min_interval=0).send_batch() == 3
+    assert mailbox.delivered == ["ada@example.com"]
+    status = {m["to_email"]: (m["status"], m["attempts"]) for m in db.outbox_status()}
+    assert status == {"ada@example.com": ("sent", 1),
+                      "gone@example.com": ("failed", 1),
+                      "busy@example.com": ("queued", 1)}
+    assert counter("emails_total", status="failed") == 2
+
+
+def test_connection_errors_are_retried(db):
+    # Nothing listens on port 9, so the connection itself fails
+    scheduler = EmailScheduler("127.0.0.1", 9, use_tls=False, use_auth=False, sender="hr@example.com")
+    db.enqueue_emails([{"candidate_id": 1, "to_email": "ada@example.com", "subject": "Invite", "body": "Hi"}])
+
+    OutboxWorker(db, scheduler, min_interval=0).send_batch()
+    assert [(m["status"], m["attempts"]) for m in db.outbox_status()] == [("queued", 1)]
+
+
+def test_interrupted_sends_are_resumed_on_start(db, smtp_server):
+    mailbox, port = smtp_server
+    scheduler = EmailScheduler("127.0.0.1", port, use_tls=False, use_auth=False, sender="hr@example.com")
+    db.enqueue_emails([{"candidate_id": i, "to_email": f"c{i}@example.com", "subject": "Invite", "body": "Hi"}
+                       for i in range(3)])
+    # A previous run claimed two messages and died before sending them
+    assert len(db.claim_outbox(2)) == 2
+    assert db.outbox_backlog() == 3
+
+    worker = OutboxWorker(db, scheduler, min_interval=0, poll_interval=0.05)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while db.outbox_backlog() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        worker.stop(timeout=5)
+    assert sorted(mailbox.delivered) == [f"c{i}@example.com" for i in range(3)]
+    assert db.outbox_backlog() == 0
+
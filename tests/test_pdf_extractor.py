@@ -0,0 +1,88 @@
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.corpus import write_pdf
+from services import pdf_extractor as pdf_extractor_module
+from services.pdf_extractor import PDFExtractor, iter_page_text, iter_pdf_paths
+from tests.conftest import counter
+
+# Body lines differ in letters, not just digits, so none of them looks like a running footer
+TEXT = "\n".join(["Ada Lovelace", "ada@example.com", "", "SKILLS", "Python, SQL"]
+                 + [f"Task {'abcdefghij'[i % 10]}{'klmnopqrst'[i // 10]}" for i in range(100)])
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    pdf_extractor = PDFExtractor(max_workers=2, time_limit=20.0)
+    yield pdf_extractor
+    pdf_extractor.shutdown()
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "cv.pdf"
+    write_pdf(str(path), TEXT, lines_per_page=40)
+    return str(path)
+
+
+def test_page_iterator_limits(pdf_path):
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    assert len(list(iter_page_text(data))) == 3
+    assert len(list(iter_page_text(pdf_path, max_pages=2))) == 2
+
+
+def test_extract(extractor, pdf_path):
+    text = extractor.extract(pdf_path)
+    assert text.startswith("Ada Lovelace") and "Task jt" in text
+
+
+def test_extract_many_skips_duplicates_and_reports_errors(extractor, pdf_path, tmp_path):
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    results = list(extractor.extract_many([("a", pdf_path), ("b", data), ("c", b"not a pdf"),
+                                           ("d", str(tmp_path / "missing.pdf"))]))
+    by_name = {r["name"]: r for r in results}
+
+    assert by_name["a"]["pages"] == 3 and by_name["a"]["error"] is None
+    assert by_name["a"]["text"].startswith("Ada Lovelace")
+    assert by_name["b"]["duplicate_of"] == "a"
+    assert by_name["c"]["error"].startswith("PDF Error")
+    assert by_name["d"]["error"].startswith("PDF Error")
+    assert list(iter_pdf_paths(str(tmp_path))) == [pdf_path]
+
+
+def test_stuck_file_is_killed_and_the_pool_replaced(pdf_path, monkeypatch):
+    open_pdf = pdf_extractor_module._open_pdf
+
+    def hanging_open(source):
+        if source == b"stuck":
+            # Like a page PyMuPDF never finishes: the between-pages time check is never reached
+            time.sleep(3600)
+        if source == b"slow":
+            time.sleep(2.0)
+            source = pdf_path
+        return open_pdf(source)
+
+    monkeypatch.setattr(pdf_extractor_module, "_open_pdf", hanging_open)
+    # Forked workers inherit the patched module
+    extractor = PDFExtractor(max_workers=2, time_limit=3.0, timeout_grace=1.0, poll_interval=0.05,
+                             mp_context=multiprocessing.get_context("fork"))
+    try:
+        with ThreadPoolExecutor(2) as threads:
+            hung = threads.submit(extractor.extract, b"stuck")
+            time.sleep(3.0)
+            # Still running when the stuck file is killed, so it is lost with the old pool and submitted again
+            alongside = threads.submit(extractor.extract, b"slow")
+            with pytest.raises(TimeoutError):
+                hung.result(timeout=10)
+            assert alongside.result(timeout=20).startswith("Ada Lovelace")
+        assert counter("pdf_timeouts_total") == 1
+        assert counter("pdf_pool_recycled_total") == 1
+        # The replacement pool keeps working
+        assert extractor.extract(pdf_path).startswith("Ada Lovelace")
+    finally:
+        extractor.shutdown()
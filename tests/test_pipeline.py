@@ -0,0 +1,60 @@
+from agents.cv_parser import CVParser
+from agents.matching_engine import MatchingEngine
+from services.pipeline import CVPipeline
+
+
+def extract(data: bytes) -> str:
+    return data.decode("utf-8")
+
+
+def test_pipeline_matches_serial_path(fake_ollama, cvs):
+    cv_parser = CVParser(base_url=fake_ollama.url)
+    matching_engine = MatchingEngine(base_url=fake_ollama.url)
+    jd_embedding = matching_engine.get_embedding("We are hiring a Python developer with Docker experience")
+    files = [(f"cv_{i}.pdf", text.encode("utf-8")) for i, text in enumerate(cvs)] + [("empty.pdf", b"")]
+
+    serial = []
+    for name, data in files:
+        text = extract(data)
+        if not text:
+            serial.append((name, None, None))
+            continue
+        embedding = matching_engine.get_embedding(text)
+        serial.append((name, cv_parser.parse(text), matching_engine.calculate_match(jd_embedding, embedding)))
+
+    progress = []
+    results = list(CVPipeline(cv_parser, matching_engine, extract, max_workers=4)
+                   .run(files, jd_embedding, on_progress=lambda done, total: progress.append((done, total))))
+
+    assert [r["filename"] for r in results] == [name for name, _ in files]
+    for result, (name, cv_data, score) in zip(results, serial):
+        assert result["error"] is None
+        assert result.get("cv_data") == cv_data
+        assert result.get("score") == score
+    assert progress[-1] == (len(files), len(files))
+
+
+def test_pipeline_reports_extraction_errors_in_order(fake_ollama, cvs):
+    def flaky_extract(data: bytes) -> str:
+        if data == b"broken":
+            raise ValueError("not a PDF")
+        return extract(data)
+
+    pipeline = CVPipeline(CVParser(base_url=fake_ollama.url), MatchingEngine(base_url=fake_ollama.url),
+                          flaky_extract, max_workers=3)
+    files = [("a.pdf", cvs[0].encode()), ("b.pdf", b"broken"), ("c.pdf", cvs[1].encode())]
+    results = list(pipeline.run(files, None))
+
+    assert [r["filename"] for r in results] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert results[1]["error"] == "PDF Error: not a PDF"
+    assert results[0]["score"] is None and results[0]["embedding"] is not None
+
+
+def test_pipeline_reuses_known_documents(fake_ollama, cvs):
+    stored = {"document_id": 7, "cv_data": {"name": "Stored"}, "embedding": [1.0] * 64}
+    pipeline = CVPipeline(CVParser(base_url=fake_ollama.url), MatchingEngine(base_url=fake_ollama.url), extract,
+                          find_document=lambda text: stored if text == cvs[0] else None)
+    results = list(pipeline.run([("a.pdf", cvs[0].encode()), ("b.pdf", cvs[1].encode())], None))
+
+    assert results[0]["document_id"] == 7 and results[0]["cv_data"] == {"name": "Stored"}
+    assert "document_id" not in results[1]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from database.db_handler import DBHandler
+from database.skill_index import SkillIndex, normalize_skill, skill_terms
+
+
+def test_skill_terms():
+    assert normalize_skill("Python (5 years)") == "python"
+    assert normalize_skill("K8s") == "kubernetes"
+    assert skill_terms("Python, golang; SQL\nPython") == ["python", "go", "sql"]
+    assert skill_terms([{"name": "C++"}, "Node.js", ""]) == ["c++", "node.js"]
+    assert skill_terms({"languages": ["Golang"], "tools": "Docker, Git"}) == ["go", "docker", "git"]
+    # The shape the CV parser often stores: categories with a list of technologies
+    assert skill_terms([{"category": "Backend", "technologies": ["Python", "PostgreSQL"]},
+                        {"category": "Cloud", "technologies": ["AWS", {"name": "k8s"}]}]) == \
+        ["python", "postgresql", "aws", "kubernetes"]
+
+
+def test_filter_and_coverage():
+    index = SkillIndex()
+    index.add_many([(1, 1, ["Python", "Docker"]), (2, 1, ["Python", "Kubernetes", "Docker"]), (3, 2, ["Java"])])
+
+    assert index.filter(["python", "docker"]) == {1, 2}
+    assert index.filter(["python"], any_of=["k8s"]) == {2}
+    assert index.filter(["python"], job_id=2) == set()
+    coverage = index.coverage(["Python", "Kubernetes"], [1, 2, 3])
+    assert coverage[2][0] == pytest.approx(100) and coverage[2][1] == ["python", "kubernetes"]
+    assert 0 < coverage[1][0] < 100 and coverage[3][0] == 0
+    scores = index.bm25(["kubernetes", "python"])
+    assert max(scores, key=scores.get) == 2
+
+
+def test_search_candidates_prefilters_by_skill(db):
+    job_id = db.create_job("Engineer", "d", {}, np.ones(4))
+    db.create_candidates([
+        {"job_id": job_id, "cv_text": "a", "cv_data": {"name": "A", "skills": ["Python"]},
+         "embedding": [1, 0, 0, 0], "score": 1.0},
+        {"job_id": job_id, "cv_text": "b", "cv_data": {"name": "B", "skills": ["Java"]},
+         "embedding": [1, 0.1, 0, 0], "score": 1.0},
+        {"job_id": job_id, "cv_text": "c", "cv_data": {"name": "C", "skills": [
+            {"category": "Programming", "technologies": ["Python", "Go"]}]},
+         "embedding": [0.5, 0, 0, 0], "score": 1.0},
+    ])
+    assert [m["name"] for m in db.search_candidates([1, 0, 0, 0], k=5)] == ["A", "C", "B"]
+    assert [m["name"] for m in db.search_candidates([1, 0, 0, 0], k=5, must_have=["python"])] == ["A", "C"]
+    assert db.search_candidates([1, 0, 0, 0], k=5, must_have=["rust"]) == []
+    hybrid = db.search_candidates([1, 0.1, 0, 0], k=5, skills=["java"], skill_weight=0.5)
+    assert hybrid[0]["name"] == "B" and hybrid[0]["matched_skills"] == ["java"]
+
+
+def test_search_candidates_lists_each_cv_once(db):
+    jobs = [db.create_job(title, "d", {}, np.ones(4)) for title in ("Engineer", "Analyst")]
+    for job_id, score in zip(jobs, (40.0, 70.0)):
+        db.create_candidate(job_id, "Same CV", {"name": "A", "skills": ["Python"]}, [1, 0, 0, 0], score)
+    db.create_candidate(jobs[0], "Other CV", {"name": "B", "skills": ["Python"]}, [1, 0.2, 0, 0], 50.0)
+
+    matches = db.search_candidates([1, 0, 0, 0], k=5, must_have=["python"])
+    assert [m["name"] for m in matches] == ["A", "B"]
+    assert len({m["document_id"] for m in matches}) == 2
+
+
+def test_sync_sees_rows_other_connections_wrote(db, tmp_path):
+    job_id = db.create_job("Engineer", "d", {}, np.ones(4))
+    index = SkillIndex()
+    db.attach_skill_index(index)
+
+    other = DBHandler(str(tmp_path / "recruitment.db"))
+    try:
+        other.create_candidate(job_id, "cv other", {"skills": ["Rust"]}, [1, 0, 0, 0], 60.0)
+    finally:
+        other.close()
+    db.create_candidate(job_id, "cv own", {"skills": ["Python"]}, [0, 1, 0, 0], 70.0)
+
+    index.sync(db)
+    assert index.filter(["rust"]) == {1}
+    assert index.filter(["python"]) == {2}
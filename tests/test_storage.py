@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from database.cache import EmbeddingCache, LLMResultCache, text_hash
+from database.codec import (decode_embedding, decode_text, embedding_dtype, encode_embedding, encode_text,
+                            is_compressed_text, is_legacy_embedding, quantization_error)
+from services.metrics import Metrics
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float32", 0), ("float16", 1e-3), ("int8", 2e-2)])
+def test_embedding_round_trip(dtype, tolerance):
+    vector = np.random.default_rng(0).normal(size=768).astype(np.float32)
+    blob = encode_embedding(vector, dtype)
+
+    assert embedding_dtype(blob) == dtype and not is_legacy_embedding(blob)
+    np.testing.assert_allclose(decode_embedding(blob), vector, atol=tolerance * np.abs(vector).max())
+
+
+def test_legacy_embeddings_still_decode():
+    vector = np.arange(8, dtype=np.float32)
+    assert is_legacy_embedding(vector.tobytes())
+    np.testing.assert_array_equal(decode_embedding(vector.tobytes()), vector)
+
+
+def test_text_round_trip():
+    text = "Python developer\n" * 200
+    stored = encode_text(text)
+    assert is_compressed_text(stored) and len(stored) < len(text)
+    assert decode_text(stored) == text
+    assert decode_text(encode_text(text, None)) == text
+
+
+def test_embedding_cache_shares_entries_across_formatting(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_memory_bytes=1024)
+    cache.put("model", "Python  developer\n", np.ones(4))
+
+    np.testing.assert_array_equal(cache.get("model", "Python developer"), np.ones(4))
+    assert cache.get("other-model", "Python developer") is None
+    # A new instance reads the SQLite tier
+    assert EmbeddingCache(str(tmp_path / "cache.db")).get("model", "Python developer") is not None
+    assert text_hash("a  b") == text_hash(" a b ")
+
+
+
+def test_quantization_error_reports_drift_and_overlap():
+    rng = np.random.default_rng(0)
+    jobs, cvs = rng.normal(size=(5, 64)).astype(np.float32), rng.normal(size=(200, 64)).astype(np.float32)
+
+    exact = quantization_error(jobs, cvs, "float32", k=10)
+    assert exact["max_abs_score_error"] == 0 and exact["top_k_overlap"] == 1.0
+    int8 = quantization_error(jobs, cvs, "int8", k=10)
+    assert 0 < int8["mean_abs_score_error"] < 1 and 0.8 <= int8["top_k_overlap"] <= 1.0
+
+def test_llm_result_cache_versions_and_expiry(tmp_path):
+    cache = LLMResultCache(str(tmp_path / "cache.db"))
+    cache.put("llama3.2", "v1", "cv text", {"name": "Ada"})
+
+    assert cache.get("llama3.2", "v1", "cv  text") == {"name": "Ada"}
+    assert cache.get("llama3.2", "v2", "cv text") is None
+    assert LLMResultCache(str(tmp_path / "cache.db"), max_age_seconds=-1).get("llama3.2", "v1", "cv text") is None
+
+
+def test_metrics_export():
+    registry = Metrics()
+    registry.incr("llm_calls_total", agent="cv_parser")
+    registry.incr("llm_calls_total", 2, agent="cv_parser")
+    with registry.timer("llm_seconds", agent="cv_parser"):
+        pass
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == [{"name": "llm_calls_total", "labels": {"agent": "cv_parser"}, "value": 3}]
+    assert snapshot["timers"][0]["count"] == 1
+    text = registry.to_prometheus()
+    assert 'llm_calls_total{agent="cv_parser"} 3' in text
+    assert 'llm_seconds_bucket{agent="cv_parser",le="+Inf"} 1' in text
+
+    registry.enabled = False
+    registry.incr("llm_calls_total", agent="cv_parser")
+    assert registry.snapshot()["counters"][0]["value"] == 3
+
+
+def test_metrics_drain_and_merge():
+    worker = Metrics()
+    worker.incr("llm_calls_total", agent="cv_parser")
+    worker.observe("llm_seconds", 0.2, agent="cv_parser")
+    drained = worker.drain()
+    assert worker.snapshot() == {"counters": [], "timers": []}
+
+    combined = Metrics(enabled=False)
+    combined.merge(drained)
+    combined.merge(drained)
+    snapshot = combined.snapshot()
+    assert snapshot["counters"][0]["value"] == 2
+    assert snapshot["timers"][0]["count"] == 2 and snapshot["timers"][0]["mean"] == pytest.approx(0.2)
+    assert 'llm_seconds_bucket{agent="cv_parser",le="0.25"} 2' in combined.to_prometheus()
+
@@ -0,0 +1,97 @@
+import numpy as np
+
+from agents.chunker import chunk_text, pool_embeddings
+from agents.rule_extractor import RuleExtractor, split_sections
+from services.text_preprocessing import (TextPreprocessor, clean_pages, clean_text, estimate_tokens,
+                                         truncate_to_budget)
+
+CV = """Grace Hopper
+Phone: +1 (555) 123-4567 | grace.hopper@example.com
+
+Professional Summary
+Compiler pioneer.
+
+Technical Skills:
+Python, k8s, golang, Machine Learning, C++
+
+WORK EXPERIENCE
+2019-2021 Senior Engineer, Remington Rand. Built the first compiler using Java and REST.
+
+Education
+PhD Mathematics, Yale
+"""
+
+
+def test_rule_extraction():
+    found = RuleExtractor().extract(CV)
+    assert found["name"] == "Grace Hopper"
+    assert found["email"] == "grace.hopper@example.com"
+    assert found["phone"] == "+1 (555) 123-4567"
+    assert found["skills"] == ["Python", "Kubernetes", "Go", "Machine Learning", "C++", "Java"]
+
+
+def test_sections():
+    sections = split_sections(CV)
+    assert list(sections) == ["header", "summary", "skills", "experience", "education"]
+    assert sections["education"] == "PhD Mathematics, Yale"
+
+
+def test_trimmed_context_keeps_only_needed_sections():
+    context = RuleExtractor().trimmed_context(CV, ["education"])
+    assert "PhD Mathematics" in context and "Remington" not in context and "k8s" not in context
+
+
+def test_trimmed_context_falls_back_when_a_heading_is_not_recognised():
+    cv = ("Ravi Kumar\nravi@example.com\n\nSKILLS\nPython, SQL\n\n"
+          "OVERALL EXPERIENCE -2 Years 5 Months\nData Analyst, Infosys, 2022-2024\nBuilt reporting pipelines\n\n"
+          "EDUCATION\nB.Tech Computer Science")
+    extractor = RuleExtractor()
+    assert extractor.trimmed_context(cv, ["experience", "certifications"]) == cv
+    # Certifications are often absent, so asking for them alone still trims
+    assert "Infosys" not in extractor.trimmed_context(cv, ["education", "certifications"])
+
+
+def test_clean_text():
+    assert clean_text("ﬁne  text​\r\n\r\n\r\n\nnext  line ") == "fine text\n\nnext line"
+
+
+def test_clean_pages_drops_running_headers_and_page_numbers():
+    pages = [f"Grace Hopper - CV\n\nbody {i}\n2019\n\nPage {i + 1} of 3" for i in range(3)]
+    cleaned = clean_pages(pages)
+    assert cleaned.count("Grace Hopper - CV") == 1
+    assert "Page" not in cleaned
+    assert cleaned.count("2019") == 3
+
+
+def test_truncate_keeps_priority_sections():
+    text = CV + "\nReferences\n" + "Available on request. " * 400
+    cut = truncate_to_budget(text, 120)
+    assert estimate_tokens(cut) <= 120
+    assert "grace.hopper@example.com" in cut and "Remington Rand" in cut
+    assert cut.index("Technical Skills") < cut.index("WORK EXPERIENCE")
+
+
+def test_preprocessor_budget():
+    text = "word " * 4000
+    assert estimate_tokens(TextPreprocessor(256).prepare(text)) <= 256
+    assert TextPreprocessor(256).prepare(text, truncate=False) == clean_text(text)
+    assert TextPreprocessor(None).prepare(text) == clean_text(text)
+
+
+def test_chunks_and_pooling():
+    chunks = chunk_text(CV + "\n" + "Led projects. " * 300, max_tokens=64, overlap_tokens=8)
+    assert {c["section"] for c in chunks} >= {"header", "skills", "experience"}
+    assert all(c["tokens"] <= 64 + 4 for c in chunks)
+
+    matrix = np.eye(len(chunks), 8, dtype=np.float32)
+    matrix[0] = 0
+    for method in ("mean", "max", "weighted"):
+        pooled = pool_embeddings(matrix, chunks, method)
+        assert pooled.shape == (8,) and pooled[0] == 0
+
+
+def test_weighted_pooling_weighs_sections_not_tokens():
+    chunks = [{"section": "experience", "tokens": 500}] * 4 + [{"section": "skills", "tokens": 10}]
+    matrix = np.array([[1, 0]] * 4 + [[0, 1]], dtype=np.float32)
+    # Experience and skills share the same weight, however many chunks and tokens each has
+    np.testing.assert_allclose(pool_embeddings(matrix, chunks, "weighted"), [0.5, 0.5])
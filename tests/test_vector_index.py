@@ -0,0 +1,68 @@
+import numpy as np
+
+from database.db_handler import DBHandler
+from database.vector_index import CandidateIndex
+
+
+def brute_force(matrix, ids, query, k):
+    normalized = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = np.clip(normalized @ (query / np.linalg.norm(query)) * 100, 0, 100)
+    order = np.argsort(-scores, kind="stable")[:k]
+    return [ids[i] for i in order], scores[order]
+
+
+def test_top_k_equals_brute_force():
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(3000, 32)).astype(np.float32)
+    ids = list(range(1, 3001))
+    index = CandidateIndex(initial_capacity=16)
+    index.add_many([(cid, cid % 3, vector) for cid, vector in zip(ids, matrix)])
+
+    for _ in range(5):
+        query = rng.normal(size=32)
+        hits = index.search(query, k=10)
+        expected_ids, expected_scores = brute_force(matrix, ids, query, 10)
+        assert [cid for cid, _, _ in hits] == expected_ids
+        np.testing.assert_allclose([score for _, _, score in hits], expected_scores, rtol=1e-4, atol=1e-4)
+
+
+def test_filters_and_skips():
+    index = CandidateIndex()
+    index.add_many([(1, 10, [1.0, 0.0]), (2, 20, [0.9, 0.1]), (3, 10, [0.0, 0.0]), (4, 10, [1.0])])
+    index.add(1, 10, [0.0, 1.0])  # already known
+
+    assert index.size == 2
+    assert [hit[0] for hit in index.search([1.0, 0.0], k=5)] == [1, 2]
+    assert [hit[0] for hit in index.search([1.0, 0.0], k=5, job_id=20)] == [2]
+    assert [hit[0] for hit in index.search([1.0, 0.0], k=5, candidate_ids=[2, 3])] == [2]
+    assert index.search([0.0, 0.0], k=5) == []
+
+
+def test_sync_loads_only_new_rows(db):
+    job_id = db.create_job("Engineer", "Python", {}, np.ones(4))
+    db.create_candidates([{"job_id": job_id, "cv_text": f"cv {i}", "cv_data": {}, "embedding": np.eye(4)[i % 4],
+                           "score": 50.0} for i in range(6)])
+    index = CandidateIndex()
+    db.attach_index(index)
+    assert index.size == 6
+
+    db.create_candidate(job_id, "cv new", {}, np.ones(4), 70.0)
+    assert index.size == 7
+    assert index.search(np.ones(4), k=1)[0][0] == 7
+
+
+def test_sync_sees_rows_other_connections_wrote(db, tmp_path):
+    job_id = db.create_job("Engineer", "Python", {}, np.ones(4))
+    index = CandidateIndex()
+    db.attach_index(index)
+
+    other = DBHandler(str(tmp_path / "recruitment.db"))
+    try:
+        assert other.create_candidate(job_id, "cv other", {}, np.eye(4)[0], 60.0) == 1
+    finally:
+        other.close()
+    assert db.create_candidate(job_id, "cv own", {}, np.eye(4)[1], 70.0) == 2
+
+    index.sync(db)
+    assert index.size == 2
+    assert index.search(np.eye(4)[0], k=1)[0][0] == 1
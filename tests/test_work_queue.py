@@ -0,0 +1,140 @@
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from agents.cv_parser import CVParser
+from agents.matching_engine import MatchingEngine
+from database.db_handler import DBHandler
+from services.metrics import metrics
+from services.work_queue import ScreeningWorker
+from tests.conftest import counter
+
+
+def extract(data: bytes) -> str:
+    return data.decode("utf-8")
+
+
+@pytest.fixture
+def job_id(db, fake_ollama):
+    engine = MatchingEngine(base_url=fake_ollama.url)
+    return db.create_job("Engineer", "Python", {}, engine.get_embedding("Python developer"))
+
+
+def worker(db, fake_ollama, **options):
+    return ScreeningWorker(db, CVParser(base_url=fake_ollama.url), MatchingEngine(base_url=fake_ollama.url),
+                           extract_text=extract, heartbeat_interval=0.05, **options)
+
+
+def test_items_are_screened_in_stages(db, fake_ollama, job_id, cvs):
+    db.enqueue_work(job_id, [(f"cv_{i}.pdf", text.encode()) for i, text in enumerate(cvs[:4])] + [("empty.pdf", b"")],
+                    run_id="run-1")
+    worker(db, fake_ollama).run(exit_when_idle=True)
+
+    progress = db.work_progress(job_id, "run-1")
+    assert progress["total"] == 5 and progress["finished"] == 5
+    assert progress["status"] == {"done": 4, "failed": 1}
+    done = db.work_results(job_id, "run-1", status="done")
+    assert [item["filename"] for item in done] == [f"cv_{i}.pdf" for i in range(4)]
+    assert db.count_candidates(job_id, "run-1") == 4
+    assert {c["filename"] for c in db.list_candidates(job_id, "run-1")} == {f"cv_{i}.pdf" for i in range(4)}
+
+
+def test_worker_metrics_are_exported_to_the_database(db, fake_ollama, job_id, cvs):
+    db.enqueue_work(job_id, [(f"cv_{i}.pdf", text.encode()) for i, text in enumerate(cvs[:3])])
+    worker(db, fake_ollama, export_metrics=True).run(exit_when_idle=True)
+
+    # The worker's own registry was drained into its row
+    assert counter("work_items_total") == 0
+    exported = db.worker_metrics()
+    assert sum(c["value"] for c in exported.snapshot()["counters"] if c["name"] == "work_items_total") == 3
+    assert 'work_item_seconds_count 3' in exported.to_prometheus()
+    assert metrics.snapshot()["timers"] == []
+
+    db.clear_worker_metrics()
+    assert db.worker_metrics().snapshot() == {"counters": [], "timers": []}
+
+
+def test_stale_item_resumes_from_last_stage(db, fake_ollama, job_id, cvs):
+    db.enqueue_work(job_id, [("cv.pdf", cvs[0].encode())])
+    # A worker that got as far as parsing and then died
+    item = db.claim_work_item("dead-worker")
+    db.advance_work_item(item["item_id"], "dead-worker", "extracted", cv_text=cvs[0])
+    db.advance_work_item(item["item_id"], "dead-worker", "parsed", cv_data={"name": "Parsed before the crash"})
+    assert db.claim_work_item("other-worker", stale_after=60) is None
+
+    parses = []
+    survivor = worker(db, fake_ollama, stale_after=0)
+    survivor.cv_parser.parse = lambda text: parses.append(text)
+    assert survivor.process_next()
+
+    assert parses == []
+    [result] = db.work_results(job_id)
+    assert result["status"] == "done"
+    assert db.get_candidate(result["candidate_id"])["cv_data"] == {"name": "Parsed before the crash"}
+    # The dead worker's late writes are rejected
+    with pytest.raises(LookupError):
+        db.complete_work_item(item["item_id"], "dead-worker", job_id, result["document_id"], 1.0)
+
+
+def hang_while_embedding(db_path, ollama_url, embedding):
+    """Worker process that parses its item and then hangs until it is killed"""
+    db = DBHandler(db_path)
+    screening = ScreeningWorker(db, CVParser(base_url=ollama_url), MatchingEngine(base_url=ollama_url),
+                                extract_text=extract, heartbeat_interval=0.05)
+    screening.matching_engine.get_document_embedding = lambda *args, **kwargs: (embedding.set(), time.sleep(600))
+    screening.run(exit_when_idle=True)
+
+
+def test_killed_worker_item_is_finished_once(db, fake_ollama, job_id, cvs):
+    db.enqueue_work(job_id, [("cv.pdf", cvs[0].encode())], run_id="run-1")
+    context = multiprocessing.get_context("spawn")
+    embedding = context.Event()
+    process = context.Process(target=hang_while_embedding, args=(db.db_path, fake_ollama.url, embedding))
+    process.start()
+    try:
+        assert embedding.wait(60)
+    finally:
+        process.kill()
+        process.join()
+
+    [item] = db.work_results(job_id)
+    assert item["status"] == "running" and item["stage"] == "parsed"
+    # The dead worker's heartbeat stops, so the item is re-leased once it goes stale
+    assert db.claim_work_item("other-worker", stale_after=60) is None
+    survivor = worker(db, fake_ollama, stale_after=0.2)
+    survivor.cv_parser.parse = lambda text: pytest.fail("parsed again after the crash")
+    time.sleep(0.3)
+    survivor.run(exit_when_idle=True)
+
+    [item] = db.work_results(job_id)
+    assert item["status"] == "done"
+    assert db.count_candidates(job_id) == 1 and db.count_candidates(job_id, "run-1") == 1
+    assert db.conn.execute("SELECT attempts FROM work_items WHERE item_id = ?", (item["item_id"],)).fetchone()[0] == 2
+    assert not survivor.process_next()
+
+
+def test_failing_item_gives_up_after_max_attempts(db, fake_ollama, job_id):
+    def broken(data):
+        raise RuntimeError("corrupt PDF")
+
+    db.enqueue_work(job_id, [("bad.pdf", b"%PDF")])
+    screening = worker(db, fake_ollama, max_attempts=2)
+    screening.extract_text = broken
+    screening.run(exit_when_idle=True)
+
+    [result] = db.work_results(job_id)
+    assert result["status"] == "failed" and result["error"] == "RuntimeError: corrupt PDF"
+    assert db.unfinished_work_runs() == []
+
+
+def test_known_documents_skip_parsing(db, fake_ollama, job_id, cvs):
+    db.create_candidate(job_id, cvs[0], {"name": "Known"}, np.ones(64), 10.0)
+    db.enqueue_work(job_id, [("again.pdf", cvs[0].encode())], run_id="run-2")
+    screening = worker(db, fake_ollama)
+    screening.cv_parser.parse = lambda text: pytest.fail("parsed a known CV")
+    screening.run(exit_when_idle=True)
+
+    [candidate] = db.list_candidates(job_id, "run-2")
+    assert candidate["name"] == "Known" and candidate["filename"] == "again.pdf"